@@ -0,0 +1,107 @@
+const cluster = require('cluster');
+const os = require('os');
+require('dotenv').config();
+
+const WORKERS = parseInt(process.env.WEB_CONCURRENCY, 10) || os.cpus().length;
+const SHUTDOWN_TIMEOUT_MS = parseInt(process.env.CLUSTER_SHUTDOWN_TIMEOUT_MS, 10) || 30 * 1000;
+const MAX_RESTART_DELAY_MS = 30 * 1000;
+
+// Run the API on every core: the primary forks WORKERS copies of server/index.js,
+// which share the listening port, and relays messages between them (rate limit
+// counts, cache invalidations, job status). SIGUSR2 restarts the workers one at
+// a time without dropping requests; SIGTERM/SIGINT drain them and exit.
+if (cluster.isWorker) {
+  require('./index');
+} else {
+  const clusterBus = require('./services/clusterBus');
+  // Registers the shared rate limit counter with the bus
+  require('./services/rateLimitStore');
+
+  // Split the compile slots and password hashing threads between workers
+  // rather than giving each one per core
+  const perWorker = String(Math.max(1, Math.floor(os.cpus().length / WORKERS)));
+  const env = {
+    COMPILER_CONCURRENCY: process.env.COMPILER_CONCURRENCY || perWorker,
+    PASSWORD_HASH_THREADS: process.env.PASSWORD_HASH_THREADS || perWorker
+  };
+
+  const slots = new Map();
+  const crashes = new Map();
+  let shuttingDown = false;
+
+  const fork = (slot) => {
+    const worker = cluster.fork({ ...env, CLUSTER_WORKER_SLOT: String(slot) });
+    worker.slot = slot;
+    clusterBus.attach(worker);
+    slots.set(slot, worker);
+    worker.once('listening', () => crashes.set(slot, 0));
+    return worker;
+  };
+
+  // Let a worker finish its in-flight requests, killing it if it takes too long
+  const stop = (worker) => {
+    worker.retired = true;
+    const timer = setTimeout(() => worker.kill(), SHUTDOWN_TIMEOUT_MS);
+    worker.once('exit', () => clearTimeout(timer));
+    worker.disconnect();
+  };
+
+  cluster.on('exit', (worker, code, signal) => {
+    if (shuttingDown || worker.retired) return;
+
+    // Crashed workers come back with an increasing delay so a bad deploy cannot spin
+    const attempts = (crashes.get(worker.slot) || 0) + 1;
+    const delay = Math.min(1000 * 2 ** (attempts - 1), MAX_RESTART_DELAY_MS);
+    crashes.set(worker.slot, attempts);
+    console.error(`Worker ${worker.process.pid} exited (${signal || code}), restarting in ${delay}ms`);
+    setTimeout(() => {
+      if (!shuttingDown) fork(worker.slot);
+    }, delay);
+  });
+
+  // Replace workers one at a time; each old worker stops only once its replacement is listening
+  const restart = async () => {
+    console.log('Restarting workers');
+    for (const [slot, previous] of [...slots]) {
+      const replacement = fork(slot);
+      const started = await new Promise((resolve) => {
+        const failed = () => {
+          // Keep the old worker serving instead of crash-looping the new one
+          replacement.retired = true;
+          resolve(false);
+        };
+        replacement.once('exit', failed);
+        replacement.once('listening', () => {
+          replacement.off('exit', failed);
+          resolve(true);
+        });
+      });
+      if (!started) {
+        slots.set(slot, previous);
+        throw new Error(`Replacement worker for slot ${slot} exited before listening.`);
+      }
+      stop(previous);
+    }
+  };
+
+  const shutdown = (signal) => {
+    if (shuttingDown) return;
+    shuttingDown = true;
+    console.log(`${signal} received, stopping workers`);
+    const workers = Object.values(cluster.workers);
+    if (workers.length === 0) process.exit(0);
+    workers.forEach(stop);
+    cluster.on('exit', () => {
+      if (Object.keys(cluster.workers).length === 0) process.exit(0);
+    });
+  };
+
+  process.on('SIGUSR2', () => {
+    restart().catch(error => console.error('Error restarting workers:', error));
+  });
+  process.on('SIGTERM', () => shutdown('SIGTERM'));
+  process.on('SIGINT', () => shutdown('SIGINT'));
+
+  console.log(`Primary ${process.pid} starting ${WORKERS} workers`);
+  for (let slot = 0; slot < WORKERS; slot++) fork(slot);
+}
@@ -1,20 +1,36 @@
+// Load .env before any module reads its configuration
+require('dotenv').config();
 const express = require('express');
 const mongoose = require('mongoose');
 const cors = require('cors');
 const helmet = require('helmet');
 const rateLimit = require('express-rate-limit');
-require('dotenv').config();
+const cluster = require('cluster');
+// Query profiling hooks must be registered before any model is compiled
+const queryProfiler = require('./services/queryProfiler');
+queryProfiler.install();
+const { SharedStore } = require('./services/rateLimitStore');
+const { rateLimiter } = require('./middleware/rateLimit');
+const metrics = require('./services/metrics');
+const { CONTENT_TYPE } = require('./utils/metrics');
 
 const app = express();
 const PORT = process.env.PORT || 5000;
 
+// Request counts and latency per route, for /api/metrics
+app.use(metrics.httpMetrics);
+
 // Security middleware
 app.use(helmet());
 
-// Rate limiting
+// Coarse per-IP flood guard; counts are shared by all workers in cluster mode.
+// Fair use is enforced per user by the token buckets below.
 const limiter = rateLimit({
   windowMs: 15 * 60 * 1000, // 15 minutes
-  max: 100 // limit each IP to 100 requests per windowMs
+  max: parseInt(process.env.RATE_LIMIT_IP_MAX, 10) || 3000, // requests per IP per windowMs
+  store: new SharedStore({ prefix: 'api:' }),
+  // Scrapes come from a handful of monitoring hosts and must never be throttled
+  skip: req => req.path === '/api/metrics'
 });
 app.use(limiter);
 
@@ -24,17 +40,44 @@ app.use(cors({
   credentials: true
 }));
 
+// Per-user token buckets; compiles and submissions cost more than reads
+app.use('/api', rateLimiter());
+
 // Body parsing middleware
 app.use(express.json({ limit: '10mb' }));
 app.use(express.urlencoded({ extended: true }));
 
+// Per-request query tracking for N+1 detection (only with QUERY_PROFILER=true).
+// Mounted after the body parsers: they call next() from stream callbacks that
+// run outside the request's async context, which would detach every query a
+// POST or PUT handler makes from its request.
+app.use(queryProfiler.profileRequests);
+
 // MongoDB connection
 if (process.env.NODE_ENV !== 'test') {
   mongoose.connect(process.env.MONGODB_URI || 'mongodb://localhost:27017/c-ds-algo', {
     useNewUrlParser: true,
     useUnifiedTopology: true,
+    monitorCommands: true
+  })
+  .then(() => {
+    console.log('MongoDB connected successfully');
+    metrics.instrumentMongo(mongoose.connection.getClient());
+    // Move progress still embedded in user documents into the Progress collection;
+    // in cluster mode only the first worker does this
+    if (!cluster.isWorker || process.env.CLUSTER_WORKER_SLOT === '0') {
+      require('./services/progressStore').migrateEmbeddedProgress()
+        .then(({ migratedUsers, migratedItems }) => {
+          if (migratedUsers > 0) {
+            console.log(`Migrated ${migratedItems} progress entries for ${migratedUsers} users`);
+          }
+        })
+        .catch((err) => console.error('Progress migration error:', err));
+    }
+    // Build the leaderboards before the first request needs them
+    require('./services/leaderboard').leaderboard.ready()
+      .catch((err) => console.error('Leaderboard load error:', err));
   })
-  .then(() => console.log('MongoDB connected successfully'))
   .catch((err) => console.error('MongoDB connection error:', err));
 }
 
@@ -44,6 +87,10 @@ app.use('/api/datastructures', require('./routes/datastructures'));
 app.use('/api/algorithms', require('./routes/algorithms'));
 app.use('/api/compiler', require('./routes/compiler'));
 app.use('/api/users', require('./routes/users'));
+app.use('/api/jobs', require('./routes/jobs'));
+app.use('/api/leaderboard', require('./routes/leaderboard'));
+app.use('/api/learning', require('./routes/learning'));
+app.use('/api/profiler', require('./routes/profiler'));
 
 // Health check endpoint
 app.get('/api/health', (req, res) => {
@@ -54,6 +101,17 @@ app.get('/api/health', (req, res) => {
   });
 });
 
+// Prometheus metrics; set METRICS_TOKEN to require it as a bearer token
+app.get('/api/metrics', (req, res) => {
+  const token = process.env.METRICS_TOKEN;
+  if (token && req.header('Authorization') !== `Bearer ${token}`) {
+    return res.status(401).json({ error: 'Access denied.' });
+  }
+
+  res.set('Content-Type', CONTENT_TYPE);
+  res.send(metrics.registry.render());
+});
+
 // Error handling middleware
 app.use((err, req, res, next) => {
   console.error(err.stack);
@@ -70,9 +128,46 @@ app.use('*', (req, res) => {
 
 // Only start server if not in test environment
 if (process.env.NODE_ENV !== 'test') {
-  app.listen(PORT, () => {
+  const server = app.listen(PORT, () => {
     console.log(`Server is running on port ${PORT}`);
   });
+  const { submissionCounters } = require('./services/submissionCounters');
+
+  // Coalesced submission counts still in memory are written before the
+  // database connection closes
+  const closeDatabase = async () => {
+    await submissionCounters.close();
+    await mongoose.connection.close();
+  };
+
+  // The cluster primary disconnects a worker to stop it: its server stops
+  // accepting connections and drains, then compiles and async jobs accepted
+  // with 202 get up to SHUTDOWN_DRAIN_TIMEOUT_MS to finish writing their
+  // results before the database connection closes
+  if (cluster.isWorker) {
+    const { scheduler } = require('./services/scheduler');
+    const { jobStore } = require('./services/jobStore');
+    const drainTimeoutMs = parseInt(process.env.SHUTDOWN_DRAIN_TIMEOUT_MS, 10) || 25 * 1000;
+    const idle = () => scheduler.running === 0 && scheduler.queued === 0 && jobStore.activeCount() === 0;
+
+    process.on('disconnect', async () => {
+      const deadline = Date.now() + drainTimeoutMs;
+      while (!idle() && Date.now() < deadline) {
+        await new Promise(resolve => setTimeout(resolve, 100));
+      }
+      if (!idle()) console.error('Closing MongoDB with background jobs still running');
+      closeDatabase().catch((err) => console.error('MongoDB close error:', err));
+    });
+  } else {
+    const shutdown = () => {
+      server.close();
+      closeDatabase()
+        .catch((err) => console.error('MongoDB close error:', err))
+        .finally(() => process.exit(0));
+    };
+    process.once('SIGTERM', shutdown);
+    process.once('SIGINT', shutdown);
+  }
 }
 
 module.exports = app;
@@ -1,26 +1,69 @@
 const jwt = require('jsonwebtoken');
+const User = require('../models/User');
+const authCache = require('../services/authCache');
 
+const bearerToken = req => req.header('Authorization')?.replace('Bearer ', '');
+
+// The slim principal ({ _id, role, isActive }) a token belongs to, or null if
+// its user no longer exists. Throws when the token does not verify. Verified
+// tokens are cached briefly, so most calls skip both jwt.verify and the lookup.
+const resolvePrincipal = async (token) => {
+  const cached = authCache.get(token);
+  if (cached) return cached;
+
+  const startEpoch = authCache.currentEpoch();
+  const decoded = jwt.verify(token, process.env.JWT_SECRET || 'fallback_secret');
+  const user = await User.findById(decoded.userId).select('role isActive').lean();
+
+  if (!user) return null;
+
+  const principal = { _id: user._id, role: user.role, isActive: user.isActive !== false };
+  authCache.set(token, principal, { exp: decoded.exp, startEpoch });
+  return principal;
+};
+
+// Verify the bearer token and attach its principal as req.user; routes that
+// need the full profile load it.
 const authMiddleware = async (req, res, next) => {
   try {
-    const token = req.header('Authorization')?.replace('Bearer ', '');
+    const token = bearerToken(req);
     
     if (!token) {
       return res.status(401).json({ error: 'Access denied. No token provided.' });
     }
 
-    const decoded = jwt.verify(token, process.env.JWT_SECRET || 'fallback_secret');
-    const User = require('../models/User');
-    const user = await User.findById(decoded.userId).select('-password');
-    
-    if (!user) {
+    const principal = await resolvePrincipal(token);
+
+    if (!principal) {
       return res.status(401).json({ error: 'Invalid token.' });
     }
 
-    req.user = user;
+    if (!principal.isActive) {
+      return res.status(401).json({ error: 'Account is deactivated.' });
+    }
+
+    req.user = principal;
     next();
   } catch (error) {
     res.status(401).json({ error: 'Invalid token.' });
   }
 };
 
+// Attach the principal when a valid token is present; anyone else passes through anonymously
+const optionalAuth = async (req, res, next) => {
+  const token = bearerToken(req);
+  if (token) {
+    try {
+      const principal = await resolvePrincipal(token);
+      if (principal && principal.isActive) req.user = principal;
+    } catch (error) {
+      // An invalid token is treated as no token
+    }
+  }
+  next();
+};
+
 module.exports = authMiddleware;
+module.exports.optionalAuth = optionalAuth;
+module.exports.bearerToken = bearerToken;
+module.exports.resolvePrincipal = resolvePrincipal;
@@ -0,0 +1,78 @@
+const { bearerToken, resolvePrincipal } = require('./auth');
+const { takeTokens } = require('../services/rateLimitStore');
+
+const CAPACITY = parseInt(process.env.RATE_LIMIT_CAPACITY, 10) || 300;
+const REFILL_PER_SEC = parseFloat(process.env.RATE_LIMIT_REFILL_PER_SEC) || 1;
+const DEFAULT_COST = 1;
+
+// Tokens each request takes, matched in order against METHOD and the path
+// below /api. Anything that runs gcc or the sandbox costs far more than a
+// catalog read; password hashing sits in between.
+const ROUTE_COSTS = [
+  ['GET', /^\/(health|metrics)$/, 0],
+  ['POST', /^\/compiler\/compile(\/stream)?$/, 10],
+  ['POST', /^\/compiler\/(validate|format)$/, 3],
+  ['POST', /^\/algorithms\/[^/]+\/submit$/, 10],
+  ['POST', /^\/algorithms\/[^/]+\/(profile|benchmark)$/, 30],
+  ['POST', /^\/auth\/(login|register)$/, 5]
+];
+
+const costOf = (req) => {
+  const match = ROUTE_COSTS.find(([method, pattern]) => method === req.method && pattern.test(req.path));
+  return Math.min(match ? match[2] : DEFAULT_COST, CAPACITY);
+};
+
+// Bucket key: the signed-in user when the bearer token checks out, else the client IP,
+// so a classroom behind one address is not limited as a single client
+const clientKey = async (req) => {
+  const token = bearerToken(req);
+  if (token) {
+    try {
+      const principal = await resolvePrincipal(token);
+      if (principal && principal.isActive) return `user:${principal._id}`;
+    } catch (error) {
+      // Invalid tokens are rejected by the route itself; limit them by IP
+    }
+  }
+  return `ip:${req.ip}`;
+};
+
+// Token-bucket rate limiting for the API, shared across cluster workers.
+// Every response carries RateLimit-Limit/-Remaining/-Reset; refusals are 429
+// with Retry-After.
+const rateLimiter = ({ capacity = CAPACITY, refillPerSec = REFILL_PER_SEC } = {}) => async (req, res, next) => {
+  try {
+    const cost = costOf(req);
+    if (cost === 0) return next();
+
+    const key = await clientKey(req);
+    const bucket = await takeTokens(key, cost, { capacity, refillPerSec });
+
+    res.set('RateLimit-Limit', String(capacity));
+    res.set('RateLimit-Remaining', String(bucket.remaining));
+    res.set('RateLimit-Reset', String(Math.ceil(bucket.resetMs / 1000)));
+    res.set('RateLimit-Policy', `${capacity};w=${Math.ceil(capacity / refillPerSec)}`);
+
+    if (!bucket.allowed) {
+      const retryAfter = Math.ceil(bucket.retryAfterMs / 1000);
+      res.set('Retry-After', String(retryAfter));
+      return res.status(429).json({
+        error: 'Too many requests. Please slow down.',
+        cost,
+        retryAfter
+      });
+    }
+
+    next();
+  } catch (error) {
+    // Never turn a limiter fault into an outage
+    console.error('Error applying rate limit:', error);
+    next();
+  }
+};
+
+module.exports = {
+  rateLimiter,
+  costOf,
+  ROUTE_COSTS
+};
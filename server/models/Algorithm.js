@@ -94,10 +94,19 @@ algorithmSchema.index({ name: 1, category: 1 });
 algorithmSchema.index({ tags: 1 });
 algorithmSchema.index({ difficulty: 1 });
 
+// Keyset pagination: every listing filter followed by the (createdAt, _id) sort
+algorithmSchema.index({ createdAt: -1, _id: -1 });
+algorithmSchema.index({ category: 1, difficulty: 1, createdAt: -1, _id: -1 });
+algorithmSchema.index({ difficulty: 1, createdAt: -1, _id: -1 });
+
 // Calculate success rate
+algorithmSchema.statics.successRate = function(submissions) {
+  if (!submissions || submissions.total === 0) return 0;
+  return (submissions.successful / submissions.total) * 100;
+};
+
 algorithmSchema.methods.getSuccessRate = function() {
-  if (this.submissions.total === 0) return 0;
-  return (this.submissions.successful / this.submissions.total) * 100;
+  return this.constructor.successRate(this.submissions);
 };
 
 module.exports = mongoose.model('Algorithm', algorithmSchema);
@@ -55,6 +55,10 @@ const dataStructureSchema = new mongoose.Schema({
     default: 'beginner'
   },
   tags: [String],
+  prerequisites: [{
+    type: mongoose.Schema.Types.ObjectId,
+    ref: 'DataStructure'
+  }],
   createdBy: {
     type: mongoose.Schema.Types.ObjectId,
     ref: 'User',
@@ -68,4 +72,9 @@ const dataStructureSchema = new mongoose.Schema({
 dataStructureSchema.index({ name: 1, category: 1 });
 dataStructureSchema.index({ tags: 1 });
 
+// Keyset pagination: every listing filter followed by the (createdAt, _id) sort
+dataStructureSchema.index({ createdAt: -1, _id: -1 });
+dataStructureSchema.index({ category: 1, difficulty: 1, createdAt: -1, _id: -1 });
+dataStructureSchema.index({ difficulty: 1, createdAt: -1, _id: -1 });
+
 module.exports = mongoose.model('DataStructure', dataStructureSchema);
@@ -0,0 +1,36 @@
+const mongoose = require('mongoose');
+
+// One row per user and completed algorithm or data structure
+const progressSchema = new mongoose.Schema({
+  user: {
+    type: mongoose.Schema.Types.ObjectId,
+    ref: 'User',
+    required: true
+  },
+  itemType: {
+    type: String,
+    required: true,
+    enum: ['algorithm', 'datastructure']
+  },
+  item: {
+    type: mongoose.Schema.Types.ObjectId,
+    required: true
+  },
+  score: {
+    type: Number,
+    default: 0
+  },
+  completedAt: {
+    type: Date,
+    default: Date.now
+  }
+}, {
+  timestamps: true
+});
+
+// Completion checks and best-score upserts hit this unique index
+progressSchema.index({ user: 1, itemType: 1, item: 1 }, { unique: true });
+// A user's recent activity, newest first
+progressSchema.index({ user: 1, completedAt: -1 });
+
+module.exports = mongoose.model('Progress', progressSchema);
@@ -1,5 +1,5 @@
 const mongoose = require('mongoose');
-const bcrypt = require('bcryptjs');
+const { passwordHasher } = require('../services/passwordHasher');
 
 const userSchema = new mongoose.Schema({
   username: {
@@ -33,29 +33,8 @@ const userSchema = new mongoose.Schema({
     bio: String,
     avatar: String
   },
+  // Individual completions live in the Progress collection
   progress: {
-    completedDataStructures: [{
-      dataStructureId: {
-        type: mongoose.Schema.Types.ObjectId,
-        ref: 'DataStructure'
-      },
-      completedAt: {
-        type: Date,
-        default: Date.now
-      },
-      score: Number
-    }],
-    completedAlgorithms: [{
-      algorithmId: {
-        type: mongoose.Schema.Types.ObjectId,
-        ref: 'Algorithm'
-      },
-      completedAt: {
-        type: Date,
-        default: Date.now
-      },
-      score: Number
-    }],
     totalPoints: {
       type: Number,
       default: 0
@@ -63,7 +42,32 @@ const userSchema = new mongoose.Schema({
     level: {
       type: Number,
       default: 1
-    }
+    },
+    // Rollups kept current on each first completion, so reading progress
+    // never scans a user's history. rollupAt is unset until they are built.
+    completed: {
+      algorithm: {
+        type: Number,
+        default: 0
+      },
+      datastructure: {
+        type: Number,
+        default: 0
+      }
+    },
+    byCategory: {
+      algorithm: {
+        type: Map,
+        of: Number,
+        default: {}
+      },
+      datastructure: {
+        type: Map,
+        of: Number,
+        default: {}
+      }
+    },
+    rollupAt: Date
   },
   preferences: {
     theme: {
@@ -94,13 +98,16 @@ const userSchema = new mongoose.Schema({
   timestamps: true
 });
 
-// Hash password before saving
+// Keyset pagination of the admin user listing, optionally filtered by role
+userSchema.index({ createdAt: -1, _id: -1 });
+userSchema.index({ role: 1, createdAt: -1, _id: -1 });
+
+// Hash password before saving, on the password worker pool
 userSchema.pre('save', async function(next) {
   if (!this.isModified('password')) return next();
   
   try {
-    const salt = await bcrypt.genSalt(12);
-    this.password = await bcrypt.hash(this.password, salt);
+    this.password = await passwordHasher.hash(this.password);
     next();
   } catch (error) {
     next(error);
@@ -109,12 +116,16 @@ userSchema.pre('save', async function(next) {
 
 // Compare password method
 userSchema.methods.comparePassword = async function(candidatePassword) {
-  return bcrypt.compare(candidatePassword, this.password);
+  return passwordHasher.compare(candidatePassword, this.password);
+};
+
+// Whether the stored hash predates the current BCRYPT_COST
+userSchema.methods.needsRehash = function() {
+  return passwordHasher.needsRehash(this.password);
 };
 
 // Calculate user level based on points
-userSchema.methods.calculateLevel = function() {
-  const points = this.progress.totalPoints;
+userSchema.statics.levelFor = function(points) {
   if (points >= 1000) return 5;
   if (points >= 500) return 4;
   if (points >= 250) return 3;
@@ -122,4 +133,8 @@ userSchema.methods.calculateLevel = function() {
   return 1;
 };
 
+userSchema.methods.calculateLevel = function() {
+  return this.constructor.levelFor(this.progress.totalPoints);
+};
+
 module.exports = mongoose.model('User', userSchema);
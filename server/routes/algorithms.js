@@ -1,50 +1,81 @@
 const express = require('express');
 const Algorithm = require('../models/Algorithm');
 const authMiddleware = require('../middleware/auth');
+const { gradeSubmission, compileAgainst } = require('../services/grader');
+const complexityProfiler = require('../services/complexityProfiler');
+const benchmark = require('../services/benchmark');
+const referenceArtifacts = require('../services/referenceArtifacts');
+const { CatalogIndex } = require('../services/searchIndex');
+const { prerequisiteGraph } = require('../services/prerequisiteGraph');
+const { parseParams, paginate, invalidateCounts, PaginationError } = require('../utils/pagination');
+const { listView } = require('../utils/projection');
+const responseCache = require('../services/responseCache');
+const { scheduler, ownerKey, sendQueueFull, QueueFullError } = require('../services/scheduler');
+const { jobStore, sendAccepted } = require('../services/jobStore');
+const { submissionCounters } = require('../services/submissionCounters');
+const progressStore = require('../services/progressStore');
 const router = express.Router();
 
+const searchIndex = new CatalogIndex(Algorithm).listen();
+
+// Fields listed by default; fields= or detail=true ask for more
+const LIST_VIEW = {
+  summary: ['name', 'category', 'description', 'difficulty', 'approach', 'complexity', 'tags', 'prerequisites', 'submissions', 'createdBy', 'createdAt'],
+  populate: { createdBy: 'username', prerequisites: 'name' }
+};
+
+// Cached responses depend on their algorithms and on the data structures they embed
+const prerequisiteTags = algorithm => (algorithm.prerequisites || []).map(ds => `datastructure:${ds._id || ds}`);
+const detailTags = (req, body) => [`algorithm:${req.params.id}`, ...prerequisiteTags(body)];
+const listTags = (req, body) => ['algorithms:list', ...body.algorithms.flatMap(prerequisiteTags)];
+
 // Get all algorithms
-router.get('/', async (req, res) => {
+router.get('/', responseCache.cached({ tags: listTags }), async (req, res) => {
   try {
-    const { category, difficulty, search, page = 1, limit = 10 } = req.query;
+    const { category, difficulty, search } = req.query;
+    const params = parseParams(req.query);
+    const { page, limit } = params;
+    const view = listView(req.query, Algorithm, LIST_VIEW);
+    if (view.error) {
+      return res.status(400).json({ error: view.error });
+    }
     
     // Build filter
     const filter = {};
     if (category) filter.category = category;
     if (difficulty) filter.difficulty = difficulty;
+
+    // Text search is answered from the in-memory index, ranked by relevance
     if (search) {
-      filter.$or = [
-        { name: { $regex: search, $options: 'i' } },
-        { description: { $regex: search, $options: 'i' } },
-        { tags: { $in: [new RegExp(search, 'i')] } }
-      ];
+      const ids = await searchIndex.search(search, { category, difficulty });
+      const pageIds = ids.slice((page - 1) * limit, page * limit);
+      const found = await view.apply(Algorithm.find({ _id: { $in: pageIds } }));
+      const byId = new Map(found.map(doc => [doc._id.toString(), view.shape(doc)]));
+
+      return res.json({
+        algorithms: pageIds.map(id => byId.get(id)).filter(Boolean),
+        pagination: {
+          currentPage: page,
+          totalPages: Math.ceil(ids.length / limit),
+          totalItems: ids.length
+        }
+      });
     }
 
-    const algorithms = await Algorithm.find(filter)
-      .populate('createdBy', 'username')
-      .populate('prerequisites', 'name')
-      .limit(limit * 1)
-      .skip((page - 1) * limit)
-      .sort({ createdAt: -1 });
-
-    const total = await Algorithm.countDocuments(filter);
+    const { items, pagination } = await paginate(Algorithm, filter, params, view.apply);
 
-    res.json({
-      algorithms,
-      pagination: {
-        currentPage: page,
-        totalPages: Math.ceil(total / limit),
-        totalItems: total
-      }
-    });
+    res.json({ algorithms: items.map(view.shape), pagination });
   } catch (error) {
+    if (error instanceof PaginationError) {
+      return res.status(400).json({ error: error.message });
+    }
     console.error('Error fetching algorithms:', error);
     res.status(500).json({ error: 'Server error fetching algorithms.' });
   }
 });
 
-// Get algorithm by ID
-router.get('/:id', async (req, res) => {
+// Get algorithm by ID (submission counters may lag by up to the cache TTL)
+router.get('/:id', responseCache.cached({ tags: detailTags }), async (req, res) => {
   try {
     const algorithm = await Algorithm.findById(req.params.id)
       .populate('createdBy', 'username')
@@ -118,6 +149,13 @@ router.post('/', authMiddleware, async (req, res) => {
     await algorithm.populate('createdBy', 'username');
     await algorithm.populate('prerequisites', 'name');
 
+    // Precompile the header and reference object ahead of the first submission
+    referenceArtifacts.prepare(algorithm);
+    invalidateCounts(Algorithm);
+    responseCache.invalidate('algorithms:list');
+    searchIndex.upsert(algorithm);
+    prerequisiteGraph.upsert('algorithm', algorithm);
+
     res.status(201).json({
       message: 'Algorithm created successfully.',
       algorithm
@@ -144,11 +182,21 @@ router.put('/:id', authMiddleware, async (req, res) => {
 
     const updates = req.body;
     Object.assign(algorithm, updates);
+    const sourceChanged = referenceArtifacts.SOURCE_FIELDS.some(field => algorithm.isModified(field));
     
     await algorithm.save();
     await algorithm.populate('createdBy', 'username');
     await algorithm.populate('prerequisites', 'name');
 
+    if (sourceChanged) {
+      referenceArtifacts.invalidate(algorithm._id);
+      referenceArtifacts.prepare(algorithm);
+    }
+    invalidateCounts(Algorithm);
+    responseCache.invalidate(`algorithm:${algorithm._id}`, 'algorithms:list');
+    searchIndex.upsert(algorithm);
+    prerequisiteGraph.upsert('algorithm', algorithm);
+
     res.json({
       message: 'Algorithm updated successfully.',
       algorithm
@@ -174,6 +222,11 @@ router.delete('/:id', authMiddleware, async (req, res) => {
     }
 
     await Algorithm.findByIdAndDelete(req.params.id);
+    referenceArtifacts.invalidate(req.params.id);
+    invalidateCounts(Algorithm);
+    responseCache.invalidate(`algorithm:${req.params.id}`, 'algorithms:list');
+    searchIndex.remove(req.params.id);
+    prerequisiteGraph.remove(req.params.id);
 
     res.json({ message: 'Algorithm deleted successfully.' });
   } catch (error) {
@@ -182,83 +235,271 @@ router.delete('/:id', authMiddleware, async (req, res) => {
   }
 });
 
+// Grade a submission and record it against the algorithm and the user's progress
+const processSubmission = async ({ algorithm, code, userId, owner, stopOnFirstFailure, onStart }) => {
+  // Compile once and run against every visible and hidden test case
+  const grading = await gradeSubmission({
+    code,
+    testCases: algorithm.testCases,
+    reference: algorithm,
+    owner,
+    stopOnFirstFailure,
+    onStart
+  });
+  const isValid = grading.verdict === 'AC';
+  const score = grading.total === 0 ? 0 : Math.round((grading.passed / grading.total) * 100);
+
+  // Update submission statistics with an atomic (or coalesced) $inc
+  const submissions = await submissionCounters.record(algorithm, isValid);
+
+  // The first accepted solution counts towards the user's progress
+  if (isValid) {
+    await progressStore.recordCompletion({
+      userId,
+      itemType: 'algorithm',
+      itemId: algorithm._id,
+      category: algorithm.category,
+      score: 100,
+      points: 10
+    });
+  }
+
+  return {
+    success: isValid,
+    message: isValid ? 'Solution accepted!' : 'Solution failed. Please try again.',
+    verdict: grading.verdict,
+    score,
+    passed: grading.passed,
+    total: grading.total,
+    maxTimeMs: grading.maxTimeMs,
+    maxMemoryKb: grading.maxMemoryKb,
+    results: grading.results,
+    compilationError: grading.compilationError,
+    queueWaitMs: grading.queueWaitMs,
+    totalSubmissions: submissions.total,
+    successRate: Algorithm.successRate(submissions)
+  };
+};
+
 // Submit solution for algorithm
 router.post('/:id/submit', authMiddleware, async (req, res) => {
   try {
-    const { code, language = 'c' } = req.body;
+    const { code, language = 'c', stopOnFirstFailure = false, async: runAsync = false } = req.body;
+
+    if (!code) {
+      return res.status(400).json({ error: 'Code is required.' });
+    }
+
     const algorithm = await Algorithm.findById(req.params.id);
 
     if (!algorithm) {
       return res.status(404).json({ error: 'Algorithm not found.' });
     }
 
-    // Update submission statistics
-    algorithm.submissions.total += 1;
-    
-    // Here you would typically compile and run the code against test cases
-    // For now, we'll simulate a basic validation
-    const isValid = code && code.includes('main') && code.length > 50;
-    
-    if (isValid) {
-      algorithm.submissions.successful += 1;
+    const submission = {
+      algorithm,
+      code,
+      userId: req.user._id,
+      owner: ownerKey(req),
+      stopOnFirstFailure: Boolean(stopOnFirstFailure)
+    };
+
+    // Async mode answers immediately with a job id to poll or subscribe to
+    if (runAsync) {
+      const rejection = scheduler.admissionError(submission.owner);
+      if (rejection) {
+        return sendQueueFull(res, rejection);
+      }
+
+      const job = jobStore.create({ type: 'submission', owner: submission.owner });
+      jobStore.run(job, markRunning => processSubmission({ ...submission, onStart: markRunning }));
+      return sendAccepted(res, job);
     }
 
-    await algorithm.save();
+    res.json(await processSubmission(submission));
+  } catch (error) {
+    if (error instanceof QueueFullError) {
+      return sendQueueFull(res, error);
+    }
+    console.error('Error submitting solution:', error);
+    res.status(500).json({ error: 'Server error submitting solution.' });
+  }
+});
 
-    // Update user progress
-    const User = require('../models/User');
-    const user = await User.findById(req.user._id);
-    
-    const existingCompletion = user.progress.completedAlgorithms.find(
-      comp => comp.algorithmId.toString() === req.params.id
-    );
-
-    if (!existingCompletion && isValid) {
-      user.progress.completedAlgorithms.push({
-        algorithmId: req.params.id,
-        score: isValid ? 100 : 0
+// Profile a submission over growing inputs and compare its growth with the declared complexity
+router.post('/:id/profile', authMiddleware, async (req, res) => {
+  try {
+    const { code } = req.body;
+
+    if (!code) {
+      return res.status(400).json({ error: 'Code is required.' });
+    }
+
+    const options = complexityProfiler.normalizeOptions(req.body);
+    if (options.error) {
+      return res.status(400).json({ error: options.error });
+    }
+
+    const algorithm = await Algorithm.findById(req.params.id).select('name headerCode cCode complexity');
+
+    if (!algorithm) {
+      return res.status(404).json({ error: 'Algorithm not found.' });
+    }
+
+    // Compile and every sample run share the one slot the request was admitted with
+    const { result: { build, profile } } = await scheduler.schedule(ownerKey(req), async () => {
+      const compiled = await compileAgainst(code, algorithm);
+      if (!compiled.success) return { build: compiled };
+
+      try {
+        const result = await complexityProfiler.profileBinary({ binaryPath: compiled.binaryPath, ...options });
+        return { build: compiled, profile: result };
+      } finally {
+        compiled.release();
+      }
+    });
+
+    if (!build.success) {
+      return res.status(400).json({
+        success: false,
+        error: 'Compilation failed',
+        compilationError: build.stderr
       });
-      user.progress.totalPoints += 10;
-      user.progress.level = user.calculateLevel();
-      await user.save();
     }
 
+    const fit = complexityProfiler.fitComplexity(profile.samples);
+    const declared = (algorithm.complexity && algorithm.complexity.time) || {};
+    const declaredClass = complexityProfiler.parseComplexity(declared.average)
+      || complexityProfiler.parseComplexity(declared.worst);
+    const estimated = fit ? fit.estimated : null;
+    const comparable = Boolean(estimated && declaredClass);
+
     res.json({
-      success: isValid,
-      message: isValid ? 'Solution accepted!' : 'Solution failed. Please try again.',
-      score: isValid ? 100 : 0,
-      totalSubmissions: algorithm.submissions.total,
-      successRate: algorithm.getSuccessRate()
+      success: true,
+      generator: options.generator,
+      trials: options.trials,
+      samples: profile.samples,
+      stoppedReason: profile.stoppedReason,
+      estimated,
+      rSquared: fit ? fit.rSquared : null,
+      declared,
+      declaredClass,
+      withinDeclared: comparable
+        ? complexityProfiler.classRank(estimated) <= complexityProfiler.classRank(declaredClass)
+        : null,
+      fits: fit ? fit.fits : []
     });
   } catch (error) {
-    console.error('Error submitting solution:', error);
-    res.status(500).json({ error: 'Server error submitting solution.' });
+    if (error instanceof QueueFullError) {
+      return sendQueueFull(res, error);
+    }
+    console.error('Error profiling solution:', error);
+    res.status(500).json({ error: 'Server error profiling solution.' });
   }
 });
 
-// Get algorithms by category
-router.get('/category/:category', async (req, res) => {
+// Benchmark a submission head-to-head against the reference implementation
+router.post('/:id/benchmark', authMiddleware, async (req, res) => {
   try {
-    const { category } = req.params;
-    const { page = 1, limit = 10 } = req.query;
+    const { code } = req.body;
 
-    const algorithms = await Algorithm.find({ category })
-      .populate('createdBy', 'username')
-      .limit(limit * 1)
-      .skip((page - 1) * limit)
-      .sort({ createdAt: -1 });
+    if (!code) {
+      return res.status(400).json({ error: 'Code is required.' });
+    }
 
-    const total = await Algorithm.countDocuments({ category });
+    const options = benchmark.normalizeOptions(req.body);
+    if (options.error) {
+      return res.status(400).json({ error: options.error });
+    }
 
-    res.json({
-      algorithms,
-      pagination: {
-        currentPage: page,
-        totalPages: Math.ceil(total / limit),
-        totalItems: total
+    const algorithm = await Algorithm.findById(req.params.id).select('name headerCode cCode testCases');
+
+    if (!algorithm) {
+      return res.status(404).json({ error: 'Algorithm not found.' });
+    }
+
+    // Both sides are built against the same header with the same flags, and
+    // both builds, the warmup and every trial share the one admitted slot
+    const { result: outcome } = await scheduler.schedule(ownerKey(req), async () => {
+      const build = await compileAgainst(code, algorithm);
+      if (!build.success) return { build };
+
+      try {
+        const referenceBuild = await compileAgainst(algorithm.cCode, algorithm);
+        if (!referenceBuild.success) return { build, referenceBuild };
+
+        try {
+          const comparison = await benchmark.compareBinaries({
+            submissionPath: build.binaryPath,
+            referencePath: referenceBuild.binaryPath,
+            inputs: benchmark.benchmarkInputs(algorithm, options),
+            trials: options.trials,
+            warmup: options.warmup
+          });
+          return { build, referenceBuild, comparison };
+        } finally {
+          referenceBuild.release();
+        }
+      } finally {
+        build.release();
       }
     });
+    const { build, referenceBuild, comparison } = outcome;
+
+    if (!build.success) {
+      return res.status(400).json({
+        success: false,
+        error: 'Compilation failed',
+        compilationError: build.stderr
+      });
+    }
+
+    if (!referenceBuild.success) {
+      return res.status(422).json({ error: 'Reference implementation failed to compile.' });
+    }
+
+    if (comparison.error) {
+      return res.status(422).json({ success: false, error: comparison.error });
+    }
+
+    res.json({
+      success: true,
+      generator: options.generator,
+      size: options.size,
+      trials: options.trials,
+      warmup: options.warmup,
+      ...comparison,
+      maxRatio: options.maxRatio,
+      withinThreshold: options.maxRatio === null || comparison.speedRatio === null
+        ? null
+        : comparison.speedRatio <= options.maxRatio
+    });
   } catch (error) {
+    if (error instanceof QueueFullError) {
+      return sendQueueFull(res, error);
+    }
+    console.error('Error benchmarking solution:', error);
+    res.status(500).json({ error: 'Server error benchmarking solution.' });
+  }
+});
+
+// Get algorithms by category
+router.get('/category/:category', responseCache.cached({ tags: listTags }), async (req, res) => {
+  try {
+    const { category } = req.params;
+    const params = parseParams(req.query);
+    const view = listView(req.query, Algorithm, LIST_VIEW);
+    if (view.error) {
+      return res.status(400).json({ error: view.error });
+    }
+
+    const { items, pagination } = await paginate(Algorithm, { category }, params, view.apply);
+
+    res.json({ algorithms: items.map(view.shape), pagination });
+  } catch (error) {
+    if (error instanceof PaginationError) {
+      return res.status(400).json({ error: error.message });
+    }
     console.error('Error fetching algorithms by category:', error);
     res.status(500).json({ error: 'Server error fetching algorithms by category.' });
   }
@@ -1,31 +1,12 @@
 const express = require('express');
 const jwt = require('jsonwebtoken');
 const User = require('../models/User');
+const authMiddleware = require('../middleware/auth');
+const { invalidateCounts } = require('../utils/pagination');
+const { leaderboard } = require('../services/leaderboard');
+const { QueueFullError, sendQueueFull } = require('../services/scheduler');
 const router = express.Router();
 
-// Middleware to verify JWT token
-const authMiddleware = async (req, res, next) => {
-  try {
-    const token = req.header('Authorization')?.replace('Bearer ', '');
-    
-    if (!token) {
-      return res.status(401).json({ error: 'Access denied. No token provided.' });
-    }
-
-    const decoded = jwt.verify(token, process.env.JWT_SECRET || 'fallback_secret');
-    const user = await User.findById(decoded.userId).select('-password');
-    
-    if (!user) {
-      return res.status(401).json({ error: 'Invalid token.' });
-    }
-
-    req.user = user;
-    next();
-  } catch (error) {
-    res.status(401).json({ error: 'Invalid token.' });
-  }
-};
-
 // Register user
 router.post('/register', async (req, res) => {
   try {
@@ -50,14 +31,18 @@ router.post('/register', async (req, res) => {
     }
 
     // Create new user
+    // A new user has no history, so their rollups start out complete
     const user = new User({
       username,
       email,
       password,
-      role
+      role,
+      progress: { rollupAt: new Date() }
     });
 
     await user.save();
+    invalidateCounts(User);
+    leaderboard.upsertUser(user.toObject({ flattenMaps: true }));
 
     // Generate JWT token
     const token = jwt.sign(
@@ -79,6 +64,9 @@ router.post('/register', async (req, res) => {
       }
     });
   } catch (error) {
+    if (error instanceof QueueFullError) {
+      return sendQueueFull(res, error);
+    }
     console.error('Registration error:', error);
     res.status(500).json({ error: 'Server error during registration.' });
   }
@@ -106,8 +94,11 @@ router.post('/login', async (req, res) => {
       return res.status(401).json({ error: 'Invalid credentials.' });
     }
 
-    // Update last login
+    // Update last login, upgrading the hash if BCRYPT_COST changed since it was made
     user.lastLogin = new Date();
+    if (process.env.BCRYPT_REHASH_ON_LOGIN !== 'false' && user.needsRehash()) {
+      user.password = password;
+    }
     await user.save();
 
     // Generate JWT token
@@ -131,6 +122,9 @@ router.post('/login', async (req, res) => {
       }
     });
   } catch (error) {
+    if (error instanceof QueueFullError) {
+      return sendQueueFull(res, error);
+    }
     console.error('Login error:', error);
     res.status(500).json({ error: 'Server error during login.' });
   }
@@ -139,15 +133,21 @@ router.post('/login', async (req, res) => {
 // Get current user profile
 router.get('/profile', authMiddleware, async (req, res) => {
   try {
+    const user = await User.findById(req.user._id).select('-password');
+
+    if (!user) {
+      return res.status(404).json({ error: 'User not found.' });
+    }
+
     res.json({
       user: {
-        id: req.user._id,
-        username: req.user.username,
-        email: req.user.email,
-        role: req.user.role,
-        profile: req.user.profile,
-        progress: req.user.progress,
-        preferences: req.user.preferences
+        id: user._id,
+        username: user.username,
+        email: user.email,
+        role: user.role,
+        profile: user.profile,
+        progress: user.progress,
+        preferences: user.preferences
       }
     });
   } catch (error) {
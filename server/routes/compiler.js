@@ -1,116 +1,228 @@
 const express = require('express');
-const { exec } = require('child_process');
-const fs = require('fs');
-const path = require('path');
-const { v4: uuidv4 } = require('uuid');
+const Algorithm = require('../models/Algorithm');
+const DataStructure = require('../models/DataStructure');
+const compileCache = require('../services/compileCache');
+const referenceArtifacts = require('../services/referenceArtifacts');
+const runner = require('../services/runner');
+const { scheduler, ownerKey, sendQueueFull, QueueFullError } = require('../services/scheduler');
+const { openEventStream } = require('../utils/sse');
+const { jobStore, sendAccepted } = require('../services/jobStore');
 const router = express.Router();
 
-// Temporary directory for compilation
-const TEMP_DIR = path.join(__dirname, '../temp');
+// Build against a document's precompiled header and weakened reference object
+const compileWithReference = async (code, reference) => {
+  if (!reference) return compileCache.getOrCompile(code);
 
-// Ensure temp directory exists
-if (!fs.existsSync(TEMP_DIR)) {
-  fs.mkdirSync(TEMP_DIR, { recursive: true });
-}
+  const artifacts = await referenceArtifacts.acquire(reference);
+  try {
+    return await compileCache.getOrCompile(code, { artifacts, linkReference: true });
+  } finally {
+    artifacts.release();
+  }
+};
+
+// Optionally build against an algorithm's or data structure's header and reference code
+const findReference = async ({ algorithmId, dataStructureId }) => {
+  if (algorithmId) {
+    const reference = await Algorithm.findById(algorithmId).select('name headerCode cCode');
+    return reference ? { reference } : { notFound: 'Algorithm not found.' };
+  }
+  if (dataStructureId) {
+    const reference = await DataStructure.findById(dataStructureId).select('name headerCode cCode');
+    return reference ? { reference } : { notFound: 'Data structure not found.' };
+  }
+  return { reference: null };
+};
+
+// Compile (or reuse a cached build) and run one program
+const compileAndRun = async ({ code, input, timeout, reference }) => {
+  const build = await compileWithReference(code, reference);
+
+  if (!build.success) {
+    return {
+      status: 400,
+      body: {
+        success: false,
+        error: 'Compilation failed',
+        compilationError: build.stderr,
+        stdout: build.stdout
+      }
+    };
+  }
 
-// Clean up old temp files (older than 1 hour)
-const cleanupTempFiles = () => {
+  let run;
   try {
-    const files = fs.readdirSync(TEMP_DIR);
-    const now = Date.now();
-    
-    files.forEach(file => {
-      const filePath = path.join(TEMP_DIR, file);
-      const stats = fs.statSync(filePath);
-      
-      if (now - stats.mtime.getTime() > 60 * 60 * 1000) { // 1 hour
-        fs.unlinkSync(filePath);
+    run = await runner.runBinary(build.binaryPath, { input, timeout });
+  } finally {
+    build.release();
+  }
+
+  const runInfo = {
+    verdict: run.verdict,
+    executionTime: run.usage.wallMs,
+    usage: run.usage,
+    limits: run.limits,
+    cached: build.cached
+  };
+
+  if (run.verdict !== 'OK') {
+    const failures = {
+      TLE: { error: 'Execution timeout', timeout: true },
+      MLE: { error: 'Memory limit exceeded', memoryLimitExceeded: true },
+      OLE: { error: 'Output limit exceeded', outputLimitExceeded: true, stdout: run.stdout },
+      RE: { error: 'Runtime error', runtimeError: run.stderr, stdout: run.stdout, exitCode: run.code, signal: run.signal }
+    };
+
+    return {
+      status: 400,
+      body: {
+        success: false,
+        ...failures[run.verdict],
+        ...runInfo
       }
-    });
-  } catch (error) {
-    console.error('Error cleaning up temp files:', error);
+    };
   }
-};
 
-// Run cleanup every 30 minutes (only in production)
-if (process.env.NODE_ENV === 'production') {
-  setInterval(cleanupTempFiles, 30 * 60 * 1000);
-}
+  return {
+    status: 200,
+    body: {
+      success: true,
+      output: run.stdout,
+      error: run.stderr,
+      ...runInfo
+    }
+  };
+};
 
 // Compile and run C code
 router.post('/compile', async (req, res) => {
   try {
-    const { code, input = '', timeout = 5000 } = req.body;
+    const { code, input = '', timeout = 5000, async: runAsync = false } = req.body;
     
     if (!code) {
       return res.status(400).json({ error: 'Code is required.' });
     }
 
-    const fileId = uuidv4();
-    const cFilePath = path.join(TEMP_DIR, `${fileId}.c`);
-    const executablePath = path.join(TEMP_DIR, fileId);
-    
-    // Write C code to file
-    fs.writeFileSync(cFilePath, code);
+    const { reference, notFound } = await findReference(req.body);
+    if (notFound) {
+      return res.status(404).json({ error: notFound });
+    }
 
-    // Compile the code
-    exec(`gcc "${cFilePath}" -o "${executablePath}"`, (compileError, stdout, stderr) => {
-      if (compileError) {
-        // Clean up files
-        try {
-          fs.unlinkSync(cFilePath);
-        } catch (error) {}
-        
-        return res.status(400).json({
-          success: false,
-          error: 'Compilation failed',
-          compilationError: stderr,
-          stdout: stdout
-        });
+    const owner = ownerKey(req);
+    const runScheduled = (onStart = () => {}) => scheduler.schedule(owner, () => {
+      onStart();
+      return compileAndRun({
+        code,
+        input,
+        timeout: Math.min(Number(timeout) || 5000, runner.MAX_WALL_LIMIT_MS),
+        reference
+      });
+    });
+
+    // Async mode answers immediately with a job id to poll or subscribe to
+    if (runAsync) {
+      const rejection = scheduler.admissionError(owner);
+      if (rejection) {
+        return sendQueueFull(res, rejection);
       }
 
-      // Run the compiled code
-      const child = exec(`"${executablePath}"`, { timeout: timeout }, (runError, stdout, stderr) => {
-        // Clean up files
+      const job = jobStore.create({ type: 'compile', owner });
+      jobStore.run(job, async (markRunning) => {
+        const { result, queueWaitMs } = await runScheduled(markRunning);
+        return { ...result.body, queueWaitMs };
+      });
+      return sendAccepted(res, job);
+    }
+
+    const { result, queueWaitMs } = await runScheduled();
+
+    res.status(result.status).json({ ...result.body, queueWaitMs });
+  } catch (error) {
+    if (error instanceof QueueFullError) {
+      return sendQueueFull(res, error);
+    }
+    console.error('Compiler error:', error);
+    res.status(500).json({ error: 'Server error during compilation.' });
+  }
+});
+
+// Compile and run C code, streaming diagnostics and output as Server-Sent Events:
+//   queued, compile, stdout, stderr, exit (or error)
+// Output is forwarded as it is produced and never buffered, so memory per run
+// stays constant; the run is killed once the output cap is reached.
+router.post('/compile/stream', async (req, res) => {
+  try {
+    const { code, input = '', timeout = 5000 } = req.body;
+
+    if (!code) {
+      return res.status(400).json({ error: 'Code is required.' });
+    }
+
+    const { reference, notFound } = await findReference(req.body);
+    if (notFound) {
+      return res.status(404).json({ error: notFound });
+    }
+
+    // Reject before the stream opens so a full queue still gets a real 429/503
+    const owner = ownerKey(req);
+    const rejection = scheduler.admissionError(owner);
+    if (rejection) {
+      return sendQueueFull(res, rejection);
+    }
+
+    const stream = openEventStream(res);
+    const abort = new AbortController();
+    res.on('close', () => abort.abort());
+    stream.send('queued', { queued: scheduler.queued, running: scheduler.running });
+
+    try {
+      await scheduler.schedule(owner, async () => {
+        if (stream.closed) return;
+        const build = await compileWithReference(code, reference);
+
+        stream.send('compile', {
+          success: build.success,
+          cached: Boolean(build.cached),
+          diagnostics: build.stderr || ''
+        });
+
+        if (!build.success) {
+          stream.send('exit', { success: false, verdict: 'CE', error: 'Compilation failed' });
+          return;
+        }
+
+        let run;
         try {
-          fs.unlinkSync(cFilePath);
-          fs.unlinkSync(executablePath);
-        } catch (error) {}
-
-        if (runError) {
-          if (runError.killed) {
-            return res.status(400).json({
-              success: false,
-              error: 'Execution timeout',
-              timeout: true
-            });
-          }
-          
-          return res.status(400).json({
-            success: false,
-            error: 'Runtime error',
-            runtimeError: stderr,
-            stdout: stdout
+          run = await runner.runBinary(build.binaryPath, {
+            input,
+            timeout: Math.min(Number(timeout) || 5000, runner.MAX_WALL_LIMIT_MS),
+            retainOutput: false,
+            signal: abort.signal,
+            onOutput: (name, chunk) => stream.send(name, { data: chunk.toString() })
           });
+        } finally {
+          build.release();
         }
 
-        res.json({
-          success: true,
-          output: stdout,
-          error: stderr,
-          executionTime: Date.now()
+        stream.send('exit', {
+          success: run.verdict === 'OK',
+          verdict: run.verdict,
+          exitCode: run.code,
+          signal: run.signal,
+          usage: run.usage,
+          limits: run.limits
         });
       });
-
-      // Provide input to the program if needed
-      if (input) {
-        child.stdin.write(input);
-        child.stdin.end();
-      }
-    });
+    } catch (error) {
+      console.error('Compiler stream error:', error);
+      stream.send('error', { error: 'Server error during compilation.' });
+    }
+    stream.close();
   } catch (error) {
-    console.error('Compiler error:', error);
-    res.status(500).json({ error: 'Server error during compilation.' });
+    console.error('Compiler stream error:', error);
+    if (!res.headersSent) {
+      res.status(500).json({ error: 'Server error during compilation.' });
+    }
   }
 });
 
@@ -123,34 +235,31 @@ router.post('/validate', async (req, res) => {
       return res.status(400).json({ error: 'Code is required.' });
     }
 
-    const fileId = uuidv4();
-    const cFilePath = path.join(TEMP_DIR, `${fileId}.c`);
-    
-    // Write C code to file
-    fs.writeFileSync(cFilePath, code);
-
     // Check syntax using gcc -fsyntax-only
-    exec(`gcc -fsyntax-only "${cFilePath}"`, (error, stdout, stderr) => {
-      // Clean up file
-      try {
-        fs.unlinkSync(cFilePath);
-      } catch (cleanupError) {}
-
-      if (error) {
-        return res.status(400).json({
-          valid: false,
-          syntaxErrors: stderr,
-          warnings: stdout
-        });
-      }
+    const { result, queueWaitMs } = await scheduler.schedule(
+      ownerKey(req),
+      () => runner.checkSyntax(code)
+    );
 
-      res.json({
-        valid: true,
-        message: 'Syntax is valid.',
-        warnings: stdout
+    if (result.code !== 0) {
+      return res.status(400).json({
+        valid: false,
+        syntaxErrors: result.stderr,
+        warnings: result.stdout,
+        queueWaitMs
       });
+    }
+
+    res.json({
+      valid: true,
+      message: 'Syntax is valid.',
+      warnings: result.stdout,
+      queueWaitMs
     });
   } catch (error) {
+    if (error instanceof QueueFullError) {
+      return sendQueueFull(res, error);
+    }
     console.error('Validation error:', error);
     res.status(500).json({ error: 'Server error during validation.' });
   }
@@ -191,24 +300,40 @@ router.post('/format', async (req, res) => {
 });
 
 // Get compiler information
-router.get('/info', (req, res) => {
-  exec('gcc --version', (error, stdout, stderr) => {
-    if (error) {
+router.get('/info', async (req, res) => {
+  try {
+    const version = await runner.runProcess('gcc', ['--version']);
+
+    if (version.code !== 0) {
       return res.status(500).json({ error: 'Unable to get compiler information.' });
     }
 
     res.json({
       compiler: 'GCC',
-      version: stdout.split('\n')[0],
+      version: version.stdout.split('\n')[0],
       supportedLanguages: ['c'],
       features: [
         'Compilation',
         'Execution',
         'Syntax validation',
-        'Basic formatting'
+        'Basic formatting',
+        'Compile cache'
       ]
     });
-  });
+  } catch (error) {
+    console.error('Compiler info error:', error);
+    res.status(500).json({ error: 'Unable to get compiler information.' });
+  }
+});
+
+// Get compile cache statistics
+router.get('/cache', (req, res) => {
+  res.json(compileCache.getStats());
+});
+
+// Get compile/run queue statistics
+router.get('/queue', (req, res) => {
+  res.json(scheduler.getStats());
 });
 
 module.exports = router;
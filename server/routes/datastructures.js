@@ -1,52 +1,80 @@
 const express = require('express');
 const DataStructure = require('../models/DataStructure');
 const authMiddleware = require('../middleware/auth');
+const referenceArtifacts = require('../services/referenceArtifacts');
+const { CatalogIndex } = require('../services/searchIndex');
+const { prerequisiteGraph } = require('../services/prerequisiteGraph');
+const { parseParams, paginate, invalidateCounts, PaginationError } = require('../utils/pagination');
+const { listView } = require('../utils/projection');
+const responseCache = require('../services/responseCache');
 const router = express.Router();
 
+const searchIndex = new CatalogIndex(DataStructure).listen();
+
+// Fields listed by default; fields= or detail=true ask for more
+const LIST_VIEW = {
+  summary: ['name', 'category', 'description', 'difficulty', 'complexity', 'tags', 'createdBy', 'createdAt'],
+  populate: { createdBy: 'username' }
+};
+
+// A data structure's tag also covers responses that embed it as a prerequisite
+const detailTags = (req, body) => [
+  `datastructure:${req.params.id}`,
+  ...(body.prerequisites || []).map(ds => `datastructure:${ds._id || ds}`)
+];
+const listTags = () => ['datastructures:list'];
+
 // Get all data structures
-router.get('/', async (req, res) => {
+router.get('/', responseCache.cached({ tags: listTags }), async (req, res) => {
   try {
-    const { category, difficulty, search, page = 1, limit = 10 } = req.query;
+    const { category, difficulty, search } = req.query;
+    const params = parseParams(req.query);
+    const { page, limit } = params;
+    const view = listView(req.query, DataStructure, LIST_VIEW);
+    if (view.error) {
+      return res.status(400).json({ error: view.error });
+    }
     
     // Build filter
     const filter = {};
     if (category) filter.category = category;
     if (difficulty) filter.difficulty = difficulty;
+
+    // Text search is answered from the in-memory index, ranked by relevance
     if (search) {
-      filter.$or = [
-        { name: { $regex: search, $options: 'i' } },
-        { description: { $regex: search, $options: 'i' } },
-        { tags: { $in: [new RegExp(search, 'i')] } }
-      ];
+      const ids = await searchIndex.search(search, { category, difficulty });
+      const pageIds = ids.slice((page - 1) * limit, page * limit);
+      const found = await view.apply(DataStructure.find({ _id: { $in: pageIds } }));
+      const byId = new Map(found.map(doc => [doc._id.toString(), view.shape(doc)]));
+
+      return res.json({
+        dataStructures: pageIds.map(id => byId.get(id)).filter(Boolean),
+        pagination: {
+          currentPage: page,
+          totalPages: Math.ceil(ids.length / limit),
+          totalItems: ids.length
+        }
+      });
     }
 
-    const dataStructures = await DataStructure.find(filter)
-      .populate('createdBy', 'username')
-      .limit(limit * 1)
-      .skip((page - 1) * limit)
-      .sort({ createdAt: -1 });
-
-    const total = await DataStructure.countDocuments(filter);
+    const { items, pagination } = await paginate(DataStructure, filter, params, view.apply);
 
-    res.json({
-      dataStructures,
-      pagination: {
-        currentPage: page,
-        totalPages: Math.ceil(total / limit),
-        totalItems: total
-      }
-    });
+    res.json({ dataStructures: items.map(view.shape), pagination });
   } catch (error) {
+    if (error instanceof PaginationError) {
+      return res.status(400).json({ error: error.message });
+    }
     console.error('Error fetching data structures:', error);
     res.status(500).json({ error: 'Server error fetching data structures.' });
   }
 });
 
 // Get data structure by ID
-router.get('/:id', async (req, res) => {
+router.get('/:id', responseCache.cached({ tags: detailTags }), async (req, res) => {
   try {
     const dataStructure = await DataStructure.findById(req.params.id)
-      .populate('createdBy', 'username');
+      .populate('createdBy', 'username')
+      .populate('prerequisites', 'name category');
     
     if (!dataStructure) {
       return res.status(404).json({ error: 'Data structure not found.' });
@@ -76,7 +104,8 @@ router.post('/', authMiddleware, async (req, res) => {
       operations,
       examples,
       difficulty,
-      tags
+      tags,
+      prerequisites
     } = req.body;
 
     // Validate required fields
@@ -95,12 +124,20 @@ router.post('/', authMiddleware, async (req, res) => {
       examples,
       difficulty,
       tags,
+      prerequisites,
       createdBy: req.user._id
     });
 
     await dataStructure.save();
     await dataStructure.populate('createdBy', 'username');
 
+    // Precompile the header and reference object ahead of the first compile
+    referenceArtifacts.prepare(dataStructure);
+    invalidateCounts(DataStructure);
+    responseCache.invalidate('datastructures:list');
+    searchIndex.upsert(dataStructure);
+    prerequisiteGraph.upsert('datastructure', dataStructure);
+
     res.status(201).json({
       message: 'Data structure created successfully.',
       dataStructure
@@ -126,11 +163,35 @@ router.put('/:id', authMiddleware, async (req, res) => {
     }
 
     const updates = req.body;
+
+    // Data structures may build on each other; refuse unknown ids and edits that close a loop
+    if (updates.prerequisites) {
+      const unknown = await prerequisiteGraph.unknownPrerequisites(updates.prerequisites);
+      if (unknown.length > 0) {
+        return res.status(400).json({ error: `Unknown prerequisites: ${unknown.join(', ')}.` });
+      }
+
+      const cycle = await prerequisiteGraph.findCycle(dataStructure._id, updates.prerequisites);
+      if (cycle) {
+        return res.status(400).json({ error: `Prerequisites would create a cycle: ${cycle.join(' -> ')}.` });
+      }
+    }
+
     Object.assign(dataStructure, updates);
+    const sourceChanged = referenceArtifacts.SOURCE_FIELDS.some(field => dataStructure.isModified(field));
     
     await dataStructure.save();
     await dataStructure.populate('createdBy', 'username');
 
+    if (sourceChanged) {
+      referenceArtifacts.invalidate(dataStructure._id);
+      referenceArtifacts.prepare(dataStructure);
+    }
+    invalidateCounts(DataStructure);
+    responseCache.invalidate(`datastructure:${dataStructure._id}`, 'datastructures:list');
+    searchIndex.upsert(dataStructure);
+    prerequisiteGraph.upsert('datastructure', dataStructure);
+
     res.json({
       message: 'Data structure updated successfully.',
       dataStructure
@@ -156,6 +217,11 @@ router.delete('/:id', authMiddleware, async (req, res) => {
     }
 
     await DataStructure.findByIdAndDelete(req.params.id);
+    referenceArtifacts.invalidate(req.params.id);
+    invalidateCounts(DataStructure);
+    responseCache.invalidate(`datastructure:${req.params.id}`, 'datastructures:list');
+    searchIndex.remove(req.params.id);
+    prerequisiteGraph.remove(req.params.id);
 
     res.json({ message: 'Data structure deleted successfully.' });
   } catch (error) {
@@ -165,28 +231,22 @@ router.delete('/:id', authMiddleware, async (req, res) => {
 });
 
 // Get data structures by category
-router.get('/category/:category', async (req, res) => {
+router.get('/category/:category', responseCache.cached({ tags: listTags }), async (req, res) => {
   try {
     const { category } = req.params;
-    const { page = 1, limit = 10 } = req.query;
-
-    const dataStructures = await DataStructure.find({ category })
-      .populate('createdBy', 'username')
-      .limit(limit * 1)
-      .skip((page - 1) * limit)
-      .sort({ createdAt: -1 });
+    const params = parseParams(req.query);
+    const view = listView(req.query, DataStructure, LIST_VIEW);
+    if (view.error) {
+      return res.status(400).json({ error: view.error });
+    }
 
-    const total = await DataStructure.countDocuments({ category });
+    const { items, pagination } = await paginate(DataStructure, { category }, params, view.apply);
 
-    res.json({
-      dataStructures,
-      pagination: {
-        currentPage: page,
-        totalPages: Math.ceil(total / limit),
-        totalItems: total
-      }
-    });
+    res.json({ dataStructures: items.map(view.shape), pagination });
   } catch (error) {
+    if (error instanceof PaginationError) {
+      return res.status(400).json({ error: error.message });
+    }
     console.error('Error fetching data structures by category:', error);
     res.status(500).json({ error: 'Server error fetching data structures by category.' });
   }
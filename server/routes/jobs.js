@@ -0,0 +1,48 @@
+const express = require('express');
+const { optionalAuth } = require('../middleware/auth');
+const { jobStore, isJobOwner } = require('../services/jobStore');
+const { openEventStream } = require('../utils/sse');
+const router = express.Router();
+
+// Other clients' jobs are reported as missing rather than forbidden
+const findOwnJob = (req) => {
+  const job = jobStore.get(req.params.id);
+  return job && isJobOwner(job, req) ? job : null;
+};
+
+// Get job status (and result once finished)
+router.get('/:id', optionalAuth, (req, res) => {
+  const job = findOwnJob(req);
+
+  if (!job) {
+    return res.status(404).json({ error: 'Job not found or expired.' });
+  }
+
+  res.json(jobStore.toJSON(job));
+});
+
+// Subscribe to job status changes as Server-Sent Events
+router.get('/:id/events', optionalAuth, (req, res) => {
+  const job = findOwnJob(req);
+
+  if (!job) {
+    return res.status(404).json({ error: 'Job not found or expired.' });
+  }
+
+  const stream = openEventStream(res);
+  stream.send('status', jobStore.toJSON(job));
+
+  if (jobStore.isFinished(job)) {
+    return stream.close();
+  }
+
+  const unsubscribe = jobStore.subscribe(job.id, (state) => {
+    stream.send('status', state);
+    if (state.status === 'completed' || state.status === 'failed') {
+      stream.close();
+    }
+  });
+  res.on('close', unsubscribe);
+});
+
+module.exports = router;
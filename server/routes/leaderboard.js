@@ -0,0 +1,66 @@
+const express = require('express');
+const authMiddleware = require('../middleware/auth');
+const { leaderboard, GLOBAL } = require('../services/leaderboard');
+const router = express.Router();
+
+const MAX_LIMIT = 100;
+const MAX_NEIGHBOURS = 25;
+
+// List boards: "global" by total points, "<type>:<category>" by completions in a category
+router.get('/boards', async (req, res) => {
+  try {
+    res.json({ boards: await leaderboard.boards() });
+  } catch (error) {
+    console.error('Error fetching leaderboards:', error);
+    res.status(500).json({ error: 'Server error fetching leaderboards.' });
+  }
+});
+
+// Get one page of a board, best first
+router.get('/', async (req, res) => {
+  try {
+    const { board = GLOBAL } = req.query;
+    const page = Math.max(parseInt(req.query.page, 10) || 1, 1);
+    const limit = Math.min(Math.max(parseInt(req.query.limit, 10) || 10, 1), MAX_LIMIT);
+
+    const result = await leaderboard.top(board, { offset: (page - 1) * limit, limit });
+
+    if (!result) {
+      return res.status(404).json({ error: 'Leaderboard not found.' });
+    }
+
+    res.json({
+      board,
+      entries: result.entries,
+      pagination: {
+        currentPage: page,
+        totalPages: Math.ceil(result.total / limit),
+        totalItems: result.total
+      }
+    });
+  } catch (error) {
+    console.error('Error fetching leaderboard:', error);
+    res.status(500).json({ error: 'Server error fetching leaderboard.' });
+  }
+});
+
+// Get the current user's rank with the entries just above and below
+router.get('/me', authMiddleware, async (req, res) => {
+  try {
+    const { board = GLOBAL } = req.query;
+    const neighbours = Math.min(Math.max(parseInt(req.query.neighbours, 10) || 2, 0), MAX_NEIGHBOURS);
+
+    const result = await leaderboard.around(board, req.user._id, { neighbours });
+
+    if (!result) {
+      return res.status(404).json({ error: 'You are not ranked on this leaderboard yet.' });
+    }
+
+    res.json({ board, ...result });
+  } catch (error) {
+    console.error('Error fetching leaderboard rank:', error);
+    res.status(500).json({ error: 'Server error fetching leaderboard rank.' });
+  }
+});
+
+module.exports = router;
@@ -0,0 +1,87 @@
+const express = require('express');
+const authMiddleware = require('../middleware/auth');
+const progressStore = require('../services/progressStore');
+const { prerequisiteGraph } = require('../services/prerequisiteGraph');
+const router = express.Router();
+
+const ITEM_TYPES = Object.keys(progressStore.COMPLETION_POINTS);
+const MAX_LIMIT = 100;
+
+const summary = node => ({
+  _id: node.id,
+  type: node.itemType,
+  name: node.name,
+  category: node.category,
+  difficulty: node.difficulty
+});
+
+// Resolve :itemType/:id to a graph node, answering 400/404 when it does not exist
+const findItem = async (req, res) => {
+  if (!ITEM_TYPES.includes(req.params.itemType)) {
+    res.status(400).json({ error: 'Invalid item type.' });
+    return null;
+  }
+  const node = await prerequisiteGraph.get(req.params.id);
+  if (!node || node.itemType !== req.params.itemType) {
+    res.status(404).json({ error: 'Item not found.' });
+    return null;
+  }
+  return node;
+};
+
+// Items the current user can start now: not completed, every prerequisite completed
+router.get('/next', authMiddleware, async (req, res) => {
+  try {
+    const { type } = req.query;
+    const limit = Math.min(Math.max(parseInt(req.query.limit, 10) || 10, 1), MAX_LIMIT);
+
+    if (type && !ITEM_TYPES.includes(type)) {
+      return res.status(400).json({ error: 'Invalid item type.' });
+    }
+
+    const completed = await progressStore.completedItems(req.user._id);
+    const unlocked = await prerequisiteGraph.unlocked(completed, { itemType: type });
+
+    res.json({
+      unlocked: unlocked.slice(0, limit).map(summary),
+      total: unlocked.length
+    });
+  } catch (error) {
+    console.error('Error fetching unlocked items:', error);
+    res.status(500).json({ error: 'Server error fetching unlocked items.' });
+  }
+});
+
+// Everything an item builds on, directly or transitively
+router.get('/:itemType/:id/prerequisites', async (req, res) => {
+  try {
+    const node = await findItem(req, res);
+    if (!node) return;
+
+    const path = await prerequisiteGraph.path(node.id);
+    const prerequisites = path.slice(0, -1).map(summary)
+      .sort((a, b) => a.name.localeCompare(b.name));
+
+    res.json({ item: summary(node), prerequisites });
+  } catch (error) {
+    console.error('Error fetching prerequisites:', error);
+    res.status(500).json({ error: 'Server error fetching prerequisites.' });
+  }
+});
+
+// Study order for an item: every prerequisite before whatever builds on it, ending with the item
+router.get('/:itemType/:id/path', async (req, res) => {
+  try {
+    const node = await findItem(req, res);
+    if (!node) return;
+
+    const path = await prerequisiteGraph.path(node.id);
+
+    res.json({ item: summary(node), path: path.map(summary) });
+  } catch (error) {
+    console.error('Error fetching learning path:', error);
+    res.status(500).json({ error: 'Server error fetching learning path.' });
+  }
+});
+
+module.exports = router;
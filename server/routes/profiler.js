@@ -0,0 +1,33 @@
+const express = require('express');
+const authMiddleware = require('../middleware/auth');
+const queryProfiler = require('../services/queryProfiler');
+const router = express.Router();
+
+const MAX_LIMIT = 100;
+
+const requireAdmin = (req, res, next) => {
+  if (req.user.role !== 'admin') {
+    return res.status(403).json({ error: 'Admin access required.' });
+  }
+  next();
+};
+
+// Slowest query shapes with their explain plans, and likely N+1 patterns (admins only)
+router.get('/queries', authMiddleware, requireAdmin, (req, res) => {
+  const { sort = 'total' } = req.query;
+  const limit = Math.min(Math.max(parseInt(req.query.limit, 10) || 20, 1), MAX_LIMIT);
+
+  if (!queryProfiler.SORTS[sort]) {
+    return res.status(400).json({ error: `Invalid sort. Use one of: ${Object.keys(queryProfiler.SORTS).join(', ')}.` });
+  }
+
+  res.json(queryProfiler.report({ sort, limit }));
+});
+
+// Start a fresh profiling window (admins only)
+router.delete('/queries', authMiddleware, requireAdmin, (req, res) => {
+  queryProfiler.reset();
+  res.json({ message: 'Query profile cleared.' });
+});
+
+module.exports = router;
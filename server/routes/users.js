@@ -1,6 +1,13 @@
 const express = require('express');
+const mongoose = require('mongoose');
 const User = require('../models/User');
+const Algorithm = require('../models/Algorithm');
+const DataStructure = require('../models/DataStructure');
 const authMiddleware = require('../middleware/auth');
+const { parseParams, paginate, invalidateCounts, PaginationError } = require('../utils/pagination');
+const authCache = require('../services/authCache');
+const progressStore = require('../services/progressStore');
+const { leaderboard } = require('../services/leaderboard');
 const router = express.Router();
 
 // Get all users (admins only)
@@ -10,7 +17,8 @@ router.get('/', authMiddleware, async (req, res) => {
       return res.status(403).json({ error: 'Admin access required.' });
     }
 
-    const { page = 1, limit = 10, search, role } = req.query;
+    const { search, role } = req.query;
+    const params = parseParams(req.query);
     
     // Build filter
     const filter = {};
@@ -22,23 +30,14 @@ router.get('/', authMiddleware, async (req, res) => {
       ];
     }
 
-    const users = await User.find(filter)
-      .select('-password')
-      .limit(limit * 1)
-      .skip((page - 1) * limit)
-      .sort({ createdAt: -1 });
+    const { items: users, pagination } = await paginate(User, filter, params, query => query
+      .select('-password'));
 
-    const total = await User.countDocuments(filter);
-
-    res.json({
-      users,
-      pagination: {
-        currentPage: page,
-        totalPages: Math.ceil(total / limit),
-        totalItems: total
-      }
-    });
+    res.json({ users, pagination });
   } catch (error) {
+    if (error instanceof PaginationError) {
+      return res.status(400).json({ error: error.message });
+    }
     console.error('Error fetching users:', error);
     res.status(500).json({ error: 'Server error fetching users.' });
   }
@@ -47,10 +46,7 @@ router.get('/', authMiddleware, async (req, res) => {
 // Get user by ID
 router.get('/:id', authMiddleware, async (req, res) => {
   try {
-    const user = await User.findById(req.params.id)
-      .select('-password')
-      .populate('progress.completedDataStructures.dataStructureId', 'name')
-      .populate('progress.completedAlgorithms.algorithmId', 'name');
+    const user = await User.findById(req.params.id).select('-password');
     
     if (!user) {
       return res.status(404).json({ error: 'User not found.' });
@@ -89,6 +85,8 @@ router.put('/:id/role', authMiddleware, async (req, res) => {
 
     user.role = role;
     await user.save();
+    invalidateCounts(User);
+    authCache.invalidateUser(user._id);
 
     res.json({
       message: 'User role updated successfully.',
@@ -127,6 +125,14 @@ router.put('/:id/status', authMiddleware, async (req, res) => {
 
     user.isActive = isActive;
     await user.save();
+    authCache.invalidateUser(user._id);
+
+    // Deactivated users drop off the leaderboards
+    if (user.isActive) {
+      leaderboard.upsertUser(user.toObject({ flattenMaps: true }));
+    } else {
+      leaderboard.removeUser(user._id);
+    }
 
     res.json({
       message: `User ${isActive ? 'activated' : 'deactivated'} successfully.`,
@@ -151,52 +157,15 @@ router.get('/:id/progress', authMiddleware, async (req, res) => {
       return res.status(403).json({ error: 'Access denied.' });
     }
 
-    const user = await User.findById(req.params.id)
-      .populate('progress.completedDataStructures.dataStructureId', 'name category difficulty')
-      .populate('progress.completedAlgorithms.algorithmId', 'name category difficulty');
+    // Rollups and a bounded aggregation; cost does not grow with the user's history
+    const progress = await progressStore.getSummary(req.params.id, {
+      recent: parseInt(req.query.recent, 10) || 10
+    });
 
-    if (!user) {
+    if (!progress) {
       return res.status(404).json({ error: 'User not found.' });
     }
 
-    const progress = {
-      totalPoints: user.progress.totalPoints,
-      level: user.progress.level,
-      completedDataStructures: user.progress.completedDataStructures.length,
-      completedAlgorithms: user.progress.completedAlgorithms.length,
-      dataStructuresByCategory: {},
-      algorithmsByCategory: {},
-      recentActivity: [
-        ...user.progress.completedDataStructures.map(ds => ({
-          type: 'datastructure',
-          name: ds.dataStructureId.name,
-          category: ds.dataStructureId.category,
-          difficulty: ds.dataStructureId.difficulty,
-          completedAt: ds.completedAt,
-          score: ds.score
-        })),
-        ...user.progress.completedAlgorithms.map(algo => ({
-          type: 'algorithm',
-          name: algo.algorithmId.name,
-          category: algo.algorithmId.category,
-          difficulty: algo.algorithmId.difficulty,
-          completedAt: algo.completedAt,
-          score: algo.score
-        }))
-      ].sort((a, b) => new Date(b.completedAt) - new Date(a.completedAt)).slice(0, 10)
-    };
-
-    // Group by categories
-    user.progress.completedDataStructures.forEach(ds => {
-      const category = ds.dataStructureId.category;
-      progress.dataStructuresByCategory[category] = (progress.dataStructuresByCategory[category] || 0) + 1;
-    });
-
-    user.progress.completedAlgorithms.forEach(algo => {
-      const category = algo.algorithmId.category;
-      progress.algorithmsByCategory[category] = (progress.algorithmsByCategory[category] || 0) + 1;
-    });
-
     res.json(progress);
   } catch (error) {
     console.error('Error fetching user progress:', error);
@@ -213,57 +182,41 @@ router.post('/:id/progress', authMiddleware, async (req, res) => {
       return res.status(403).json({ error: 'Access denied.' });
     }
 
-    const user = await User.findById(req.params.id);
+    if (!Object.keys(progressStore.COMPLETION_POINTS).includes(type)) {
+      return res.status(400).json({ error: 'Invalid progress type.' });
+    }
+
+    if (!mongoose.isValidObjectId(itemId)) {
+      return res.status(400).json({ error: 'Invalid item id.' });
+    }
+
+    const user = await User.findById(req.params.id).select('progress').lean();
     
     if (!user) {
       return res.status(404).json({ error: 'User not found.' });
     }
 
-    if (type === 'datastructure') {
-      const existingIndex = user.progress.completedDataStructures.findIndex(
-        ds => ds.dataStructureId.toString() === itemId
-      );
-
-      if (existingIndex === -1) {
-        user.progress.completedDataStructures.push({
-          dataStructureId: itemId,
-          score: score || 100,
-          completedAt: new Date()
-        });
-        user.progress.totalPoints += 10;
-      } else {
-        user.progress.completedDataStructures[existingIndex].score = Math.max(
-          user.progress.completedDataStructures[existingIndex].score,
-          score || 100
-        );
-      }
-    } else if (type === 'algorithm') {
-      const existingIndex = user.progress.completedAlgorithms.findIndex(
-        algo => algo.algorithmId.toString() === itemId
-      );
+    const Item = type === 'algorithm' ? Algorithm : DataStructure;
+    const item = await Item.findById(itemId).select('category').lean();
 
-      if (existingIndex === -1) {
-        user.progress.completedAlgorithms.push({
-          algorithmId: itemId,
-          score: score || 100,
-          completedAt: new Date()
-        });
-        user.progress.totalPoints += 15;
-      } else {
-        user.progress.completedAlgorithms[existingIndex].score = Math.max(
-          user.progress.completedAlgorithms[existingIndex].score,
-          score || 100
-        );
-      }
+    if (!item) {
+      return res.status(404).json({ error: 'Item not found.' });
     }
 
-    user.progress.level = user.calculateLevel();
-    await user.save();
+    // Upsert keeps the best score; points are only awarded for a first completion
+    const completion = await progressStore.recordCompletion({
+      userId: user._id,
+      itemType: type,
+      itemId,
+      category: item.category,
+      score: score || 100
+    });
+    const totals = completion.firstCompletion ? completion : user.progress;
 
     res.json({
       message: 'Progress updated successfully.',
-      totalPoints: user.progress.totalPoints,
-      level: user.progress.level
+      totalPoints: totals.totalPoints,
+      level: totals.level
     });
   } catch (error) {
     console.error('Error updating user progress:', error);
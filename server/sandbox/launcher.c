@@ -0,0 +1,206 @@
+/*
+ * Run a student program under resource limits and report what it used.
+ *
+ *   launcher <cpu_ms> <memory_kb> <wall_ms> <program> [args...]
+ *
+ * A limit of 0 disables it. stdin/stdout/stderr are passed straight through
+ * to the program. When the program has been reaped, one JSON line is written
+ * to file descriptor 3:
+ *
+ *   {"exitCode":0,"signal":0,"userUs":1200,"systemUs":300,"maxRssKb":1480,
+ *    "timeLimit":0,"memoryLimit":0}
+ *
+ * CPU and wall time and resident memory are sampled every few milliseconds
+ * and the program is killed as soon as it goes over a limit. RLIMIT_CPU and
+ * a generous RLIMIT_AS act as backstops between samples.
+ */
+#define _GNU_SOURCE
+#include <errno.h>
+#include <fcntl.h>
+#include <signal.h>
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <sys/prctl.h>
+#include <sys/resource.h>
+#include <sys/time.h>
+#include <sys/wait.h>
+#include <time.h>
+#include <unistd.h>
+
+#define SAMPLE_INTERVAL_NS (5 * 1000 * 1000)
+
+static long long now_ms(void)
+{
+    struct timespec ts;
+    clock_gettime(CLOCK_MONOTONIC, &ts);
+    return ts.tv_sec * 1000LL + ts.tv_nsec / 1000000;
+}
+
+static long read_rss_kb(pid_t pid)
+{
+    char path[64];
+    char line[256];
+    long kb = -1;
+    FILE *f;
+
+    snprintf(path, sizeof path, "/proc/%d/status", (int)pid);
+    f = fopen(path, "r");
+    if (!f)
+        return -1;
+    while (fgets(line, sizeof line, f)) {
+        if (strncmp(line, "VmRSS:", 6) == 0) {
+            kb = strtol(line + 6, NULL, 10);
+            break;
+        }
+    }
+    fclose(f);
+    return kb;
+}
+
+/* utime + stime from /proc/<pid>/stat, in milliseconds */
+static long long read_cpu_ms(pid_t pid)
+{
+    char path[64];
+    char buf[1024];
+    unsigned long long utime, stime;
+    char *p;
+    size_t n;
+    FILE *f;
+
+    snprintf(path, sizeof path, "/proc/%d/stat", (int)pid);
+    f = fopen(path, "r");
+    if (!f)
+        return -1;
+    n = fread(buf, 1, sizeof buf - 1, f);
+    fclose(f);
+    buf[n] = '\0';
+
+    /* The command name may contain spaces, so start after its closing paren */
+    p = strrchr(buf, ')');
+    if (!p)
+        return -1;
+    if (sscanf(p + 2, "%*c %*d %*d %*d %*d %*d %*u %*u %*u %*u %*u %llu %llu",
+               &utime, &stime) != 2)
+        return -1;
+    return (long long)(utime + stime) * 1000 / sysconf(_SC_CLK_TCK);
+}
+
+static long long timeval_us(struct timeval tv)
+{
+    return tv.tv_sec * 1000000LL + tv.tv_usec;
+}
+
+int main(int argc, char **argv)
+{
+    long cpu_ms, memory_kb, wall_ms;
+    long peak_kb = 0;
+    int time_limit = 0, memory_limit = 0;
+    int status = 0;
+    long long started;
+    struct rusage ru;
+    struct timespec tick = { 0, SAMPLE_INTERVAL_NS };
+    sigset_t chld;
+    pid_t parent, pid;
+    FILE *report;
+
+    if (argc < 5) {
+        fprintf(stderr, "usage: %s <cpu_ms> <memory_kb> <wall_ms> <program> [args...]\n", argv[0]);
+        return 125;
+    }
+    cpu_ms = atol(argv[1]);
+    memory_kb = atol(argv[2]);
+    wall_ms = atol(argv[3]);
+
+    report = fdopen(3, "w");
+    if (!report)
+        return 125;
+    fcntl(3, F_SETFD, FD_CLOEXEC);
+
+    sigemptyset(&chld);
+    sigaddset(&chld, SIGCHLD);
+    sigprocmask(SIG_BLOCK, &chld, NULL);
+
+    parent = getpid();
+    pid = fork();
+    if (pid < 0)
+        return 125;
+
+    if (pid == 0) {
+        struct rlimit rl;
+
+        sigprocmask(SIG_UNBLOCK, &chld, NULL);
+        /* Never outlive the launcher, even if it is SIGKILLed */
+        prctl(PR_SET_PDEATHSIG, SIGKILL);
+        if (getppid() != parent)
+            _exit(125);
+
+        rl.rlim_cur = rl.rlim_max = 0;
+        setrlimit(RLIMIT_CORE, &rl);
+        if (cpu_ms > 0) {
+            rl.rlim_cur = (cpu_ms + 999) / 1000 + 1;
+            rl.rlim_max = rl.rlim_cur + 1;
+            setrlimit(RLIMIT_CPU, &rl);
+        }
+        if (memory_kb > 0) {
+            rl.rlim_cur = rl.rlim_max = (rlim_t)memory_kb * 1024 * 2 + 64UL * 1024 * 1024;
+            setrlimit(RLIMIT_AS, &rl);
+        }
+
+        execv(argv[4], argv + 4);
+        _exit(126);
+    }
+
+    started = now_ms();
+    memset(&ru, 0, sizeof ru);
+
+    for (;;) {
+        pid_t reaped = wait4(pid, &status, WNOHANG, &ru);
+        long rss;
+        long long cpu;
+
+        if (reaped == pid)
+            break;
+        if (reaped < 0 && errno != EINTR)
+            break;
+
+        rss = read_rss_kb(pid);
+        if (rss > peak_kb)
+            peak_kb = rss;
+        if (memory_kb > 0 && rss > memory_kb && !memory_limit) {
+            memory_limit = 1;
+            kill(pid, SIGKILL);
+        }
+
+        cpu = read_cpu_ms(pid);
+        if (!time_limit && ((cpu_ms > 0 && cpu > cpu_ms) ||
+                            (wall_ms > 0 && now_ms() - started > wall_ms))) {
+            time_limit = 1;
+            kill(pid, SIGKILL);
+        }
+
+        sigtimedwait(&chld, NULL, &tick);
+    }
+
+    if (ru.ru_maxrss > peak_kb)
+        peak_kb = ru.ru_maxrss;
+    if (memory_kb > 0 && peak_kb > memory_kb)
+        memory_limit = 1;
+    if (WIFSIGNALED(status) && WTERMSIG(status) == SIGXCPU)
+        time_limit = 1;
+    if (cpu_ms > 0 && (timeval_us(ru.ru_utime) + timeval_us(ru.ru_stime)) / 1000 > cpu_ms)
+        time_limit = 1;
+
+    fprintf(report,
+            "{\"exitCode\":%d,\"signal\":%d,\"userUs\":%lld,\"systemUs\":%lld,"
+            "\"maxRssKb\":%ld,\"timeLimit\":%d,\"memoryLimit\":%d}\n",
+            WIFEXITED(status) ? WEXITSTATUS(status) : -1,
+            WIFSIGNALED(status) ? WTERMSIG(status) : 0,
+            timeval_us(ru.ru_utime), timeval_us(ru.ru_stime),
+            peak_kb, time_limit, memory_limit);
+    fclose(report);
+
+    if (WIFEXITED(status))
+        return WEXITSTATUS(status);
+    return 128 + (WIFSIGNALED(status) ? WTERMSIG(status) : 0);
+}
@@ -0,0 +1,26 @@
+// Move completions out of the embedded User.progress arrays into the
+// Progress collection, then build the completion rollups of every user who
+// has none yet. The server also migrates on startup, but rollups are only
+// built here; run it by hand, ideally while traffic is low:
+//
+//   npm run migrate:progress
+const mongoose = require('mongoose');
+require('dotenv').config();
+const { migrateEmbeddedProgress, rebuildMissingRollups } = require('../services/progressStore');
+
+const main = async () => {
+  await mongoose.connect(process.env.MONGODB_URI || 'mongodb://localhost:27017/c-ds-algo');
+  try {
+    const { migratedUsers, migratedItems } = await migrateEmbeddedProgress();
+    console.log(`Migrated ${migratedItems} progress entries for ${migratedUsers} users`);
+    const { rebuilt, skipped } = await rebuildMissingRollups();
+    console.log(`Built rollups for ${rebuilt} users, ${skipped} skipped (rerun to retry)`);
+  } finally {
+    await mongoose.disconnect();
+  }
+};
+
+main().catch((error) => {
+  console.error('Progress migration failed:', error);
+  process.exit(1);
+});
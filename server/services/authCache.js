@@ -0,0 +1,88 @@
+const crypto = require('crypto');
+const LRUCache = require('../utils/lruCache');
+const clusterBus = require('./clusterBus');
+
+const TTL_MS = parseInt(process.env.AUTH_CACHE_TTL_MS, 10) || 60 * 1000;
+const MAX_ENTRIES = parseInt(process.env.AUTH_CACHE_MAX_ENTRIES, 10) || 10000;
+
+// Cached token keys per user id, so a role or status change drops all of them
+const tokensByUser = new Map();
+
+const cache = new LRUCache({
+  maxEntries: MAX_ENTRIES,
+  ttlMs: TTL_MS,
+  onEvict: (key, principal) => {
+    const keys = tokensByUser.get(principal.userId);
+    if (!keys) return;
+    keys.delete(key);
+    if (keys.size === 0) tokensByUser.delete(principal.userId);
+  }
+});
+
+const stats = {
+  hits: 0,
+  misses: 0
+};
+
+// Bumped whenever a user is invalidated; lookups that straddle one are not stored
+let epoch = 0;
+
+// Bearer tokens are only kept in memory as digests
+const tokenKey = token => crypto.createHash('sha256').update(token).digest('base64url');
+
+// Verified principal for token, or undefined
+const get = (token) => {
+  const principal = cache.get(tokenKey(token));
+  if (principal) stats.hits += 1;
+  else stats.misses += 1;
+  return principal;
+};
+
+// Remember a verified principal, never past the token's own expiry (exp in seconds)
+const set = (token, principal, { exp, startEpoch } = {}) => {
+  if (startEpoch !== undefined && startEpoch !== epoch) return;
+
+  const ttlMs = exp ? Math.min(TTL_MS, exp * 1000 - Date.now()) : TTL_MS;
+  if (ttlMs <= 0) return;
+
+  const key = tokenKey(token);
+  const userId = String(principal._id);
+  cache.set(key, { ...principal, userId }, ttlMs);
+
+  if (!tokensByUser.has(userId)) tokensByUser.set(userId, new Set());
+  tokensByUser.get(userId).add(key);
+};
+
+// Drop every cached token of a user whose role or status changed
+const dropUser = (userId) => {
+  epoch += 1;
+  const keys = tokensByUser.get(String(userId));
+  if (!keys) return;
+  for (const key of [...keys]) {
+    cache.delete(key);
+  }
+};
+
+// A role or status change must reach every worker, or another one keeps accepting the old principal
+const invalidateUser = (userId) => {
+  dropUser(userId);
+  clusterBus.publish('authCache:invalidateUser', String(userId));
+};
+
+clusterBus.subscribe('authCache:invalidateUser', dropUser);
+
+const currentEpoch = () => epoch;
+
+const getStats = () => ({
+  ...stats,
+  entries: cache.size,
+  users: tokensByUser.size
+});
+
+module.exports = {
+  get,
+  set,
+  invalidateUser,
+  currentEpoch,
+  getStats
+};
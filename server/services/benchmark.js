@@ -0,0 +1,117 @@
+const runner = require('./runner');
+const { normalizeOutput } = require('./grader');
+const { generateInput, runCost, GENERATORS } = require('./complexityProfiler');
+const { summarize } = require('../utils/stats');
+
+const RUN_TIMEOUT_MS = parseInt(process.env.BENCHMARK_RUN_TIMEOUT_MS, 10) || 2000;
+const MAX_TRIALS = 20;
+const MAX_WARMUP = 5;
+const MAX_INPUT_SIZE = parseInt(process.env.PROFILE_MAX_INPUT_SIZE, 10) || 1000000;
+
+// Inputs for a benchmark: the algorithm's test cases, or one generated input
+const benchmarkInputs = (algorithm, { generator, size }) => {
+  if (generator) {
+    return [generateInput(generator, size)];
+  }
+  const inputs = algorithm.testCases.map(testCase => testCase.input);
+  return inputs.length > 0 ? inputs : [''];
+};
+
+// Validate and clamp user-supplied benchmark options
+const normalizeOptions = ({ generator, size = 10000, trials = 5, warmup = 1, maxRatio } = {}) => {
+  if (generator && !GENERATORS[generator]) {
+    return { error: `Unknown generator. Use one of: ${Object.keys(GENERATORS).join(', ')}.` };
+  }
+
+  const n = Number(size);
+  if (generator && (!Number.isInteger(n) || n < 1 || n > MAX_INPUT_SIZE)) {
+    return { error: `Input size must be an integer between 1 and ${MAX_INPUT_SIZE}.` };
+  }
+
+  const threshold = maxRatio === undefined || maxRatio === null ? null : Number(maxRatio);
+  if (threshold !== null && !(threshold > 0)) {
+    return { error: 'maxRatio must be a positive number.' };
+  }
+
+  return {
+    generator: generator || null,
+    size: generator ? n : null,
+    trials: Math.min(Math.max(parseInt(trials, 10) || 5, 1), MAX_TRIALS),
+    warmup: Math.min(Math.max(parseInt(warmup, 10) || 0, 0), MAX_WARMUP),
+    maxRatio: threshold
+  };
+};
+
+// Run a binary over every input once; returns total cost and peak memory, or the failing verdict
+const runOnce = async (binaryPath, inputs, keepOutput) => {
+  let timeMs = 0;
+  let peakRssKb = 0;
+  const outputs = [];
+
+  for (const input of inputs) {
+    const run = await runner.runBinary(binaryPath, { input, timeout: RUN_TIMEOUT_MS, retainOutput: keepOutput });
+
+    if (run.verdict !== 'OK') {
+      return { verdict: run.verdict };
+    }
+    timeMs += runCost(run);
+    peakRssKb = Math.max(peakRssKb, run.usage.peakRssKb || 0);
+    if (keepOutput) outputs.push(normalizeOutput(run.stdout));
+  }
+
+  return { verdict: 'OK', timeMs, peakRssKb, outputs };
+};
+
+const ratio = (value, baseline) => (baseline > 0 ? value / baseline : null);
+
+// Run submission and reference alternately on the same inputs so drift in
+// machine load hits both sides equally. Warmup rounds are discarded.
+// Callers run this inside the scheduler slot the request was admitted with.
+const compareBinaries = async ({ submissionPath, referencePath, inputs, trials, warmup }) => {
+  const sides = {
+    submission: { path: submissionPath, times: [], memory: [] },
+    reference: { path: referencePath, times: [], memory: [] }
+  };
+  let outputsMatch = null;
+
+  for (let round = 0; round < warmup + trials; round++) {
+    // Swap the order every round so neither side always runs on a cold cache
+    const order = round % 2 === 0 ? ['submission', 'reference'] : ['reference', 'submission'];
+    const firstMeasured = round === warmup;
+    const measured = {};
+
+    for (const name of order) {
+      const outcome = await runOnce(sides[name].path, inputs, firstMeasured);
+      if (outcome.verdict !== 'OK') {
+        return { error: `${name === 'submission' ? 'Submission' : 'Reference'} run failed with ${outcome.verdict}.` };
+      }
+      measured[name] = outcome;
+    }
+
+    if (round < warmup) continue;
+    if (firstMeasured) {
+      outputsMatch = measured.submission.outputs.every((output, i) => output === measured.reference.outputs[i]);
+    }
+    for (const name of order) {
+      sides[name].times.push(measured[name].timeMs);
+      sides[name].memory.push(measured[name].peakRssKb);
+    }
+  }
+
+  const submission = { timeMs: summarize(sides.submission.times), peakRssKb: summarize(sides.submission.memory) };
+  const reference = { timeMs: summarize(sides.reference.times), peakRssKb: summarize(sides.reference.memory) };
+
+  return {
+    submission,
+    reference,
+    outputsMatch,
+    speedRatio: ratio(submission.timeMs.median, reference.timeMs.median),
+    memoryRatio: ratio(submission.peakRssKb.median, reference.peakRssKb.median)
+  };
+};
+
+module.exports = {
+  benchmarkInputs,
+  normalizeOptions,
+  compareBinaries
+};
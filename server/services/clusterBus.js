@@ -0,0 +1,110 @@
+const cluster = require('cluster');
+
+const CALL_TIMEOUT_MS = parseInt(process.env.CLUSTER_CALL_TIMEOUT_MS, 10) || 1000;
+
+// Messages between cluster workers, relayed by the primary over IPC.
+//   call(name, ...args)         runs a handler registered in the primary and resolves with its result
+//   publish(channel, payload)   delivers payload to subscribers in every other worker
+// Outside cluster mode calls run in-process and publishing is a no-op, since
+// the only process has already applied its own change.
+const handlers = new Map();
+const subscribers = new Map();
+const pending = new Map();
+let nextId = 0;
+
+const handle = (name, handler) => {
+  handlers.set(name, handler);
+};
+
+const call = (name, ...args) => {
+  if (!cluster.isWorker) {
+    return Promise.resolve().then(() => handlers.get(name)(...args));
+  }
+
+  return new Promise((resolve, reject) => {
+    nextId += 1;
+    const id = nextId;
+    const timer = setTimeout(() => {
+      pending.delete(id);
+      reject(new Error(`Cluster call ${name} timed out.`));
+    }, CALL_TIMEOUT_MS);
+    timer.unref();
+
+    pending.set(id, { resolve, reject, timer });
+    process.send({ bus: 'call', id, name, args });
+  });
+};
+
+const subscribe = (channel, listener) => {
+  if (!subscribers.has(channel)) subscribers.set(channel, new Set());
+  subscribers.get(channel).add(listener);
+  return () => subscribers.get(channel).delete(listener);
+};
+
+const deliver = (channel, payload) => {
+  for (const listener of subscribers.get(channel) || []) {
+    try {
+      listener(payload);
+    } catch (error) {
+      console.error(`Error handling cluster message on ${channel}:`, error);
+    }
+  }
+};
+
+const publish = (channel, payload) => {
+  if (cluster.isWorker && process.connected) {
+    process.send({ bus: 'publish', channel, payload });
+  }
+};
+
+if (cluster.isWorker) {
+  process.on('message', (message) => {
+    if (!message || !message.bus) return;
+
+    if (message.bus === 'reply') {
+      const waiting = pending.get(message.id);
+      if (!waiting) return;
+      pending.delete(message.id);
+      clearTimeout(waiting.timer);
+      if (message.error) waiting.reject(new Error(message.error));
+      else waiting.resolve(message.result);
+    } else if (message.bus === 'publish') {
+      deliver(message.channel, message.payload);
+    }
+  });
+}
+
+const send = (worker, message) => {
+  if (worker.isConnected()) worker.send(message);
+};
+
+// Primary side: answer a worker's calls and relay what it publishes to the others
+const attach = (worker) => {
+  worker.on('message', async (message) => {
+    if (!message || !message.bus) return;
+
+    if (message.bus === 'call') {
+      try {
+        const handler = handlers.get(message.name);
+        if (!handler) throw new Error(`No cluster handler for ${message.name}.`);
+        const result = await handler(...message.args);
+        send(worker, { bus: 'reply', id: message.id, result });
+      } catch (error) {
+        send(worker, { bus: 'reply', id: message.id, error: error.message });
+      }
+    } else if (message.bus === 'publish') {
+      for (const other of Object.values(cluster.workers)) {
+        if (other && other !== worker) send(other, message);
+      }
+    }
+  });
+};
+
+module.exports = {
+  handle,
+  call,
+  subscribe,
+  publish,
+  attach,
+  deliver
+};
@@ -0,0 +1,261 @@
+const crypto = require('crypto');
+const fs = require('fs');
+const path = require('path');
+const { v4: uuidv4 } = require('uuid');
+const LRUCache = require('../utils/lruCache');
+const { workerDir, sweepWorkerDirs } = require('../utils/workerDirs');
+const runner = require('./runner');
+
+// Content-addressed cache of compiled binaries.
+// Artifacts are keyed by sha256(gcc version + flags + source) and stored on
+// disk under CACHE_DIR; the in-memory LRU is the index over those files.
+// Every build gets its own file, <key>-<build id>, so a deferred unlink of an
+// evicted build can never remove a newer build of the same key.
+const CACHE_ROOT = process.env.COMPILE_CACHE_DIR || path.join(runner.SCRATCH_ROOT, 'cache');
+// Cluster workers each keep their own index, so each process gets its own
+// directory too; one worker's evictions can never unlink a binary another has
+// indexed, including the worker it is replacing during a rolling restart
+const CACHE_DIR = workerDir(CACHE_ROOT);
+const MAX_ENTRIES = parseInt(process.env.COMPILE_CACHE_MAX_ENTRIES, 10) || 500;
+const MAX_BYTES = parseInt(process.env.COMPILE_CACHE_MAX_BYTES, 10) || 256 * 1024 * 1024;
+const DEFAULT_FLAGS = (process.env.COMPILER_FLAGS || '').split(/\s+/).filter(Boolean);
+
+const ARTIFACT_PATTERN = /^([0-9a-f]{64})-[0-9a-f-]{36}$/;
+
+const stats = {
+  hits: 0,
+  misses: 0,
+  coalesced: 0,
+  evictions: 0,
+  failures: 0
+};
+
+// Evicted artifacts that are still being executed are unlinked on release
+const removeArtifact = (entry) => {
+  entry.evicted = true;
+  if (entry.refs === 0) {
+    fs.promises.unlink(entry.path).catch(() => {});
+  }
+};
+
+const index = new LRUCache({
+  maxEntries: MAX_ENTRIES,
+  maxSize: MAX_BYTES,
+  sizeOf: (entry) => entry.size,
+  onEvict: (key, entry) => {
+    stats.evictions += 1;
+    removeArtifact(entry);
+  }
+});
+
+// Index a build, retiring any older build of the same key
+const indexArtifact = (key, entry) => {
+  const previous = index.peek(key);
+  index.set(key, entry);
+  if (previous && previous !== entry) removeArtifact(previous);
+};
+
+// Identical requests that arrive while a build is running share its promise
+const inflight = new Map();
+
+let gccVersionPromise = null;
+const getGccVersion = () => {
+  if (!gccVersionPromise) {
+    gccVersionPromise = runner.runProcess('gcc', ['--version'])
+      .then(result => (result.code === 0 ? result.stdout.trim() : 'unknown'));
+  }
+  return gccVersionPromise;
+};
+
+// Adopt artifacts left on disk by a previous process, oldest first; in
+// cluster mode, drop the directories of workers that have exited instead
+let initPromise = null;
+const init = () => {
+  if (!initPromise) {
+    initPromise = (async () => {
+      if (CACHE_DIR !== CACHE_ROOT) await sweepWorkerDirs(CACHE_ROOT);
+      await fs.promises.mkdir(CACHE_DIR, { recursive: true });
+      const files = await fs.promises.readdir(CACHE_DIR);
+      const artifacts = [];
+
+      await Promise.all(files.map(async (file) => {
+        const filePath = path.join(CACHE_DIR, file);
+        const match = ARTIFACT_PATTERN.exec(file);
+        if (!match) {
+          await fs.promises.rm(filePath, { force: true, recursive: true }).catch(() => {});
+          return;
+        }
+        try {
+          const fileStats = await fs.promises.stat(filePath);
+          artifacts.push({ key: match[1], path: filePath, size: fileStats.size, mtime: fileStats.mtimeMs });
+        } catch (error) {}
+      }));
+
+      // Where a key was built more than once, the newest build wins
+      artifacts
+        .sort((a, b) => a.mtime - b.mtime)
+        .forEach(({ key, path: artifactPath, size }) => {
+          indexArtifact(key, { path: artifactPath, size, refs: 0, evicted: false });
+        });
+    })();
+  }
+  return initPromise;
+};
+
+// Reference artifacts are content-addressed too, so their key stands in for their files
+const cacheKey = async (code, flags, link) => {
+  const gccVersion = await getGccVersion();
+  return crypto
+    .createHash('sha256')
+    .update(gccVersion)
+    .update('\0')
+    .update(flags.join(' '))
+    .update('\0')
+    .update(link ? `${link.key}:${link.objects.length}` : '')
+    .update('\0')
+    .update(code)
+    .digest('hex');
+};
+
+// Include directories and objects to build against, from prepared reference artifacts
+const linkOptions = (artifacts, linkReference) => {
+  if (!artifacts) return null;
+  return {
+    key: artifacts.key,
+    includeDirs: [artifacts.dir],
+    objects: linkReference && artifacts.objectPath ? [artifacts.objectPath] : []
+  };
+};
+
+// Pin an entry so eviction cannot unlink it while it runs
+const unpin = (entry) => {
+  entry.refs -= 1;
+  if (entry.evicted && entry.refs === 0) {
+    fs.promises.unlink(entry.path).catch(() => {});
+  }
+};
+
+const acquire = (key, entry, cached) => {
+  entry.refs += 1;
+  let released = false;
+
+  return {
+    success: true,
+    key,
+    cached,
+    binaryPath: entry.path,
+    release: () => {
+      if (released) return;
+      released = true;
+      unpin(entry);
+    }
+  };
+};
+
+const artifactExists = async (artifactPath) => {
+  try {
+    await fs.promises.stat(artifactPath);
+    return true;
+  } catch (error) {
+    if (error.code === 'ENOENT') return false;
+    throw error;
+  }
+};
+
+// Move a finished binary into the cache, copying when the scratch root is on another filesystem
+const moveIntoCache = async (from, to) => {
+  try {
+    await fs.promises.rename(from, to);
+  } catch (error) {
+    if (error.code !== 'EXDEV') throw error;
+    const partialPath = `${to}.${uuidv4()}.partial`;
+    await fs.promises.copyFile(from, partialPath);
+    await fs.promises.chmod(partialPath, 0o755);
+    await fs.promises.rename(partialPath, to);
+  }
+};
+
+const build = (key, code, flags, link) => runner.withScratchDir(async (dir) => {
+  const outputPath = path.join(dir, 'a.out');
+  const finalPath = path.join(CACHE_DIR, `${key}-${uuidv4()}`);
+  const result = await runner.compile(code, outputPath, flags, link || {});
+
+  if (result.code !== 0) {
+    stats.failures += 1;
+    return { success: false, stdout: result.stdout, stderr: result.stderr };
+  }
+
+  // rename() is atomic, so readers never see a half-written binary
+  await moveIntoCache(outputPath, finalPath);
+  const { size } = await fs.promises.stat(finalPath);
+  // Pinned by the build itself until every waiter has leased it, so even a
+  // binary evicted the moment it is indexed (e.g. larger than MAX_BYTES) is
+  // still handed to the requests that built it
+  const entry = { path: finalPath, size, refs: 1, evicted: false };
+  indexArtifact(key, entry);
+
+  return { success: true, entry, stdout: result.stdout, stderr: result.stderr };
+});
+
+// Resolve a runnable binary for the given source, compiling at most once per key.
+// Passing reference `artifacts` puts their precompiled header on the include
+// path, and `linkReference` also links the reference object.
+// Successful results carry a release() that must be called once the binary has run.
+const getOrCompile = async (code, { flags = DEFAULT_FLAGS, artifacts = null, linkReference = false } = {}) => {
+  await init();
+  const link = linkOptions(artifacts, linkReference);
+  const key = await cacheKey(code, flags, link);
+
+  const entry = index.get(key);
+  if (entry) {
+    const lease = acquire(key, entry, true);
+    if (await artifactExists(entry.path)) {
+      stats.hits += 1;
+      return lease;
+    }
+    // Deleted behind the index's back, e.g. by a tmp cleaner; build it again
+    lease.release();
+    if (index.peek(key) === entry) index.remove(key, false);
+  }
+
+  let pending = inflight.get(key);
+  if (pending) {
+    stats.coalesced += 1;
+  } else {
+    stats.misses += 1;
+    pending = build(key, code, flags, link)
+      .then((result) => {
+        // Waiters lease the entry as soon as this settles; drop the build's pin after them
+        if (result.entry) setImmediate(() => unpin(result.entry));
+        return result;
+      })
+      .finally(() => inflight.delete(key));
+    inflight.set(key, pending);
+  }
+
+  const result = await pending;
+  if (!result.success) {
+    return result;
+  }
+  return { ...acquire(key, result.entry, false), stdout: result.stdout, stderr: result.stderr };
+};
+
+const getStats = () => {
+  const lookups = stats.hits + stats.misses + stats.coalesced;
+  return {
+    ...stats,
+    hitRatio: lookups === 0 ? 0 : (stats.hits + stats.coalesced) / lookups,
+    entries: index.size,
+    bytes: index.totalSize,
+    maxEntries: MAX_ENTRIES,
+    maxBytes: MAX_BYTES,
+    inflight: inflight.size
+  };
+};
+
+module.exports = {
+  getOrCompile,
+  getGccVersion,
+  getStats,
+  DEFAULT_FLAGS
+};
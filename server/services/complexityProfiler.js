@@ -0,0 +1,194 @@
+const runner = require('./runner');
+const { median } = require('../utils/stats');
+
+const MAX_RUN_MS = parseInt(process.env.PROFILE_MAX_RUN_MS, 10) || 1000;
+const MAX_INPUT_SIZE = parseInt(process.env.PROFILE_MAX_INPUT_SIZE, 10) || 1000000;
+const MAX_SIZES = 12;
+const DEFAULT_SIZES = [1000, 2000, 4000, 8000, 16000, 32000, 64000, 128000, 256000];
+
+// Growth classes in increasing order of cost
+const GROWTH_CLASSES = [
+  { name: 'O(1)', fn: () => 1 },
+  { name: 'O(log n)', fn: n => Math.log2(n) },
+  { name: 'O(n)', fn: n => n },
+  { name: 'O(n log n)', fn: n => n * Math.log2(n) },
+  { name: 'O(n^2)', fn: n => n * n },
+  { name: 'O(n^3)', fn: n => n * n * n }
+];
+
+const classRank = name => GROWTH_CLASSES.findIndex(growth => growth.name === name);
+
+// Map free-form declarations ("O(n²)", "O(N log N)", "n*log(n)") onto GROWTH_CLASSES names
+const parseComplexity = (text) => {
+  if (!text) return null;
+  const normalized = text
+    .toLowerCase()
+    .replace(/²/g, '^2')
+    .replace(/³/g, '^3')
+    .replace(/\s+|\*|·/g, '')
+    .replace(/^o\((.*)\)$/, '$1')
+    .replace(/log\(n\)|log2n|lgn/g, 'logn');
+
+  const aliases = {
+    '1': 'O(1)',
+    'logn': 'O(log n)',
+    'n': 'O(n)',
+    'nlogn': 'O(n log n)',
+    'n^2': 'O(n^2)',
+    'nn': 'O(n^2)',
+    'n^3': 'O(n^3)'
+  };
+  return aliases[normalized] || null;
+};
+
+// Least-squares fit of t = a + b * f(n) for each class (b >= 0), best residual wins.
+// The intercept absorbs process start-up cost, which dominates at small n.
+const fitComplexity = (samples) => {
+  if (samples.length < 3) return null;
+
+  const fits = GROWTH_CLASSES.map(({ name, fn }) => {
+    const xs = samples.map(sample => fn(sample.n));
+    const ys = samples.map(sample => sample.timeMs);
+    const count = xs.length;
+    const meanX = xs.reduce((sum, x) => sum + x, 0) / count;
+    const meanY = ys.reduce((sum, y) => sum + y, 0) / count;
+
+    let covariance = 0;
+    let varianceX = 0;
+    for (let i = 0; i < count; i++) {
+      covariance += (xs[i] - meanX) * (ys[i] - meanY);
+      varianceX += (xs[i] - meanX) ** 2;
+    }
+
+    const slope = varianceX === 0 ? 0 : Math.max(0, covariance / varianceX);
+    const intercept = meanY - slope * meanX;
+    const residual = ys.reduce((sum, y, i) => sum + (y - (intercept + slope * xs[i])) ** 2, 0);
+    const total = ys.reduce((sum, y) => sum + (y - meanY) ** 2, 0);
+
+    return {
+      name,
+      coefficient: slope,
+      intercept,
+      rSquared: total === 0 ? 1 : 1 - residual / total,
+      residual
+    };
+  });
+
+  // Timings that do not grow at all are constant time
+  const first = samples[0].timeMs;
+  const last = samples[samples.length - 1].timeMs;
+  if (last <= first * 1.2 + 0.5) {
+    return { estimated: 'O(1)', fits };
+  }
+
+  const best = fits
+    .filter(fit => fit.name !== 'O(1)')
+    .reduce((winner, fit) => (fit.residual < winner.residual ? fit : winner));
+  return { estimated: best.name, rSquared: best.rSquared, fits };
+};
+
+// Small seeded PRNG so generated inputs are reproducible between runs
+const mulberry32 = (seed) => () => {
+  seed = (seed + 0x6D2B79F5) | 0;
+  let t = Math.imul(seed ^ (seed >>> 15), 1 | seed);
+  t = (t + Math.imul(t ^ (t >>> 7), 61 | t)) ^ t;
+  return ((t ^ (t >>> 14)) >>> 0) / 4294967296;
+};
+
+// stdin layouts for generated inputs: "n" alone, or "n" followed by n integers
+const GENERATORS = {
+  'n': n => `${n}\n`,
+  'array': (n, random) => {
+    const values = Array.from({ length: n }, () => Math.floor(random() * 1000000));
+    return `${n}\n${values.join(' ')}\n`;
+  },
+  'sorted-array': (n, random) => {
+    const values = Array.from({ length: n }, () => Math.floor(random() * 1000000)).sort((a, b) => a - b);
+    return `${n}\n${values.join(' ')}\n`;
+  },
+  'reversed-array': (n, random) => {
+    const values = Array.from({ length: n }, () => Math.floor(random() * 1000000)).sort((a, b) => b - a);
+    return `${n}\n${values.join(' ')}\n`;
+  },
+  'sorted-array-with-target': (n, random) => {
+    const values = Array.from({ length: n }, () => Math.floor(random() * 1000000)).sort((a, b) => a - b);
+    return `${n}\n${values.join(' ')}\n${values[Math.floor(random() * n)]}\n`;
+  }
+};
+
+const generateInput = (generator, n, seed = n) => GENERATORS[generator](n, mulberry32(seed));
+
+// CPU time is far less noisy than wall time on a shared box
+const runCost = run => (run.usage.cpuUserMs !== null
+  ? run.usage.cpuUserMs + run.usage.cpuSystemMs
+  : run.usage.wallMs);
+
+// Run a compiled binary over growing generated inputs, one run at a time so
+// samples do not contend with each other, and stop early once runs get slow.
+// Callers run this inside the scheduler slot the request was admitted with.
+const profileBinary = async ({ binaryPath, generator = 'array', sizes = DEFAULT_SIZES, trials = 3 }) => {
+  const samples = [];
+  let stoppedReason = null;
+
+  for (const n of sizes) {
+    const input = generateInput(generator, n);
+    const costs = [];
+    let peakRssKb = 0;
+
+    for (let trial = 0; trial < trials; trial++) {
+      const run = await runner.runBinary(binaryPath, { input, timeout: MAX_RUN_MS * 2, retainOutput: false });
+
+      if (run.verdict !== 'OK') {
+        stoppedReason = `${run.verdict} at n=${n}`;
+        break;
+      }
+      costs.push(runCost(run));
+      peakRssKb = Math.max(peakRssKb, run.usage.peakRssKb || 0);
+    }
+
+    if (stoppedReason) break;
+    const timeMs = median(costs);
+    samples.push({ n, timeMs, peakRssKb });
+
+    if (timeMs > MAX_RUN_MS) {
+      stoppedReason = `run time budget reached at n=${n}`;
+      break;
+    }
+  }
+
+  return { samples, stoppedReason };
+};
+
+// Validate and clamp user-supplied profiling options
+const normalizeOptions = ({ generator = 'array', sizes, trials = 3 } = {}) => {
+  if (!GENERATORS[generator]) {
+    return { error: `Unknown generator. Use one of: ${Object.keys(GENERATORS).join(', ')}.` };
+  }
+
+  const chosen = Array.isArray(sizes) && sizes.length > 0 ? sizes : DEFAULT_SIZES;
+  const cleaned = [...new Set(chosen.map(Number).filter(n => Number.isInteger(n) && n > 0 && n <= MAX_INPUT_SIZE))]
+    .sort((a, b) => a - b)
+    .slice(0, MAX_SIZES);
+
+  if (cleaned.length < 3) {
+    return { error: `Provide at least 3 distinct input sizes between 1 and ${MAX_INPUT_SIZE}.` };
+  }
+
+  return {
+    generator,
+    sizes: cleaned,
+    trials: Math.min(Math.max(parseInt(trials, 10) || 3, 1), 7)
+  };
+};
+
+module.exports = {
+  GROWTH_CLASSES,
+  GENERATORS,
+  classRank,
+  parseComplexity,
+  fitComplexity,
+  generateInput,
+  runCost,
+  profileBinary,
+  normalizeOptions
+};
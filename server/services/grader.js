@@ -0,0 +1,136 @@
+const compileCache = require('./compileCache');
+const referenceArtifacts = require('./referenceArtifacts');
+const runner = require('./runner');
+const { scheduler } = require('./scheduler');
+
+const CASE_TIMEOUT_MS = parseInt(process.env.GRADER_CASE_TIMEOUT_MS, 10) || 2000;
+
+// Compare outputs ignoring trailing whitespace and line-ending style
+const normalizeOutput = (text = '') => text
+  .replace(/\r\n/g, '\n')
+  .split('\n')
+  .map(line => line.trimEnd())
+  .join('\n')
+  .trim();
+
+const caseVerdict = (run, expectedOutput) => {
+  if (run.verdict !== 'OK') return run.verdict;
+  if (expectedOutput == null) return 'AC';
+  return normalizeOutput(run.stdout) === normalizeOutput(expectedOutput) ? 'AC' : 'WA';
+};
+
+// Hidden cases only ever report their verdict and timing
+const describeCase = (testCase, index, verdict, run) => {
+  const result = {
+    index,
+    hidden: Boolean(testCase.isHidden),
+    description: testCase.isHidden ? undefined : testCase.description,
+    verdict,
+    timeMs: run ? run.usage.wallMs : 0,
+    usage: run ? run.usage : null
+  };
+
+  if (!testCase.isHidden && run) {
+    result.input = testCase.input;
+    result.expectedOutput = testCase.expectedOutput;
+    result.actualOutput = run.stdout;
+    if (run.stderr) result.stderr = run.stderr;
+  }
+  return result;
+};
+
+// Compile against a document's precompiled header. The reference object is
+// deliberately not linked here: graded code must implement the algorithm itself.
+const compileAgainst = async (code, reference) => {
+  if (!reference) return compileCache.getOrCompile(code);
+
+  const artifacts = await referenceArtifacts.acquire(reference);
+  try {
+    return await compileCache.getOrCompile(code, { artifacts });
+  } finally {
+    artifacts.release();
+  }
+};
+
+// Run a compiled binary against every case in order, stopping early if asked
+const runCases = async (binaryPath, cases, { stopOnFirstFailure, timeout }) => {
+  const results = new Array(cases.length);
+
+  for (let index = 0; index < cases.length; index++) {
+    const testCase = cases[index];
+    const run = await runner.runBinary(binaryPath, { input: testCase.input || '', timeout });
+    const verdict = caseVerdict(run, testCase.expectedOutput);
+    results[index] = describeCase(testCase, index, verdict, run);
+    if (stopOnFirstFailure && verdict !== 'AC') break;
+  }
+  return results;
+};
+
+// Compile a submission once and run it against every test case.
+// The whole submission runs in the one scheduler slot it was admitted with,
+// so once grading starts it can no longer be refused with a QueueFullError
+// halfway through its cases.
+const gradeSubmission = async ({
+  code,
+  testCases = [],
+  reference = null,
+  owner,
+  stopOnFirstFailure = false,
+  timeout = CASE_TIMEOUT_MS,
+  onStart = () => {}
+}) => {
+  // Without test cases the program only has to run cleanly
+  const cases = testCases.length > 0 ? testCases : [{ input: '', expectedOutput: null }];
+
+  const { result: graded, queueWaitMs } = await scheduler.schedule(owner, async () => {
+    onStart();
+    const build = await compileAgainst(code, reference);
+    if (!build.success) return { build, results: [] };
+
+    try {
+      return { build, results: await runCases(build.binaryPath, cases, { stopOnFirstFailure, timeout }) };
+    } finally {
+      build.release();
+    }
+  });
+  const { build, results } = graded;
+
+  if (!build.success) {
+    return {
+      verdict: 'CE',
+      passed: 0,
+      total: cases.length,
+      compilationError: build.stderr,
+      results: [],
+      queueWaitMs
+    };
+  }
+
+  for (let index = 0; index < cases.length; index++) {
+    if (!results[index]) {
+      results[index] = describeCase(cases[index], index, 'SKIPPED', null);
+    }
+  }
+
+  const passed = results.filter(result => result.verdict === 'AC').length;
+  const firstFailure = results.find(result => result.verdict !== 'AC');
+  const measured = results.filter(result => result.usage);
+
+  return {
+    verdict: firstFailure ? firstFailure.verdict : 'AC',
+    passed,
+    total: cases.length,
+    maxTimeMs: Math.max(0, ...measured.map(result => result.usage.wallMs)),
+    maxMemoryKb: Math.max(0, ...measured.map(result => result.usage.peakRssKb || 0)),
+    cached: build.cached,
+    results,
+    queueWaitMs
+  };
+};
+
+module.exports = {
+  gradeSubmission,
+  describeCase,
+  compileAgainst,
+  normalizeOutput
+};
@@ -0,0 +1,187 @@
+const { EventEmitter } = require('events');
+const { v4: uuidv4 } = require('uuid');
+const clusterBus = require('./clusterBus');
+const { ownerKey } = require('./scheduler');
+
+const RESULT_TTL_MS = parseInt(process.env.JOB_RESULT_TTL_MS, 10) || 15 * 60 * 1000;
+const MAX_RETAINED = parseInt(process.env.JOB_MAX_RETAINED, 10) || 10000;
+
+// In-memory registry of asynchronous compile and submission jobs.
+// A job moves queued -> running -> completed | failed; finished jobs are kept
+// for RESULT_TTL_MS so clients can poll for the result, then dropped.
+// With a channel, status changes are mirrored to the other cluster workers so
+// a client can poll whichever worker its next request lands on.
+class JobStore extends EventEmitter {
+  constructor({ ttlMs = RESULT_TTL_MS, maxRetained = MAX_RETAINED, channel = null } = {}) {
+    super();
+    this.channel = channel;
+    this.setMaxListeners(0);
+    this.ttlMs = ttlMs;
+    this.maxRetained = maxRetained;
+    this.jobs = new Map();
+    this.sweeper = setInterval(() => this.sweep(), Math.min(ttlMs, 60 * 1000));
+    this.sweeper.unref();
+  }
+
+  create({ type, owner }) {
+    const job = {
+      id: uuidv4(),
+      type,
+      owner,
+      status: 'queued',
+      createdAt: new Date(),
+      startedAt: null,
+      finishedAt: null,
+      result: null,
+      error: null
+    };
+
+    this.jobs.set(job.id, job);
+    this.enforceLimit();
+    this.share(job);
+    return job;
+  }
+
+  // Shared state carries the owner, which toJSON keeps from clients
+  share(job) {
+    if (this.channel) clusterBus.publish(this.channel, { ...this.toJSON(job), owner: job.owner });
+  }
+
+  // Record a job running in another worker from its published state
+  mirror(state) {
+    const revive = value => (value ? new Date(value) : null);
+    const job = {
+      ...state,
+      mirrored: true,
+      createdAt: revive(state.createdAt),
+      startedAt: revive(state.startedAt),
+      finishedAt: revive(state.finishedAt)
+    };
+    this.jobs.set(job.id, job);
+    this.enforceLimit();
+    this.emit(job.id, this.toJSON(job));
+  }
+
+  get(id) {
+    return this.jobs.get(id);
+  }
+
+  update(job, changes) {
+    Object.assign(job, changes);
+    this.emit(job.id, this.toJSON(job));
+    this.share(job);
+  }
+
+  // Execute work(markRunning) in the background and record its outcome
+  run(job, work) {
+    const markRunning = () => {
+      if (job.status === 'queued') {
+        this.update(job, { status: 'running', startedAt: new Date() });
+      }
+    };
+
+    Promise.resolve()
+      .then(() => work(markRunning))
+      .then((result) => {
+        this.update(job, { status: 'completed', finishedAt: new Date(), result });
+      })
+      .catch((error) => {
+        console.error(`Job ${job.id} failed:`, error);
+        this.update(job, {
+          status: 'failed',
+          finishedAt: new Date(),
+          error: error.retryAfter ? error.message : 'Job failed unexpectedly.'
+        });
+      });
+
+    return job;
+  }
+
+  // Call listener with every status change until the job finishes; returns an unsubscribe function
+  subscribe(id, listener) {
+    const handler = (state) => {
+      listener(state);
+      if (state.status === 'completed' || state.status === 'failed') {
+        this.off(id, handler);
+      }
+    };
+    this.on(id, handler);
+    return () => this.off(id, handler);
+  }
+
+  // Jobs this process is still working on
+  activeCount() {
+    let active = 0;
+    for (const job of this.jobs.values()) {
+      if (!job.mirrored && !this.isFinished(job)) active += 1;
+    }
+    return active;
+  }
+
+  isFinished(job) {
+    return job.status === 'completed' || job.status === 'failed';
+  }
+
+  sweep() {
+    const cutoff = Date.now() - this.ttlMs;
+    for (const [id, job] of this.jobs) {
+      if (this.isFinished(job) && job.finishedAt.getTime() < cutoff) {
+        this.jobs.delete(id);
+      }
+    }
+  }
+
+  // Drop the oldest finished jobs once too many are retained
+  enforceLimit() {
+    if (this.jobs.size <= this.maxRetained) return;
+    for (const [id, job] of this.jobs) {
+      if (this.jobs.size <= this.maxRetained) break;
+      if (this.isFinished(job)) this.jobs.delete(id);
+    }
+  }
+
+  toJSON(job) {
+    return {
+      id: job.id,
+      type: job.type,
+      status: job.status,
+      createdAt: job.createdAt,
+      startedAt: job.startedAt,
+      finishedAt: job.finishedAt,
+      expiresAt: job.finishedAt ? new Date(job.finishedAt.getTime() + this.ttlMs) : null,
+      result: job.result,
+      error: job.error
+    };
+  }
+
+  getStats() {
+    const counts = { queued: 0, running: 0, completed: 0, failed: 0 };
+    for (const job of this.jobs.values()) {
+      counts[job.status] += 1;
+    }
+    return { ...counts, retained: this.jobs.size, ttlMs: this.ttlMs };
+  }
+}
+
+const jobStore = new JobStore({ channel: 'jobs' });
+clusterBus.subscribe('jobs', state => jobStore.mirror(state));
+
+// 202 response pointing the client at the job's status and event stream
+const sendAccepted = (res, job) => res.status(202).json({
+  message: 'Job accepted.',
+  jobId: job.id,
+  status: job.status,
+  statusUrl: `/api/jobs/${job.id}`,
+  eventsUrl: `/api/jobs/${job.id}/events`
+});
+
+// Jobs belong to the user that queued them, or to the client IP for anonymous
+// compiles. Jobs queued anonymously stay readable from that IP once signed in.
+const isJobOwner = (job, req) => job.owner === ownerKey(req) || job.owner === req.ip;
+
+module.exports = {
+  JobStore,
+  jobStore,
+  sendAccepted,
+  isJobOwner
+};
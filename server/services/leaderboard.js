@@ -0,0 +1,185 @@
+const User = require('../models/User');
+const RankedSkipList = require('../utils/rankedSkipList');
+const clusterBus = require('./clusterBus');
+
+const REFRESH_MS = parseInt(process.env.LEADERBOARD_REFRESH_MS, 10) || 10 * 60 * 1000;
+const GLOBAL = 'global';
+
+// Board names: "global" ranks total points; "<itemType>:<category>" ranks
+// how many items of that category a user has completed.
+const categoryBoard = (itemType, category) => `${itemType}:${category}`;
+
+// In-memory leaderboards. They are built from the database on first use,
+// updated incrementally whenever points or completions change, and rebuilt
+// every REFRESH_MS to pick up changes made by other server processes.
+// Reads never query MongoDB once the boards are loaded. Changes are plain
+// objects so other cluster workers can apply them too.
+class Leaderboard {
+  constructor({ refreshMs = REFRESH_MS, channel = null } = {}) {
+    this.refreshMs = refreshMs;
+    this.channel = channel;
+    this.state = null;
+    this.loading = null;
+    this.pending = null;
+    this.loadedAt = 0;
+  }
+
+  async ready() {
+    const stale = this.state && Date.now() - this.loadedAt > this.refreshMs;
+    if (this.state && !stale) return this.state;
+    if (!this.loading) {
+      this.loading = this.load().finally(() => {
+        this.loading = null;
+      });
+      if (stale) {
+        this.loading.catch(error => console.error('Error refreshing leaderboard:', error));
+      }
+    }
+    // Serve the previous boards while a refresh is in flight
+    return this.state && stale ? this.state : this.loading;
+  }
+
+  async load() {
+    this.pending = [];
+    try {
+      const state = { boards: new Map([[GLOBAL, new RankedSkipList()]]), usernames: new Map() };
+      const users = User.find({ isActive: { $ne: false } })
+        .select('username progress.totalPoints progress.byCategory progress.rollupAt')
+        .lean()
+        .cursor();
+
+      for await (const user of users) {
+        this.applyUser(state, user);
+      }
+
+      // Replay changes that landed while users were being read
+      this.pending.forEach(change => this.applyChange(state, change));
+      this.state = state;
+      this.loadedAt = Date.now();
+      return state;
+    } finally {
+      this.pending = null;
+    }
+  }
+
+  board(state, name) {
+    if (!state.boards.has(name)) state.boards.set(name, new RankedSkipList());
+    return state.boards.get(name);
+  }
+
+  applyUser(state, user) {
+    const id = String(user._id);
+    const progress = user.progress || {};
+    if (user.username) state.usernames.set(id, user.username);
+    this.board(state, GLOBAL).set(id, progress.totalPoints || 0);
+
+    // Category counts are partial until the user's rollups have been built
+    if (!progress.rollupAt) return;
+    for (const [itemType, counts] of Object.entries(progress.byCategory || {})) {
+      for (const [category, count] of Object.entries(counts || {})) {
+        if (count > 0) this.board(state, categoryBoard(itemType, category)).set(id, count);
+      }
+    }
+  }
+
+  applyChange(state, change) {
+    const id = String(change.userId);
+    if (change.type === 'upsertUser') {
+      this.applyUser(state, change.user);
+    } else if (change.type === 'removeUser') {
+      for (const board of state.boards.values()) board.remove(id);
+      state.usernames.delete(id);
+    } else if (change.type === 'score') {
+      this.board(state, GLOBAL).set(id, change.totalPoints);
+      if (change.itemType && change.category && change.categoryCount > 0) {
+        this.board(state, categoryBoard(change.itemType, change.category)).set(id, change.categoryCount);
+      }
+    } else if (change.type === 'categories') {
+      for (const [itemType, counts] of Object.entries(change.byCategory)) {
+        for (const [category, count] of Object.entries(counts)) {
+          if (count > 0) this.board(state, categoryBoard(itemType, category)).set(id, count);
+        }
+      }
+    }
+  }
+
+  receive(change) {
+    if (this.state) this.applyChange(this.state, change);
+    if (this.pending) this.pending.push(change);
+  }
+
+  apply(change) {
+    this.receive(change);
+    if (this.channel) clusterBus.publish(this.channel, change);
+  }
+
+  // A new or reactivated user, with whatever points and rollups they have
+  upsertUser(user) {
+    const { _id, username, progress = {} } = user;
+    const { totalPoints, byCategory, rollupAt } = progress;
+    this.apply({ type: 'upsertUser', userId: _id, user: { _id: String(_id), username, progress: { totalPoints, byCategory, rollupAt } } });
+  }
+
+  removeUser(userId) {
+    this.apply({ type: 'removeUser', userId });
+  }
+
+  // A user's new point total, and optionally their new count in one category
+  recordScore(userId, { totalPoints, itemType, category, categoryCount }) {
+    this.apply({ type: 'score', userId, totalPoints, itemType, category, categoryCount });
+  }
+
+  // A user's per-category completion counts after their rollups were rebuilt
+  recordCategories(userId, byCategory) {
+    this.apply({ type: 'categories', userId, byCategory });
+  }
+
+  entry(state, { member, score, rank }) {
+    return { rank: rank + 1, userId: member, username: state.usernames.get(member) || null, score };
+  }
+
+  async boards() {
+    const state = await this.ready();
+    return [...state.boards].map(([name, board]) => ({ name, size: board.size }));
+  }
+
+  // One page of a board, best first
+  async top(name = GLOBAL, { offset = 0, limit = 10 } = {}) {
+    const state = await this.ready();
+    const board = state.boards.get(name);
+    if (!board) return null;
+    return {
+      total: board.size,
+      entries: board.range(offset, limit).map(item => this.entry(state, item))
+    };
+  }
+
+  // A user's position on a board with up to `neighbours` entries either side
+  async around(name, userId, { neighbours = 2 } = {}) {
+    const state = await this.ready();
+    const board = state.boards.get(name);
+    const id = String(userId);
+    if (!board || !board.has(id)) return null;
+
+    const rank = board.rank(id);
+    const start = Math.max(0, rank - neighbours);
+    const entries = board.range(start, rank - start + neighbours + 1).map(item => this.entry(state, item));
+    return {
+      total: board.size,
+      rank: rank + 1,
+      score: board.score(id),
+      above: entries.filter(item => item.rank < rank + 1),
+      below: entries.filter(item => item.rank > rank + 1)
+    };
+  }
+}
+
+const leaderboard = new Leaderboard({ channel: 'leaderboard' });
+clusterBus.subscribe('leaderboard', change => leaderboard.receive(change));
+
+module.exports = {
+  Leaderboard,
+  leaderboard,
+  GLOBAL,
+  categoryBoard
+};
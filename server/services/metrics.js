@@ -0,0 +1,223 @@
+const { monitorEventLoopDelay, PerformanceObserver, constants } = require('perf_hooks');
+const mongoose = require('mongoose');
+const { Registry } = require('../utils/metrics');
+const { scheduler } = require('./scheduler');
+const { jobStore } = require('./jobStore');
+const { passwordHasher } = require('./passwordHasher');
+const responseCache = require('./responseCache');
+const authCache = require('./authCache');
+const compileCache = require('./compileCache');
+
+const registry = new Registry();
+
+// HTTP: one series per matched route, never per raw URL
+const httpRequests = registry.counter({
+  name: 'http_requests_total',
+  help: 'HTTP requests by route and status code.',
+  labelNames: ['method', 'route', 'status']
+});
+const httpDuration = registry.histogram({
+  name: 'http_request_duration_seconds',
+  help: 'HTTP request latency by route.',
+  labelNames: ['method', 'route']
+});
+
+const routeOf = req => (req.route ? `${req.baseUrl}${req.route.path}` : 'unmatched');
+
+const httpMetrics = (req, res, next) => {
+  const start = process.hrtime.bigint();
+  res.on('finish', () => {
+    const route = routeOf(req);
+    httpRequests.inc({ method: req.method, route, status: res.statusCode });
+    httpDuration.observe({ method: req.method, route }, Number(process.hrtime.bigint() - start) / 1e9);
+  });
+  next();
+};
+
+// Event loop lag, sampled every LOOP_RESOLUTION_MS and summarised per scrape.
+// Samples include the sampling interval itself, which is subtracted.
+const LOOP_RESOLUTION_MS = 10;
+const loopDelay = monitorEventLoopDelay({ resolution: LOOP_RESOLUTION_MS });
+loopDelay.enable();
+const lagSeconds = nanoseconds => Math.max(0, nanoseconds / 1e6 - LOOP_RESOLUTION_MS) / 1000;
+registry.gauge({
+  name: 'nodejs_eventloop_lag_seconds',
+  help: 'Event loop delay since the previous scrape.',
+  labelNames: ['quantile'],
+  collect: (gauge) => {
+    [0.5, 0.9, 0.99].forEach(quantile => gauge.set({ quantile }, lagSeconds(loopDelay.percentile(quantile * 100))));
+    gauge.set({ quantile: 1 }, lagSeconds(loopDelay.max));
+    loopDelay.reset();
+  }
+});
+
+const GC_KINDS = {
+  [constants.NODE_PERFORMANCE_GC_MAJOR]: 'major',
+  [constants.NODE_PERFORMANCE_GC_MINOR]: 'minor',
+  [constants.NODE_PERFORMANCE_GC_INCREMENTAL]: 'incremental',
+  [constants.NODE_PERFORMANCE_GC_WEAKCB]: 'weakcb'
+};
+const gcDuration = registry.histogram({
+  name: 'nodejs_gc_duration_seconds',
+  help: 'Garbage collection pauses by kind.',
+  labelNames: ['kind'],
+  buckets: [0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1]
+});
+new PerformanceObserver((list) => {
+  for (const entry of list.getEntries()) {
+    const kind = entry.detail ? entry.detail.kind : entry.kind;
+    gcDuration.observe({ kind: GC_KINDS[kind] || 'other' }, entry.duration / 1000);
+  }
+}).observe({ entryTypes: ['gc'] });
+
+registry.gauge({
+  name: 'nodejs_memory_bytes',
+  help: 'Process memory by type (rss, heapTotal, heapUsed, external, arrayBuffers).',
+  labelNames: ['type'],
+  collect: (gauge) => {
+    for (const [type, bytes] of Object.entries(process.memoryUsage())) gauge.set({ type }, bytes);
+  }
+});
+
+// MongoDB: every command the driver sends, labelled with the model it serves
+const mongoCommands = registry.counter({
+  name: 'mongodb_commands_total',
+  help: 'MongoDB commands by model, operation and outcome.',
+  labelNames: ['model', 'operation', 'outcome']
+});
+const mongoDuration = registry.histogram({
+  name: 'mongodb_command_duration_seconds',
+  help: 'MongoDB command latency by model and operation.',
+  labelNames: ['model', 'operation'],
+  buckets: [0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5]
+});
+
+const modelNames = new Map();
+const modelFor = (collection) => {
+  if (!modelNames.has(collection)) {
+    const model = Object.values(mongoose.models).find(Model => Model.collection.collectionName === collection);
+    if (!model) return collection;
+    modelNames.set(collection, model.modelName);
+  }
+  return modelNames.get(collection);
+};
+
+// Needs a client connected with monitorCommands: true
+const instrumentMongo = (client) => {
+  const started = new Map();
+  const finish = (event, outcome) => {
+    const command = started.get(event.requestId);
+    if (!command) return;
+    started.delete(event.requestId);
+    mongoCommands.inc({ ...command, outcome });
+    mongoDuration.observe(command, event.duration / 1000);
+  };
+
+  client.on('commandStarted', (event) => {
+    const target = event.command[event.commandName];
+    const collection = typeof target === 'string' ? target : event.command.collection;
+    // Handshakes, sessions and other admin commands name no collection
+    if (typeof collection !== 'string') return;
+    started.set(event.requestId, { model: modelFor(collection), operation: event.commandName });
+  });
+  client.on('commandSucceeded', event => finish(event, 'success'));
+  client.on('commandFailed', event => finish(event, 'failure'));
+};
+
+// Compile/run queue
+const compileDuration = registry.histogram({
+  name: 'compile_job_duration_seconds',
+  help: 'gcc and program runs on the compile scheduler.',
+  labelNames: ['outcome'],
+  buckets: [0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30]
+});
+const compileWait = registry.histogram({
+  name: 'compile_queue_wait_seconds',
+  help: 'Time compile jobs spent queued before a slot was free.',
+  buckets: [0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30]
+});
+scheduler.observe(({ queueWaitMs, durationMs, failed }) => {
+  compileDuration.observe({ outcome: failed ? 'failure' : 'success' }, durationMs / 1000);
+  compileWait.observe({}, queueWaitMs / 1000);
+});
+registry.gauge({
+  name: 'compile_queue_jobs',
+  help: 'Compile jobs running and waiting.',
+  labelNames: ['state'],
+  collect: (gauge) => {
+    const stats = scheduler.getStats();
+    gauge.set({ state: 'running' }, stats.running);
+    gauge.set({ state: 'queued' }, stats.queued);
+  }
+});
+registry.counter({
+  name: 'compile_queue_rejected_total',
+  help: 'Compile jobs refused because the queue was full.',
+  collect: counter => counter.set({}, scheduler.getStats().rejected)
+});
+registry.gauge({
+  name: 'async_jobs',
+  help: 'Asynchronous compile and submission jobs retained, by status.',
+  labelNames: ['status'],
+  collect: (gauge) => {
+    const stats = jobStore.getStats();
+    ['queued', 'running', 'completed', 'failed'].forEach(status => gauge.set({ status }, stats[status]));
+  }
+});
+registry.gauge({
+  name: 'password_hash_jobs',
+  help: 'Password hashing tasks running and waiting on the worker pool.',
+  labelNames: ['state'],
+  collect: (gauge) => {
+    const stats = passwordHasher.getStats();
+    gauge.set({ state: 'running' }, stats.running);
+    gauge.set({ state: 'queued' }, stats.queued);
+  }
+});
+
+// Caches
+const CACHES = {
+  response: () => responseCache.getStats(),
+  auth: () => authCache.getStats(),
+  compile: () => {
+    const stats = compileCache.getStats();
+    return { ...stats, hits: stats.hits + stats.coalesced };
+  }
+};
+registry.counter({
+  name: 'cache_lookups_total',
+  help: 'Cache lookups by cache and result.',
+  labelNames: ['cache', 'result'],
+  collect: (counter) => {
+    for (const [cache, getStats] of Object.entries(CACHES)) {
+      const { hits, misses } = getStats();
+      counter.set({ cache, result: 'hit' }, hits);
+      counter.set({ cache, result: 'miss' }, misses);
+    }
+  }
+});
+registry.gauge({
+  name: 'cache_hit_ratio',
+  help: 'Share of lookups answered from each cache since startup.',
+  labelNames: ['cache'],
+  collect: (gauge) => {
+    for (const [cache, getStats] of Object.entries(CACHES)) {
+      const { hits, misses } = getStats();
+      gauge.set({ cache }, hits + misses === 0 ? 0 : hits / (hits + misses));
+    }
+  }
+});
+registry.gauge({
+  name: 'cache_entries',
+  help: 'Entries held by each cache.',
+  labelNames: ['cache'],
+  collect: (gauge) => {
+    for (const [cache, getStats] of Object.entries(CACHES)) gauge.set({ cache }, getStats().entries);
+  }
+});
+
+module.exports = {
+  registry,
+  httpMetrics,
+  instrumentMongo
+};
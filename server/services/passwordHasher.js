@@ -0,0 +1,140 @@
+const os = require('os');
+const path = require('path');
+const { Worker } = require('worker_threads');
+const bcrypt = require('bcryptjs');
+const { QueueFullError } = require('./scheduler');
+
+const COST = parseInt(process.env.BCRYPT_COST, 10) || 12;
+const THREADS = parseInt(process.env.PASSWORD_HASH_THREADS, 10) || Math.max(1, Math.min(4, os.cpus().length - 1));
+const MAX_QUEUE = parseInt(process.env.PASSWORD_HASH_MAX_QUEUE, 10) || 200;
+const WORKER_PATH = path.join(__dirname, '..', 'workers', 'passwordWorker.js');
+
+// bcrypt on a bounded pool of worker threads. Each hash or compare takes
+// hundreds of milliseconds of CPU, so running them here keeps the event loop
+// free for every other request. Threads start on demand; waiting tasks queue
+// up to maxQueue, beyond which callers get a 503 QueueFullError.
+class PasswordHasher {
+  constructor({ threads = THREADS, maxQueue = MAX_QUEUE, cost = COST } = {}) {
+    this.threads = threads;
+    this.maxQueue = maxQueue;
+    this.cost = cost;
+    this.workers = [];
+    this.queue = [];
+    this.averageDurationMs = 250;
+    this.stats = {
+      completed: 0,
+      failed: 0,
+      rejected: 0
+    };
+  }
+
+  hash(password) {
+    return this.run({ op: 'hash', password, cost: this.cost });
+  }
+
+  compare(password, hash) {
+    return this.run({ op: 'compare', password, hash });
+  }
+
+  // True when hash was made with a different cost factor than the current one
+  needsRehash(hash) {
+    try {
+      return bcrypt.getRounds(hash) !== this.cost;
+    } catch (error) {
+      return false;
+    }
+  }
+
+  run(message) {
+    if (this.queue.length >= this.maxQueue) {
+      this.stats.rejected += 1;
+      const waves = Math.ceil((this.queue.length + 1) / this.threads);
+      return Promise.reject(new QueueFullError('Server is busy. Please try again shortly.', {
+        status: 503,
+        retryAfter: Math.min(60, Math.max(1, Math.ceil((waves * this.averageDurationMs) / 1000)))
+      }));
+    }
+
+    return new Promise((resolve, reject) => {
+      this.queue.push({ message, resolve, reject });
+      this.drain();
+    });
+  }
+
+  spawn() {
+    const worker = new Worker(WORKER_PATH);
+    worker.task = null;
+    worker.unref();
+
+    worker.on('message', ({ result, error }) => {
+      const { task } = worker;
+      worker.task = null;
+      if (task) {
+        const durationMs = Date.now() - task.startedAt;
+        this.averageDurationMs = this.averageDurationMs * 0.8 + durationMs * 0.2;
+        if (error) {
+          this.stats.failed += 1;
+          task.reject(new Error(error));
+        } else {
+          this.stats.completed += 1;
+          task.resolve(result);
+        }
+      }
+      this.drain();
+    });
+
+    // A thread that dies takes only its own task with it; the next drain replaces it
+    worker.on('error', (error) => {
+      console.error('Password worker error:', error);
+    });
+    worker.on('exit', () => {
+      this.workers = this.workers.filter(other => other !== worker);
+      if (worker.task) {
+        this.stats.failed += 1;
+        worker.task.reject(new Error('Password worker exited unexpectedly.'));
+        worker.task = null;
+      }
+      this.drain();
+    });
+
+    this.workers.push(worker);
+    return worker;
+  }
+
+  drain() {
+    while (this.queue.length > 0) {
+      let worker = this.workers.find(candidate => !candidate.task);
+      if (!worker && this.workers.length < this.threads) worker = this.spawn();
+      if (!worker) return;
+
+      const task = this.queue.shift();
+      task.startedAt = Date.now();
+      worker.task = task;
+      worker.postMessage(task.message);
+    }
+  }
+
+  async close() {
+    const workers = this.workers;
+    this.workers = [];
+    await Promise.all(workers.map(worker => worker.terminate()));
+  }
+
+  getStats() {
+    return {
+      ...this.stats,
+      threads: this.threads,
+      running: this.workers.filter(worker => worker.task).length,
+      queued: this.queue.length,
+      cost: this.cost,
+      averageDurationMs: Math.round(this.averageDurationMs)
+    };
+  }
+}
+
+const passwordHasher = new PasswordHasher();
+
+module.exports = {
+  PasswordHasher,
+  passwordHasher
+};
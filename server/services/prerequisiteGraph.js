@@ -0,0 +1,260 @@
+const mongoose = require('mongoose');
+const Algorithm = require('../models/Algorithm');
+const DataStructure = require('../models/DataStructure');
+const clusterBus = require('./clusterBus');
+
+const REFRESH_MS = parseInt(process.env.PREREQUISITE_GRAPH_REFRESH_MS, 10) || 5 * 60 * 1000;
+const GRAPH_FIELDS = 'name category difficulty prerequisites';
+
+const toNode = (itemType, doc) => ({
+  id: String(doc._id),
+  itemType,
+  name: doc.name,
+  category: doc.category,
+  difficulty: doc.difficulty,
+  prerequisites: [...new Set((doc.prerequisites || []).map(ds => String(ds._id || ds)))]
+});
+
+// Directed graph of catalog items, each pointing at the data structures it
+// builds on. Learning paths are memoized per item; a change drops only the
+// paths of the items that depend on the changed one.
+class PrerequisiteGraph {
+  constructor() {
+    this.nodes = new Map();
+    this.dependents = new Map();
+    this.paths = new Map();
+  }
+
+  get size() {
+    return this.nodes.size;
+  }
+
+  has(id) {
+    return this.nodes.has(String(id));
+  }
+
+  get(id) {
+    return this.nodes.get(String(id));
+  }
+
+  set(node) {
+    this.delete(node.id);
+    this.nodes.set(node.id, node);
+    for (const prerequisite of node.prerequisites) {
+      if (!this.dependents.has(prerequisite)) this.dependents.set(prerequisite, new Set());
+      this.dependents.get(prerequisite).add(node.id);
+    }
+  }
+
+  // Forget memoized paths that pass through id
+  invalidate(id) {
+    const queue = [String(id)];
+    const seen = new Set(queue);
+    while (queue.length > 0) {
+      const current = queue.shift();
+      this.paths.delete(current);
+      for (const dependent of this.dependents.get(current) || []) {
+        if (!seen.has(dependent)) {
+          seen.add(dependent);
+          queue.push(dependent);
+        }
+      }
+    }
+  }
+
+  delete(id) {
+    const node = this.nodes.get(String(id));
+    this.invalidate(id);
+    if (!node) return false;
+
+    for (const prerequisite of node.prerequisites) {
+      const dependents = this.dependents.get(prerequisite);
+      if (!dependents) continue;
+      dependents.delete(node.id);
+      if (dependents.size === 0) this.dependents.delete(prerequisite);
+    }
+    return this.nodes.delete(node.id);
+  }
+
+  // The cycle id -> ... -> id that giving id these prerequisites would close,
+  // as a list of ids, or null when the change is safe
+  findCycle(id, prerequisites) {
+    const target = String(id);
+    const visited = new Set();
+    const walk = (current, trail) => {
+      if (current === target) return trail;
+      if (visited.has(current)) return null;
+      visited.add(current);
+      const node = this.nodes.get(current);
+      for (const next of node ? node.prerequisites : []) {
+        const cycle = walk(next, [...trail, next]);
+        if (cycle) return cycle;
+      }
+      return null;
+    };
+
+    for (const prerequisite of prerequisites.map(String)) {
+      const cycle = walk(prerequisite, [target, prerequisite]);
+      if (cycle) return cycle;
+    }
+    return null;
+  }
+
+  // Every item id needs to be studied for, prerequisites before the items that
+  // use them, ending with id itself. Missing items are skipped and edges that
+  // would close a cycle (only possible in data written before validation) are ignored.
+  path(id) {
+    const start = String(id);
+    if (!this.nodes.has(start)) return null;
+    if (this.paths.has(start)) return this.paths.get(start);
+
+    const order = [];
+    const state = new Map();
+    const visit = (current) => {
+      if (state.has(current) || !this.nodes.has(current)) return;
+      state.set(current, 'visiting');
+      this.nodes.get(current).prerequisites.forEach(visit);
+      state.set(current, 'done');
+      order.push(current);
+    };
+    visit(start);
+
+    this.paths.set(start, order);
+    return order;
+  }
+
+  // Items not yet completed whose prerequisites all are. Items with the most
+  // prerequisites come first, since those are the ones completions unlocked.
+  unlocked(completed, { itemType } = {}) {
+    const done = new Set([...completed].map(String));
+    const ready = [];
+    for (const node of this.nodes.values()) {
+      if (done.has(node.id) || (itemType && node.itemType !== itemType)) continue;
+      const required = node.prerequisites.filter(prerequisite => this.nodes.has(prerequisite));
+      if (required.every(prerequisite => done.has(prerequisite))) {
+        ready.push({ node, satisfied: required.length });
+      }
+    }
+    return ready
+      .sort((a, b) => b.satisfied - a.satisfied || a.node.name.localeCompare(b.node.name))
+      .map(({ node }) => node);
+  }
+}
+
+// The prerequisite graph of the whole catalog, loaded on first use, kept current
+// by upsert/remove on writes (shared with the other cluster workers) and
+// reloaded every REFRESH_MS for other processes' writes
+class CatalogGraph {
+  constructor({ refreshMs = REFRESH_MS, channel = null } = {}) {
+    this.refreshMs = refreshMs;
+    this.channel = channel;
+    this.graph = null;
+    this.loading = null;
+    this.pending = null;
+    this.loadedAt = 0;
+  }
+
+  async ready() {
+    const stale = this.graph && Date.now() - this.loadedAt > this.refreshMs;
+    if (this.graph && !stale) return this.graph;
+    if (!this.loading) {
+      this.loading = this.load().finally(() => {
+        this.loading = null;
+      });
+      if (stale) {
+        this.loading.catch(error => console.error('Error refreshing prerequisite graph:', error));
+      }
+    }
+    // Serve the previous graph while a refresh is in flight
+    return this.graph && stale ? this.graph : this.loading;
+  }
+
+  async load() {
+    this.pending = [];
+    try {
+      const [algorithms, dataStructures] = await Promise.all([
+        Algorithm.find({}).select(GRAPH_FIELDS).lean(),
+        DataStructure.find({}).select(GRAPH_FIELDS).lean()
+      ]);
+      const graph = new PrerequisiteGraph();
+      dataStructures.forEach(doc => graph.set(toNode('datastructure', doc)));
+      algorithms.forEach(doc => graph.set(toNode('algorithm', doc)));
+
+      // Replay writes that landed while the collections were being read
+      this.pending.forEach(change => this.applyChange(graph, change));
+      this.graph = graph;
+      this.loadedAt = Date.now();
+      return graph;
+    } finally {
+      this.pending = null;
+    }
+  }
+
+  applyChange(graph, { node, removed }) {
+    if (node) graph.set(node);
+    else graph.delete(removed);
+  }
+
+  receive(change) {
+    if (this.graph) this.applyChange(this.graph, change);
+    if (this.pending) this.pending.push(change);
+  }
+
+  apply(change) {
+    this.receive(change);
+    if (this.channel) clusterBus.publish(this.channel, change);
+  }
+
+  upsert(itemType, doc) {
+    this.apply({ node: toNode(itemType, doc) });
+  }
+
+  remove(id) {
+    this.apply({ removed: String(id) });
+  }
+
+  // Prerequisites that are not the ids of existing data structures
+  async unknownPrerequisites(prerequisites) {
+    const ids = [...new Set([].concat(prerequisites || []).map(String))];
+    const valid = ids.filter(id => mongoose.isValidObjectId(id));
+    const found = valid.length > 0
+      ? await DataStructure.find({ _id: { $in: valid } }).select('_id').lean()
+      : [];
+    const existing = new Set(found.map(doc => String(doc._id)));
+    return ids.filter(id => !existing.has(id));
+  }
+
+  // Names along the cycle these prerequisites would create, or null
+  async findCycle(id, prerequisites) {
+    const graph = await this.ready();
+    const cycle = graph.findCycle(id, [].concat(prerequisites || []));
+    return cycle && cycle.map(item => (graph.has(item) ? graph.get(item).name : item));
+  }
+
+  async get(id) {
+    const graph = await this.ready();
+    return graph.get(id) || null;
+  }
+
+  // Nodes to study, in order, to reach id; null when id is unknown
+  async path(id) {
+    const graph = await this.ready();
+    const order = graph.path(id);
+    return order && order.map(item => graph.get(item));
+  }
+
+  async unlocked(completed, options) {
+    const graph = await this.ready();
+    return graph.unlocked(completed, options);
+  }
+}
+
+const prerequisiteGraph = new CatalogGraph({ channel: 'prerequisiteGraph' });
+clusterBus.subscribe('prerequisiteGraph', change => prerequisiteGraph.receive(change));
+
+module.exports = {
+  PrerequisiteGraph,
+  CatalogGraph,
+  prerequisiteGraph,
+  toNode
+};
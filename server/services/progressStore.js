@@ -0,0 +1,272 @@
+const mongoose = require('mongoose');
+const Progress = require('../models/Progress');
+const User = require('../models/User');
+const Algorithm = require('../models/Algorithm');
+const DataStructure = require('../models/DataStructure');
+const { leaderboard } = require('./leaderboard');
+
+const MIGRATION_BATCH_SIZE = 100;
+const MAX_RECENT = 50;
+
+// Points awarded the first time an item is completed
+const COMPLETION_POINTS = {
+  algorithm: 15,
+  datastructure: 10
+};
+
+const isDuplicateKey = error => error && error.code === 11000;
+
+// Add points to a user's total, bump their completion rollups and raise their level to match
+const awardPoints = async (userId, points, { itemType, category } = {}) => {
+  const increments = { 'progress.totalPoints': points };
+  const categoryPath = itemType && category ? `progress.byCategory.${itemType}.${category}` : null;
+  if (itemType) increments[`progress.completed.${itemType}`] = 1;
+  if (categoryPath) increments[categoryPath] = 1;
+
+  const user = await User.findByIdAndUpdate(
+    userId,
+    { $inc: increments },
+    {
+      new: true,
+      projection: { 'progress.totalPoints': 1, 'progress.level': 1, 'progress.rollupAt': 1, ...(categoryPath && { [categoryPath]: 1 }) }
+    }
+  ).lean();
+  if (!user) return null;
+
+  // Category counts are only meaningful once the user's rollups have been built
+  const categoryCount = categoryPath && user.progress.rollupAt
+    ? user.progress.byCategory[itemType][category]
+    : 0;
+  leaderboard.recordScore(userId, { totalPoints: user.progress.totalPoints, itemType, category, categoryCount });
+
+  // Points only grow, so $max keeps concurrent awards from lowering the level
+  const level = User.levelFor(user.progress.totalPoints);
+  if (level > user.progress.level) {
+    await User.updateOne({ _id: userId }, { $max: { 'progress.level': level } });
+  }
+  return { totalPoints: user.progress.totalPoints, level: Math.max(level, user.progress.level) };
+};
+
+// Record that a user completed an item, keeping their best score. Points are
+// awarded only when this call created the row, so concurrent or repeated
+// completions of the same item never pay out twice.
+const recordCompletion = async ({ userId, itemType, itemId, category, score, points = COMPLETION_POINTS[itemType] }) => {
+  const filter = { user: userId, itemType, item: itemId };
+  const update = { $max: { score }, $setOnInsert: { completedAt: new Date() } };
+
+  let result;
+  try {
+    result = await Progress.updateOne(filter, update, { upsert: true });
+  } catch (error) {
+    // Two upserts raced on the unique index; the loser becomes a plain update
+    if (!isDuplicateKey(error)) throw error;
+    result = await Progress.updateOne(filter, update);
+  }
+
+  const firstCompletion = result.upsertedCount === 1;
+  const totals = firstCompletion ? await awardPoints(userId, points, { itemType, category }) : null;
+  return { firstCompletion, ...totals };
+};
+
+const hasCompleted = async (userId, itemType, itemId) => Boolean(
+  await Progress.exists({ user: userId, itemType, item: itemId })
+);
+
+// Ids of every item a user has completed, read from the { user, itemType, item } index
+const completedItems = userId => Progress.distinct('item', { user: userId });
+
+// Attach name, category and difficulty of each row's item. Each row looks up
+// only the collection its itemType points at.
+const itemLookups = (fields) => {
+  const project = Object.fromEntries(fields.map(field => [field, 1]));
+  return [
+    ['algorithm', Algorithm.collection.name],
+    ['datastructure', DataStructure.collection.name]
+  ].map(([itemType, from]) => ({
+    $lookup: {
+      from,
+      let: { item: '$item', itemType: '$itemType' },
+      pipeline: [
+        { $match: { $expr: { $and: [{ $eq: ['$$itemType', itemType] }, { $eq: ['$_id', '$$item'] }] } } },
+        { $project: project }
+      ],
+      as: itemType
+    }
+  })).concat({
+    $addFields: {
+      details: { $arrayElemAt: [{ $concatArrays: ['$algorithm', '$datastructure'] }, 0] }
+    }
+  });
+};
+
+// The newest `limit` completions, via the { user, completedAt } index, with item details
+const recentActivity = (userId, limit = 10) => Progress.aggregate([
+  { $match: { user: new mongoose.Types.ObjectId(String(userId)) } },
+  { $sort: { completedAt: -1 } },
+  { $limit: Math.min(Math.max(limit, 1), MAX_RECENT) },
+  ...itemLookups(['name', 'category', 'difficulty']),
+  {
+    $project: {
+      _id: 0,
+      type: '$itemType',
+      name: '$details.name',
+      category: '$details.category',
+      difficulty: '$details.difficulty',
+      completedAt: 1,
+      score: 1
+    }
+  }
+]);
+
+// Count a user's completions per type and category straight from their Progress rows
+const countRollups = async (userId) => {
+  const groups = await Progress.aggregate([
+    { $match: { user: new mongoose.Types.ObjectId(String(userId)) } },
+    ...itemLookups(['category']),
+    { $group: { _id: { itemType: '$itemType', category: '$details.category' }, count: { $sum: 1 } } }
+  ]);
+
+  const rollups = {
+    completed: { algorithm: 0, datastructure: 0 },
+    byCategory: { algorithm: {}, datastructure: {} }
+  };
+  for (const { _id: { itemType, category }, count } of groups) {
+    rollups.completed[itemType] += count;
+    if (category) rollups.byCategory[itemType][category] = count;
+  }
+  return rollups;
+};
+
+// Build the stored rollups for a user whose history predates them. Maintenance
+// only (npm run migrate:progress): the counts come from a snapshot and are
+// written with $set, so a completion recorded meanwhile could be lost or
+// counted twice. The write is skipped when the rollups already exist or the
+// user's points moved since the snapshot, which leaves only a completion caught
+// between its Progress upsert and its $inc. Resolves to null when nothing was written.
+const rebuildRollups = async (userId) => {
+  const user = await User.findById(userId).select('progress.totalPoints progress.rollupAt').lean();
+  if (!user || user.progress.rollupAt) return null;
+
+  const rollups = await countRollups(userId);
+  const result = await User.updateOne({
+    _id: userId,
+    'progress.rollupAt': null,
+    'progress.totalPoints': user.progress.totalPoints
+  }, {
+    $set: {
+      'progress.completed': rollups.completed,
+      'progress.byCategory': rollups.byCategory,
+      'progress.rollupAt': new Date()
+    }
+  });
+  if (result.modifiedCount === 0) return null;
+
+  leaderboard.recordCategories(userId, rollups.byCategory);
+  return rollups;
+};
+
+// Build rollups for every user still without them; users who were busy are left for the next run
+const rebuildMissingRollups = async ({ batchSize = MIGRATION_BATCH_SIZE } = {}) => {
+  const users = User.collection.find({ 'progress.rollupAt': null }, { projection: { _id: 1 } }).batchSize(batchSize);
+  let rebuilt = 0;
+  let skipped = 0;
+
+  for await (const { _id } of users) {
+    if (await rebuildRollups(_id)) {
+      rebuilt += 1;
+    } else {
+      skipped += 1;
+    }
+  }
+  return { rebuilt, skipped };
+};
+
+// Progress overview for a user: totals, per-category counts and recent activity.
+// Work is bounded by the number of categories and `recent`, not by history size,
+// except for users whose rollups have not been built yet; they are counted on
+// the fly without writing anything.
+const getSummary = async (userId, { recent = 10 } = {}) => {
+  const user = await User.findById(userId).select('progress').lean();
+  if (!user) return null;
+
+  const [rollups, activity] = await Promise.all([
+    user.progress.rollupAt ? user.progress : countRollups(userId),
+    recentActivity(userId, recent)
+  ]);
+  const completed = rollups.completed || {};
+  const byCategory = rollups.byCategory || {};
+
+  return {
+    totalPoints: user.progress.totalPoints,
+    level: user.progress.level,
+    completedDataStructures: completed.datastructure || 0,
+    completedAlgorithms: completed.algorithm || 0,
+    dataStructuresByCategory: byCategory.datastructure || {},
+    algorithmsByCategory: byCategory.algorithm || {},
+    recentActivity: activity
+  };
+};
+
+// Copy completions out of the legacy embedded User.progress arrays into the
+// Progress collection, then drop the arrays. Safe to run repeatedly.
+const migrateEmbeddedProgress = async ({ batchSize = MIGRATION_BATCH_SIZE } = {}) => {
+  const legacy = {
+    'progress.completedAlgorithms': { itemType: 'algorithm', idField: 'algorithmId' },
+    'progress.completedDataStructures': { itemType: 'datastructure', idField: 'dataStructureId' }
+  };
+  const users = User.collection.find(
+    { $or: Object.keys(legacy).map(path => ({ [path]: { $exists: true } })) },
+    { projection: { 'progress.completedAlgorithms': 1, 'progress.completedDataStructures': 1 } }
+  ).batchSize(batchSize);
+
+  let migratedUsers = 0;
+  let migratedItems = 0;
+
+  for await (const user of users) {
+    const operations = [];
+
+    for (const [path, { itemType, idField }] of Object.entries(legacy)) {
+      const entries = (user.progress && user.progress[path.split('.')[1]]) || [];
+      for (const entry of entries) {
+        if (!entry[idField]) continue;
+        operations.push({
+          updateOne: {
+            filter: { user: user._id, itemType, item: new mongoose.Types.ObjectId(String(entry[idField])) },
+            update: {
+              $max: { score: entry.score || 0 },
+              $min: { completedAt: entry.completedAt || new Date() }
+            },
+            upsert: true
+          }
+        });
+      }
+    }
+
+    if (operations.length > 0) {
+      await Progress.bulkWrite(operations, { ordered: false });
+    }
+    await User.collection.updateOne(
+      { _id: user._id },
+      { $unset: { 'progress.completedAlgorithms': '', 'progress.completedDataStructures': '', 'progress.rollupAt': '' } }
+    );
+
+    migratedUsers += 1;
+    migratedItems += operations.length;
+  }
+
+  return { migratedUsers, migratedItems };
+};
+
+module.exports = {
+  COMPLETION_POINTS,
+  recordCompletion,
+  hasCompleted,
+  completedItems,
+  awardPoints,
+  recentActivity,
+  countRollups,
+  rebuildRollups,
+  rebuildMissingRollups,
+  getSummary,
+  migrateEmbeddedProgress
+};
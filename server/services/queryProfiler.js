@@ -0,0 +1,229 @@
+const { AsyncLocalStorage } = require('async_hooks');
+const mongoose = require('mongoose');
+const LRUCache = require('../utils/lruCache');
+
+const ENABLED = process.env.QUERY_PROFILER === 'true';
+const SLOW_MS = parseInt(process.env.QUERY_PROFILER_SLOW_MS, 10) || 100;
+const MAX_SHAPES = parseInt(process.env.QUERY_PROFILER_MAX_SHAPES, 10) || 500;
+const REPEAT_THRESHOLD = parseInt(process.env.QUERY_PROFILER_REPEAT_THRESHOLD, 10) || 5;
+const EXPLAIN_EVERY_MS = 10 * 60 * 1000;
+
+const QUERY_OPS = [
+  'find', 'findOne', 'countDocuments', 'distinct',
+  'findOneAndUpdate', 'findOneAndDelete', 'updateOne', 'updateMany', 'deleteOne', 'deleteMany'
+];
+
+// Opt-in (QUERY_PROFILER=true) profiling of every Mongoose query and aggregate.
+// Queries are grouped by shape: model, operation and filter with the values
+// stripped, so "find User { _id: 1 }" covers every user lookup by id. Shapes
+// slower than SLOW_MS get an explain('executionStats') run in the background,
+// and a shape repeated REPEAT_THRESHOLD times within one request is reported
+// as a likely N+1 (typically populate or findById inside a loop).
+const requests = new AsyncLocalStorage();
+const shapes = new LRUCache({ maxEntries: MAX_SHAPES });
+const repeats = new LRUCache({ maxEntries: MAX_SHAPES });
+
+// The filter's structure with every value replaced by 1
+const shapeOf = (value) => {
+  if (Array.isArray(value)) return value.length === 0 ? [] : [shapeOf(value[0])];
+  if (value && typeof value === 'object' && value.constructor === Object) {
+    return Object.fromEntries(Object.keys(value).sort().map(key => [key, shapeOf(value[key])]));
+  }
+  return 1;
+};
+
+// Pipelines keep stage names and $match shapes only
+const pipelineShape = pipeline => pipeline.map((stage) => {
+  const [name] = Object.keys(stage);
+  return name === '$match' ? { $match: shapeOf(stage.$match) } : name;
+});
+
+const routeOf = req => (req.route ? `${req.method} ${req.baseUrl}${req.route.path}` : `${req.method} ${req.baseUrl}${req.path}`);
+
+// Stages of the winning plan, plus how much work execution took
+const summarizePlan = (explain) => {
+  const find = (node, key) => {
+    if (!node || typeof node !== 'object') return null;
+    if (node[key]) return node[key];
+    for (const child of Object.values(node)) {
+      const found = find(child, key);
+      if (found) return found;
+    }
+    return null;
+  };
+
+  const planner = find(explain, 'queryPlanner') || {};
+  const winning = planner.winningPlan || {};
+  const stages = [];
+  const indexes = new Set();
+  const walk = (plan) => {
+    if (!plan || typeof plan !== 'object') return;
+    if (plan.stage) stages.push(plan.stage);
+    if (plan.indexName) indexes.add(plan.indexName);
+    walk(plan.queryPlan);
+    walk(plan.inputStage);
+    (plan.inputStages || []).forEach(walk);
+  };
+  walk(winning);
+
+  const stats = find(explain, 'executionStats') || {};
+  return {
+    stages,
+    collectionScan: stages.includes('COLLSCAN'),
+    indexes: [...indexes],
+    docsExamined: stats.totalDocsExamined,
+    keysExamined: stats.totalKeysExamined,
+    returned: stats.nReturned,
+    executionMs: stats.executionTimeMillis,
+    explainedAt: new Date()
+  };
+};
+
+const explainLater = (entry, explain) => {
+  if (entry.explaining || (entry.plan && Date.now() - entry.plan.explainedAt < EXPLAIN_EVERY_MS)) return;
+  entry.explaining = true;
+  explain()
+    .then((result) => {
+      entry.plan = summarizePlan(result);
+    })
+    .catch((error) => {
+      entry.plan = { error: error.message, explainedAt: new Date() };
+    })
+    .finally(() => {
+      entry.explaining = false;
+    });
+};
+
+const record = ({ model, op, shape, durationMs, context, explain }) => {
+  const key = `${model}.${op} ${JSON.stringify(shape)}`;
+  let entry = shapes.get(key);
+  if (!entry) {
+    entry = { model, op, shape, count: 0, totalMs: 0, maxMs: 0, slow: 0, routes: new Set(), plan: null, explaining: false };
+    shapes.set(key, entry);
+  }
+  entry.count += 1;
+  entry.totalMs += durationMs;
+  entry.maxMs = Math.max(entry.maxMs, durationMs);
+  entry.lastSeenAt = new Date();
+
+  const route = context ? routeOf(context.req) : null;
+  if (route && entry.routes.size < 10) entry.routes.add(route);
+
+  if (durationMs >= SLOW_MS) {
+    entry.slow += 1;
+    explainLater(entry, explain);
+  }
+
+  if (!context) return;
+  const seen = (context.counts.get(key) || 0) + 1;
+  context.counts.set(key, seen);
+  if (seen >= REPEAT_THRESHOLD) {
+    const repeatKey = `${route} ${key}`;
+    const repeat = repeats.get(repeatKey) || { route, model, op, shape, requests: 0, maxPerRequest: 0 };
+    if (seen === REPEAT_THRESHOLD) repeat.requests += 1;
+    repeat.maxPerRequest = Math.max(repeat.maxPerRequest, seen);
+    repeat.lastSeenAt = new Date();
+    repeats.set(repeatKey, repeat);
+  }
+};
+
+const start = (target) => {
+  target.profile = { startedAt: process.hrtime.bigint(), context: requests.getStore() };
+};
+
+const elapsedMs = target => Number(process.hrtime.bigint() - target.profile.startedAt) / 1e6;
+
+// Global plugin: times queries and aggregates. Explain runs are not profiled.
+const plugin = (schema) => {
+  schema.pre(QUERY_OPS, function() {
+    if (!this.getOptions().explain) start(this);
+  });
+  schema.post(QUERY_OPS, function() {
+    if (!this.profile) return;
+    const Model = this.model;
+    const filter = this.getFilter();
+    const options = this.getOptions();
+    record({
+      model: Model.modelName,
+      op: this.op,
+      shape: shapeOf(filter),
+      durationMs: elapsedMs(this),
+      context: this.profile.context,
+      // Writes and counts are explained as the find their filter implies
+      explain: () => Model.find(filter, null, { sort: options.sort, limit: options.limit, skip: options.skip })
+        .explain('executionStats')
+    });
+  });
+
+  schema.pre('aggregate', function() {
+    if (!this.options.explain) start(this);
+  });
+  schema.post('aggregate', function() {
+    if (!this.profile) return;
+    const Model = this.model();
+    const pipeline = this.pipeline();
+    record({
+      model: Model.modelName,
+      op: 'aggregate',
+      shape: pipelineShape(pipeline),
+      durationMs: elapsedMs(this),
+      context: this.profile.context,
+      explain: () => Model.aggregate(pipeline).explain('executionStats')
+    });
+  });
+};
+
+// Must run before any model is compiled; returns whether profiling is on
+const install = () => {
+  if (ENABLED) mongoose.plugin(plugin);
+  return ENABLED;
+};
+
+// Express middleware giving each request its own repeat counts; mount it
+// after the body parsers so the context reaches the route handlers
+const profileRequests = (req, res, next) => {
+  if (!ENABLED) return next();
+  requests.run({ req, counts: new Map() }, next);
+};
+
+const SORTS = {
+  total: (a, b) => b.totalMs - a.totalMs,
+  max: (a, b) => b.maxMs - a.maxMs,
+  count: (a, b) => b.count - a.count,
+  slow: (a, b) => b.slow - a.slow
+};
+
+// Worst query shapes first, and the likely N+1 patterns
+const report = ({ sort = 'total', limit = 20 } = {}) => ({
+  enabled: ENABLED,
+  slowMs: SLOW_MS,
+  repeatThreshold: REPEAT_THRESHOLD,
+  queries: [...shapes.entries()].map(([, entry]) => entry)
+    .sort(SORTS[sort] || SORTS.total)
+    .slice(0, limit)
+    .map(({ explaining, routes, totalMs, ...entry }) => ({
+      ...entry,
+      totalMs: Math.round(totalMs),
+      averageMs: Math.round(totalMs / entry.count),
+      routes: [...routes]
+    })),
+  repeats: [...repeats.entries()].map(([, repeat]) => repeat)
+    .sort((a, b) => b.maxPerRequest - a.maxPerRequest)
+    .slice(0, limit)
+});
+
+const reset = () => {
+  shapes.clear();
+  repeats.clear();
+};
+
+module.exports = {
+  install,
+  plugin,
+  profileRequests,
+  report,
+  reset,
+  shapeOf,
+  summarizePlan,
+  SORTS
+};
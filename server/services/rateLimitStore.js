@@ -0,0 +1,159 @@
+const clusterBus = require('./clusterBus');
+
+const SWEEP_INTERVAL_MS = 60 * 1000;
+
+// Fixed-window hit counts keyed by client. In cluster mode the primary owns
+// the only instance, so every worker counts against the same windows.
+class WindowCounter {
+  constructor() {
+    this.windows = new Map();
+    this.sweeper = setInterval(() => this.sweep(), SWEEP_INTERVAL_MS);
+    this.sweeper.unref();
+  }
+
+  increment(key, windowMs, now = Date.now()) {
+    let window = this.windows.get(key);
+    if (!window || window.resetTime <= now) {
+      window = { hits: 0, resetTime: now + windowMs };
+      this.windows.set(key, window);
+    }
+    window.hits += 1;
+    return { totalHits: window.hits, resetTime: window.resetTime };
+  }
+
+  decrement(key) {
+    const window = this.windows.get(key);
+    if (window && window.hits > 0) window.hits -= 1;
+  }
+
+  reset(key) {
+    this.windows.delete(key);
+  }
+
+  resetPrefix(prefix) {
+    for (const key of this.windows.keys()) {
+      if (key.startsWith(prefix)) this.windows.delete(key);
+    }
+  }
+
+  sweep(now = Date.now()) {
+    for (const [key, window] of this.windows) {
+      if (window.resetTime <= now) this.windows.delete(key);
+    }
+  }
+
+  get size() {
+    return this.windows.size;
+  }
+}
+
+// Token buckets keyed by client. A bucket holds up to `capacity` tokens and
+// refills at `refillPerSec`; a request takes `cost` tokens or is refused.
+// Buckets are stored lazily as { tokens, updatedAt } and topped up on access.
+class TokenBuckets {
+  constructor() {
+    this.buckets = new Map();
+    this.sweeper = setInterval(() => this.sweep(), SWEEP_INTERVAL_MS);
+    this.sweeper.unref();
+  }
+
+  take(key, cost, { capacity, refillPerSec }, now = Date.now()) {
+    const bucket = this.buckets.get(key) || { tokens: capacity, updatedAt: now, capacity, refillPerSec };
+    bucket.tokens = Math.min(capacity, bucket.tokens + ((now - bucket.updatedAt) / 1000) * refillPerSec);
+    bucket.updatedAt = now;
+    bucket.capacity = capacity;
+    bucket.refillPerSec = refillPerSec;
+
+    const allowed = bucket.tokens >= cost;
+    if (allowed) bucket.tokens -= cost;
+    this.buckets.set(key, bucket);
+
+    const secondsFor = tokens => Math.max(0, tokens) / refillPerSec;
+    return {
+      allowed,
+      remaining: Math.floor(bucket.tokens),
+      resetMs: Math.ceil(secondsFor(capacity - bucket.tokens) * 1000),
+      retryAfterMs: allowed ? 0 : Math.ceil(secondsFor(cost - bucket.tokens) * 1000)
+    };
+  }
+
+  // Full buckets carry no information, so they are dropped
+  sweep(now = Date.now()) {
+    for (const [key, bucket] of this.buckets) {
+      const tokens = bucket.tokens + ((now - bucket.updatedAt) / 1000) * bucket.refillPerSec;
+      if (tokens >= bucket.capacity) this.buckets.delete(key);
+    }
+  }
+
+  get size() {
+    return this.buckets.size;
+  }
+}
+
+const counter = new WindowCounter();
+const buckets = new TokenBuckets();
+
+const operations = {
+  increment: (key, windowMs) => counter.increment(key, windowMs),
+  decrement: key => counter.decrement(key),
+  reset: key => counter.reset(key),
+  resetPrefix: prefix => counter.resetPrefix(prefix),
+  take: (key, cost, policy) => buckets.take(key, cost, policy)
+};
+
+clusterBus.handle('rateLimit', (operation, ...args) => operations[operation](...args));
+
+let fallbackLogged = false;
+
+// Run a counter operation in the primary, or locally if the primary does not answer in time
+const runShared = async (operation, ...args) => {
+  try {
+    return await clusterBus.call('rateLimit', operation, ...args);
+  } catch (error) {
+    if (!fallbackLogged) {
+      fallbackLogged = true;
+      console.error('Shared rate limit store unavailable, counting locally:', error.message);
+    }
+    return operations[operation](...args);
+  }
+};
+
+const takeTokens = (key, cost, policy) => runShared('take', key, cost, policy);
+
+// express-rate-limit store backed by the shared counter
+class SharedStore {
+  constructor({ prefix = 'rl:' } = {}) {
+    this.prefix = prefix;
+    this.windowMs = 60 * 1000;
+  }
+
+  init(options) {
+    this.windowMs = options.windowMs;
+  }
+
+  async increment(key) {
+    const { totalHits, resetTime } = await runShared('increment', this.prefix + key, this.windowMs);
+    return { totalHits, resetTime: new Date(resetTime) };
+  }
+
+  async decrement(key) {
+    await runShared('decrement', this.prefix + key);
+  }
+
+  async resetKey(key) {
+    await runShared('reset', this.prefix + key);
+  }
+
+  async resetAll() {
+    await runShared('resetPrefix', this.prefix);
+  }
+}
+
+module.exports = {
+  WindowCounter,
+  TokenBuckets,
+  SharedStore,
+  takeTokens,
+  counter,
+  buckets
+};
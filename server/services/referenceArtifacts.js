@@ -0,0 +1,201 @@
+const crypto = require('crypto');
+const fs = require('fs');
+const path = require('path');
+const { v4: uuidv4 } = require('uuid');
+const runner = require('./runner');
+const { workerDir, sweepWorkerDirs } = require('../utils/workerDirs');
+const { getGccVersion, DEFAULT_FLAGS } = require('./compileCache');
+
+// Prebuilt artifacts for each Algorithm/DataStructure document:
+//   <name>.h      the document's headerCode, includable as "<name>.h"
+//   <name>.h.gch  the same header precompiled with the submission flags
+//   reference.o   the reference cCode with every symbol weakened, so a
+//                 student's own definitions always win at link time
+// Artifacts are keyed by document id and content, so a changed document
+// simply gets a new build and the old one is retired. Each build has its own
+// directory, <key>-<build id>, so removing a retired build can never touch a
+// fresh build of the same content.
+const ARTIFACT_BASE = process.env.REFERENCE_ARTIFACT_DIR || path.join(runner.SCRATCH_ROOT, 'reference');
+// Each cluster worker process sweeps and retires only its own builds
+const ARTIFACT_ROOT = workerDir(ARTIFACT_BASE);
+
+// Flags that only matter to the linker would make gcc warn when building objects
+const COMPILE_ONLY_FLAGS = DEFAULT_FLAGS.filter(flag => !/^-(l|L|Wl,)/.test(flag));
+
+const entries = new Map();
+
+// "Binary Search Tree" -> "binary_search_tree.h"
+const headerName = (doc) => {
+  const slug = doc.name.toLowerCase().replace(/[^a-z0-9]+/g, '_').replace(/^_+|_+$/g, '');
+  return `${slug || 'reference'}.h`;
+};
+
+const artifactKey = async (doc) => {
+  const gccVersion = await getGccVersion();
+  return crypto
+    .createHash('sha256')
+    .update(gccVersion)
+    .update('\0')
+    .update(COMPILE_ONLY_FLAGS.join(' '))
+    .update('\0')
+    .update(doc._id.toString())
+    .update('\0')
+    .update(headerName(doc))
+    .update('\0')
+    .update(doc.headerCode || '')
+    .update('\0')
+    .update(doc.cCode || '')
+    .digest('hex');
+};
+
+// Directories left behind by a previous process are removed before the first
+// build; in cluster mode, only those of workers that have exited
+let sweepPromise = null;
+const sweep = () => {
+  if (!sweepPromise) {
+    sweepPromise = (ARTIFACT_ROOT === ARTIFACT_BASE
+      ? fs.promises.rm(ARTIFACT_ROOT, { recursive: true, force: true })
+      : sweepWorkerDirs(ARTIFACT_BASE))
+      .catch(() => {})
+      .then(() => fs.promises.mkdir(ARTIFACT_ROOT, { recursive: true }));
+  }
+  return sweepPromise;
+};
+
+// Resolves to { dir, manifest }
+const buildArtifacts = async (doc, key) => {
+  await sweep();
+  const finalDir = path.join(ARTIFACT_ROOT, `${key}-${uuidv4()}`);
+  const buildDir = `${finalDir}.partial`;
+  await fs.promises.mkdir(buildDir);
+
+  try {
+    const header = headerName(doc);
+    const manifest = {
+      key,
+      headerName: header,
+      precompiledHeader: false,
+      reference: false,
+      errors: {}
+    };
+
+    await fs.promises.writeFile(path.join(buildDir, header), doc.headerCode || '');
+
+    const pch = await runner.runProcess(
+      'gcc',
+      ['-x', 'c-header', header, '-o', `${header}.gch`, ...COMPILE_ONLY_FLAGS],
+      { cwd: buildDir }
+    );
+    if (pch.code === 0) {
+      manifest.precompiledHeader = true;
+    } else {
+      manifest.errors.header = pch.stderr;
+    }
+
+    const object = await runner.runProcess(
+      'gcc',
+      ['-c', '-I.', '-x', 'c', '-', '-o', 'reference.o', ...COMPILE_ONLY_FLAGS],
+      { cwd: buildDir, input: doc.cCode || '' }
+    );
+    if (object.code === 0) {
+      const weaken = await runner.runProcess('objcopy', ['--weaken', 'reference.o'], { cwd: buildDir });
+      if (weaken.code === 0) {
+        manifest.reference = true;
+      } else {
+        manifest.errors.reference = weaken.stderr || 'objcopy is not available.';
+      }
+    } else {
+      manifest.errors.reference = object.stderr;
+    }
+
+    await fs.promises.rename(buildDir, finalDir);
+    return { dir: finalDir, manifest };
+  } finally {
+    fs.promises.rm(buildDir, { recursive: true, force: true }).catch(() => {});
+  }
+};
+
+const removeDir = (entry) => {
+  entry.promise
+    .then(({ dir }) => fs.promises.rm(dir, { recursive: true, force: true }))
+    .catch(() => {});
+};
+
+// Drop a document's artifacts; directories still in use go once released
+const retire = (entry) => {
+  entry.retired = true;
+  if (entry.refs === 0) removeDir(entry);
+};
+
+const invalidate = (docId) => {
+  const id = docId.toString();
+  const entry = entries.get(id);
+  if (entry) {
+    entries.delete(id);
+    retire(entry);
+  }
+};
+
+const ensure = async (doc) => {
+  const id = doc._id.toString();
+  const key = await artifactKey(doc);
+  let entry = entries.get(id);
+
+  if (!entry || entry.key !== key) {
+    if (entry) retire(entry);
+    entry = { key, refs: 0, retired: false, promise: null };
+    entry.promise = buildArtifacts(doc, key).catch((error) => {
+      if (entries.get(id) === entry) entries.delete(id);
+      throw error;
+    });
+    entries.set(id, entry);
+  }
+  return entry;
+};
+
+// Build artifacts ahead of the first submission (on create/update)
+const prepare = (doc) => ensure(doc)
+  .then(entry => entry.promise)
+  .catch(error => console.error('Error preparing reference artifacts:', error));
+
+// Artifacts for a document, built on first use. Call release() when the compile is done.
+const acquire = async (doc) => {
+  const entry = await ensure(doc);
+  // Pinned before the build finishes, so a retire in the meantime cannot remove it
+  entry.refs += 1;
+  let built;
+  try {
+    built = await entry.promise;
+  } catch (error) {
+    entry.refs -= 1;
+    throw error;
+  }
+  const { dir, manifest } = built;
+  let released = false;
+
+  return {
+    key: entry.key,
+    dir,
+    headerName: manifest.headerName,
+    precompiledHeader: manifest.precompiledHeader,
+    objectPath: manifest.reference ? path.join(dir, 'reference.o') : null,
+    errors: manifest.errors,
+    release: () => {
+      if (released) return;
+      released = true;
+      entry.refs -= 1;
+      if (entry.retired && entry.refs === 0) removeDir(entry);
+    }
+  };
+};
+
+// Fields whose change makes existing artifacts stale
+const SOURCE_FIELDS = ['name', 'headerCode', 'cCode'];
+
+module.exports = {
+  prepare,
+  acquire,
+  invalidate,
+  headerName,
+  SOURCE_FIELDS
+};
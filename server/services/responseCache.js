@@ -0,0 +1,135 @@
+const crypto = require('crypto');
+const LRUCache = require('../utils/lruCache');
+const clusterBus = require('./clusterBus');
+
+const MAX_ENTRIES = parseInt(process.env.RESPONSE_CACHE_MAX_ENTRIES, 10) || 2000;
+const MAX_BYTES = parseInt(process.env.RESPONSE_CACHE_MAX_BYTES, 10) || 32 * 1024 * 1024;
+const TTL_MS = parseInt(process.env.RESPONSE_CACHE_TTL_MS, 10) || 60 * 1000;
+
+// Cache keys for each tag, so a write can drop exactly the responses it affects
+const tagIndex = new Map();
+
+const untag = (key, entry) => {
+  for (const tag of entry.tags) {
+    const keys = tagIndex.get(tag);
+    if (!keys) continue;
+    keys.delete(key);
+    if (keys.size === 0) tagIndex.delete(tag);
+  }
+};
+
+const cache = new LRUCache({
+  maxEntries: MAX_ENTRIES,
+  maxSize: MAX_BYTES,
+  ttlMs: TTL_MS,
+  sizeOf: entry => entry.body.length,
+  onEvict: untag
+});
+
+const stats = {
+  hits: 0,
+  misses: 0,
+  invalidations: 0
+};
+
+// Bumped on every invalidation; a response computed across one is not stored
+let epoch = 0;
+
+const send = (res, entry, status) => {
+  res.set('ETag', entry.etag);
+  res.set('Cache-Control', 'no-cache');
+  res.set('X-Cache', status);
+  res.type('application/json');
+  // res.send answers 304 itself when If-None-Match matches the ETag
+  return res.send(entry.body);
+};
+
+const store = (key, entry) => {
+  if (cache.has(key)) cache.delete(key);
+  cache.set(key, entry);
+  if (!cache.has(key)) return;
+
+  for (const tag of entry.tags) {
+    if (!tagIndex.has(tag)) tagIndex.set(tag, new Set());
+    tagIndex.get(tag).add(key);
+  }
+};
+
+// Read-through cache for a GET route. tags(req, body) names what the
+// response depends on; invalidate(tag) drops every response carrying it.
+const cached = ({ tags }) => (req, res, next) => {
+  const key = req.originalUrl;
+  const entry = cache.get(key);
+
+  if (entry) {
+    stats.hits += 1;
+    return send(res, entry, 'HIT');
+  }
+
+  stats.misses += 1;
+  const startEpoch = epoch;
+  const json = res.json.bind(res);
+
+  res.json = (data) => {
+    if (res.statusCode !== 200) return json(data);
+
+    const body = JSON.stringify(data);
+    const fresh = {
+      body,
+      etag: `"${crypto.createHash('sha1').update(body).digest('base64url')}"`,
+      tags: [...new Set(tags(req, data))]
+    };
+    if (epoch === startEpoch) store(key, fresh);
+    return send(res, fresh, 'MISS');
+  };
+  next();
+};
+
+const dropTags = (tags) => {
+  epoch += 1;
+  for (const tag of tags) {
+    const keys = tagIndex.get(tag);
+    if (!keys) continue;
+    for (const key of [...keys]) {
+      cache.delete(key);
+      stats.invalidations += 1;
+    }
+  }
+};
+
+const dropAll = () => {
+  epoch += 1;
+  cache.clear();
+};
+
+// Invalidations are broadcast so no worker keeps serving the stale response
+const invalidate = (...tags) => {
+  dropTags(tags);
+  clusterBus.publish('responseCache:invalidate', tags);
+};
+
+const clear = () => {
+  dropAll();
+  clusterBus.publish('responseCache:clear');
+};
+
+clusterBus.subscribe('responseCache:invalidate', dropTags);
+clusterBus.subscribe('responseCache:clear', dropAll);
+
+const getStats = () => {
+  const lookups = stats.hits + stats.misses;
+  return {
+    ...stats,
+    hitRatio: lookups === 0 ? 0 : stats.hits / lookups,
+    entries: cache.size,
+    bytes: cache.totalSize,
+    tags: tagIndex.size
+  };
+};
+
+module.exports = {
+  cached,
+  invalidate,
+  clear,
+  getStats
+};
@@ -0,0 +1,271 @@
+const { spawn } = require('child_process');
+const crypto = require('crypto');
+const fs = require('fs');
+const os = require('os');
+const path = require('path');
+
+// Scratch space for compiler output. Prefer tmpfs so builds never touch disk.
+const resolveScratchRoot = () => {
+  if (process.env.COMPILER_SCRATCH_DIR) return process.env.COMPILER_SCRATCH_DIR;
+  try {
+    fs.accessSync('/dev/shm', fs.constants.W_OK);
+    return path.join('/dev/shm', 'c-ds-algo');
+  } catch (error) {
+    return path.join(os.tmpdir(), 'c-ds-algo');
+  }
+};
+
+const SCRATCH_ROOT = resolveScratchRoot();
+const DEFAULT_OUTPUT_LIMIT = parseInt(process.env.RUN_OUTPUT_LIMIT_BYTES, 10) || 1024 * 1024;
+const DEFAULT_WALL_LIMIT_MS = parseInt(process.env.RUN_WALL_LIMIT_MS, 10) || 5000;
+const DEFAULT_CPU_LIMIT_MS = parseInt(process.env.RUN_CPU_LIMIT_MS, 10) || 5000;
+const DEFAULT_MEMORY_LIMIT_KB = (parseInt(process.env.RUN_MEMORY_LIMIT_MB, 10) || 256) * 1024;
+const MAX_WALL_LIMIT_MS = parseInt(process.env.RUN_MAX_WALL_LIMIT_MS, 10) || 10000;
+
+// Extra time the launcher gets to report before Node kills it itself
+const LAUNCHER_GRACE_MS = 1000;
+const LAUNCHER_SOURCE = path.join(__dirname, '../sandbox/launcher.c');
+
+const SIGNAL_NAMES = Object.fromEntries(
+  Object.entries(os.constants.signals).map(([name, number]) => [number, name])
+);
+
+// Create a private directory for one job and remove it when the job finishes
+const withScratchDir = async (fn) => {
+  await fs.promises.mkdir(SCRATCH_ROOT, { recursive: true });
+  const dir = await fs.promises.mkdtemp(path.join(SCRATCH_ROOT, 'job-'));
+  try {
+    return await fn(dir);
+  } finally {
+    await fs.promises.rm(dir, { recursive: true, force: true }).catch(() => {});
+  }
+};
+
+// Spawn a process without a shell, feed it stdin and collect its output.
+// Output beyond outputLimit bytes kills the process instead of growing buffers.
+// With `report`, whatever the process writes to fd 3 is returned separately.
+// `onOutput(stream, chunk)` sees output as it arrives; returning a promise
+// pauses that stream until it settles. `retainOutput: false` keeps nothing in
+// memory, and aborting `signal` kills the process.
+const runProcess = (command, args, {
+  input = '',
+  timeout = 0,
+  cwd,
+  outputLimit = DEFAULT_OUTPUT_LIMIT,
+  report = false,
+  onOutput = null,
+  retainOutput = true,
+  signal = null
+} = {}) => (
+  new Promise((resolve) => {
+    const stdio = report ? ['pipe', 'pipe', 'pipe', 'pipe'] : ['pipe', 'pipe', 'pipe'];
+    const child = spawn(command, args, { cwd, stdio });
+    const stdout = [];
+    const stderr = [];
+    const reportChunks = [];
+    const bytes = { stdout: 0, stderr: 0 };
+    let outputBytes = 0;
+    let timedOut = false;
+    let outputLimitExceeded = false;
+    let spawnError = null;
+
+    const kill = () => {
+      if (child.exitCode === null && child.signalCode === null) {
+        child.kill('SIGKILL');
+      }
+    };
+
+    const timer = timeout > 0 ? setTimeout(() => {
+      timedOut = true;
+      kill();
+    }, timeout) : null;
+
+    const collect = (chunks, stream) => (chunk) => {
+      bytes[stream] += chunk.length;
+      outputBytes += chunk.length;
+      if (outputBytes > outputLimit) {
+        outputLimitExceeded = true;
+        kill();
+        return;
+      }
+      if (retainOutput) chunks.push(chunk);
+      if (onOutput) {
+        const pending = onOutput(stream, chunk);
+        if (pending && typeof pending.then === 'function') {
+          child[stream].pause();
+          pending.then(() => child[stream].resume(), kill);
+        }
+      }
+    };
+
+    const onAbort = () => kill();
+    if (signal) {
+      if (signal.aborted) kill();
+      signal.addEventListener('abort', onAbort, { once: true });
+    }
+
+    child.stdout.on('data', collect(stdout, 'stdout'));
+    child.stderr.on('data', collect(stderr, 'stderr'));
+    if (report) {
+      child.stdio[3].on('data', chunk => reportChunks.push(chunk));
+    }
+
+    // Programs that exit without reading stdin close the pipe early
+    child.stdin.on('error', () => {});
+    child.stdin.end(input);
+
+    child.on('error', (error) => {
+      spawnError = error;
+    });
+
+    child.on('close', (code, exitSignal) => {
+      if (timer) clearTimeout(timer);
+      if (signal) signal.removeEventListener('abort', onAbort);
+      resolve({
+        code,
+        signal: exitSignal,
+        timedOut,
+        outputLimitExceeded,
+        spawnError,
+        stdout: Buffer.concat(stdout).toString(),
+        stderr: Buffer.concat(stderr).toString(),
+        stdoutBytes: bytes.stdout,
+        stderrBytes: bytes.stderr,
+        report: report ? Buffer.concat(reportChunks).toString() : null
+      });
+    });
+  })
+);
+
+// Compile source fed over stdin into outputPath, optionally against extra
+// include directories and prebuilt object files
+const compile = (code, outputPath, flags = [], { includeDirs = [], objects = [] } = {}) => {
+  const includeArgs = includeDirs.map(dir => `-I${dir}`);
+  const objectArgs = objects.length > 0 ? ['-x', 'none', ...objects] : [];
+  return runProcess(
+    'gcc',
+    [...includeArgs, '-x', 'c', '-', ...objectArgs, '-o', outputPath, ...flags],
+    { input: code }
+  );
+};
+
+// Check syntax without producing any files
+const checkSyntax = (code, flags = []) => (
+  runProcess('gcc', ['-fsyntax-only', '-x', 'c', '-', ...flags], { input: code })
+);
+
+// Build the resource-limiting launcher once per source revision.
+// Resolves to null when it cannot be built; programs then run unmetered.
+let launcherPromise = null;
+const getLauncher = () => {
+  if (!launcherPromise) {
+    launcherPromise = (async () => {
+      const source = await fs.promises.readFile(LAUNCHER_SOURCE);
+      const digest = crypto.createHash('sha256').update(source).digest('hex').slice(0, 16);
+      const launcherPath = path.join(SCRATCH_ROOT, `launcher-${digest}`);
+
+      try {
+        await fs.promises.access(launcherPath, fs.constants.X_OK);
+        return launcherPath;
+      } catch (error) {}
+
+      await fs.promises.mkdir(SCRATCH_ROOT, { recursive: true });
+      return withScratchDir(async (dir) => {
+        const outputPath = path.join(dir, 'launcher');
+        const result = await runProcess('gcc', ['-O2', '-o', outputPath, LAUNCHER_SOURCE]);
+        if (result.code !== 0) {
+          console.error('Unable to build run launcher:', result.stderr);
+          return null;
+        }
+        await fs.promises.rename(outputPath, launcherPath);
+        return launcherPath;
+      });
+    })().catch((error) => {
+      console.error('Unable to build run launcher:', error);
+      return null;
+    });
+  }
+  return launcherPromise;
+};
+
+const parseReport = (text) => {
+  try {
+    return text ? JSON.parse(text) : null;
+  } catch (error) {
+    return null;
+  }
+};
+
+const runVerdict = (result, usage) => {
+  if (result.outputLimitExceeded) return 'OLE';
+  if (result.timedOut || usage.timeLimitExceeded) return 'TLE';
+  if (usage.memoryLimitExceeded) return 'MLE';
+  if (result.code !== 0) return 'RE';
+  return 'OK';
+};
+
+// Run a compiled program under CPU, memory, wall-clock and output limits.
+// Returns its output along with a verdict (OK/TLE/MLE/OLE/RE) and measured usage.
+const runBinary = async (binaryPath, {
+  input,
+  timeout = DEFAULT_WALL_LIMIT_MS,
+  outputLimit,
+  cpuLimitMs = Math.min(DEFAULT_CPU_LIMIT_MS, timeout),
+  memoryLimitKb = DEFAULT_MEMORY_LIMIT_KB,
+  onOutput,
+  retainOutput,
+  signal
+} = {}) => {
+  const launcherPath = await getLauncher();
+  const startedAt = process.hrtime.bigint();
+  const streaming = { outputLimit, onOutput, retainOutput, signal };
+
+  const result = launcherPath
+    ? await runProcess(
+      launcherPath,
+      [String(cpuLimitMs), String(memoryLimitKb), String(timeout), binaryPath],
+      { input, timeout: timeout + LAUNCHER_GRACE_MS, report: true, ...streaming }
+    )
+    : await runProcess(binaryPath, [], { input, timeout, ...streaming });
+
+  const wallMs = Number(process.hrtime.bigint() - startedAt) / 1e6;
+  const report = parseReport(result.report);
+  delete result.report;
+
+  // The launcher knows the program's real exit status
+  if (report) {
+    result.code = report.exitCode;
+    result.signal = report.signal ? SIGNAL_NAMES[report.signal] || String(report.signal) : null;
+  }
+
+  const usage = {
+    wallMs,
+    cpuUserMs: report ? report.userUs / 1000 : null,
+    cpuSystemMs: report ? report.systemUs / 1000 : null,
+    peakRssKb: report ? report.maxRssKb : null,
+    stdoutBytes: result.stdoutBytes,
+    stderrBytes: result.stderrBytes,
+    timeLimitExceeded: Boolean(report && report.timeLimit),
+    memoryLimitExceeded: Boolean(report && report.memoryLimit)
+  };
+  const verdict = runVerdict(result, usage);
+
+  return {
+    ...result,
+    timedOut: verdict === 'TLE',
+    verdict,
+    usage,
+    limits: { wallMs: timeout, cpuMs: cpuLimitMs, memoryKb: memoryLimitKb, outputBytes: outputLimit || DEFAULT_OUTPUT_LIMIT }
+  };
+};
+
+module.exports = {
+  SCRATCH_ROOT,
+  withScratchDir,
+  runProcess,
+  compile,
+  checkSyntax,
+  runBinary,
+  getLauncher,
+  MAX_WALL_LIMIT_MS
+};
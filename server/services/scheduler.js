@@ -0,0 +1,179 @@
+const os = require('os');
+
+// Thrown when a job cannot be queued; routes turn it into 429/503 + Retry-After
+class QueueFullError extends Error {
+  constructor(message, { status, retryAfter }) {
+    super(message);
+    this.name = 'QueueFullError';
+    this.status = status;
+    this.retryAfter = retryAfter;
+  }
+}
+
+// Bounded job scheduler.
+// At most `concurrency` jobs run at once. Waiting jobs are kept in one FIFO
+// per owner and owners are served round-robin, so a single user submitting
+// many jobs cannot starve everyone else.
+class JobScheduler {
+  constructor({ concurrency, maxQueue, maxQueuePerOwner } = {}) {
+    this.concurrency = concurrency || Math.max(1, os.cpus().length);
+    this.maxQueue = maxQueue || this.concurrency * 25;
+    this.maxQueuePerOwner = maxQueuePerOwner || Math.max(1, Math.ceil(this.maxQueue / 10));
+    this.running = 0;
+    this.queued = 0;
+    this.queues = new Map();
+    this.rotation = [];
+    this.averageDurationMs = 1000;
+    this.observers = [];
+    this.stats = {
+      completed: 0,
+      failed: 0,
+      rejected: 0,
+      totalWaitMs: 0
+    };
+  }
+
+  retryAfterSeconds() {
+    const waves = Math.ceil((this.queued + 1) / this.concurrency);
+    return Math.min(60, Math.max(1, Math.ceil((waves * this.averageDurationMs) / 1000)));
+  }
+
+  // The error schedule() would reject with right now, or null if the job would be queued
+  admissionError(owner) {
+    const ownerQueue = this.queues.get(String(owner || 'anonymous'));
+
+    if (this.queued >= this.maxQueue) {
+      return new QueueFullError('Server is busy. Please try again shortly.', {
+        status: 503,
+        retryAfter: this.retryAfterSeconds()
+      });
+    }
+
+    if (ownerQueue && ownerQueue.length >= this.maxQueuePerOwner) {
+      return new QueueFullError('Too many pending jobs. Please wait for earlier runs to finish.', {
+        status: 429,
+        retryAfter: this.retryAfterSeconds()
+      });
+    }
+    return null;
+  }
+
+  // Run task() once a slot is free; resolves with { result, queueWaitMs }
+  schedule(owner, task) {
+    const ownerKey = String(owner || 'anonymous');
+    const ownerQueue = this.queues.get(ownerKey);
+    const rejection = this.admissionError(ownerKey);
+
+    if (rejection) {
+      this.stats.rejected += 1;
+      return Promise.reject(rejection);
+    }
+
+    return new Promise((resolve, reject) => {
+      const job = { task, resolve, reject, enqueuedAt: Date.now() };
+
+      if (ownerQueue) {
+        ownerQueue.push(job);
+      } else {
+        this.queues.set(ownerKey, [job]);
+        this.rotation.push(ownerKey);
+      }
+      this.queued += 1;
+      this.drain();
+    });
+  }
+
+  nextJob() {
+    const ownerKey = this.rotation.shift();
+    const ownerQueue = this.queues.get(ownerKey);
+    const job = ownerQueue.shift();
+
+    if (ownerQueue.length > 0) {
+      this.rotation.push(ownerKey);
+    } else {
+      this.queues.delete(ownerKey);
+    }
+    this.queued -= 1;
+    return job;
+  }
+
+  drain() {
+    while (this.running < this.concurrency && this.queued > 0) {
+      this.start(this.nextJob());
+    }
+  }
+
+  // Call listener({ queueWaitMs, durationMs, failed }) as each job finishes
+  observe(listener) {
+    this.observers.push(listener);
+  }
+
+  async start(job) {
+    const startedAt = Date.now();
+    const queueWaitMs = startedAt - job.enqueuedAt;
+    let failed = false;
+    this.running += 1;
+    this.stats.totalWaitMs += queueWaitMs;
+
+    try {
+      const result = await job.task();
+      this.stats.completed += 1;
+      job.resolve({ result, queueWaitMs });
+    } catch (error) {
+      failed = true;
+      this.stats.failed += 1;
+      error.queueWaitMs = queueWaitMs;
+      job.reject(error);
+    } finally {
+      const duration = Date.now() - startedAt;
+      this.averageDurationMs = this.averageDurationMs * 0.9 + duration * 0.1;
+      this.running -= 1;
+      this.observers.forEach(listener => listener({ queueWaitMs, durationMs: duration, failed }));
+      this.drain();
+    }
+  }
+
+  getStats() {
+    const finished = this.stats.completed + this.stats.failed;
+    return {
+      concurrency: this.concurrency,
+      running: this.running,
+      queued: this.queued,
+      owners: this.queues.size,
+      maxQueue: this.maxQueue,
+      maxQueuePerOwner: this.maxQueuePerOwner,
+      completed: this.stats.completed,
+      failed: this.stats.failed,
+      rejected: this.stats.rejected,
+      averageWaitMs: finished === 0 ? 0 : this.stats.totalWaitMs / finished,
+      averageDurationMs: this.averageDurationMs
+    };
+  }
+}
+
+// Shared scheduler for every gcc and program run on this process
+const scheduler = new JobScheduler({
+  concurrency: parseInt(process.env.COMPILER_CONCURRENCY, 10) || undefined,
+  maxQueue: parseInt(process.env.COMPILER_MAX_QUEUE, 10) || undefined,
+  maxQueuePerOwner: parseInt(process.env.COMPILER_MAX_QUEUE_PER_USER, 10) || undefined
+});
+
+// Queue owner for a request: the authenticated user when known, else the client IP
+const ownerKey = (req) => (req.user ? req.user._id.toString() : req.ip);
+
+// Reply to a rejected schedule() with the status and Retry-After it carries
+const sendQueueFull = (res, error) => {
+  res.set('Retry-After', String(error.retryAfter));
+  return res.status(error.status).json({
+    error: error.message,
+    retryAfter: error.retryAfter
+  });
+};
+
+module.exports = {
+  JobScheduler,
+  QueueFullError,
+  scheduler,
+  ownerKey,
+  sendQueueFull
+};
@@ -0,0 +1,263 @@
+const clusterBus = require('./clusterBus');
+
+const REFRESH_MS = parseInt(process.env.SEARCH_INDEX_REFRESH_MS, 10) || 5 * 60 * 1000;
+
+// Matches in the name count more than matches in tags, which count more than the description
+const FIELD_WEIGHTS = { name: 3, tags: 2, description: 1 };
+const PREFIX_WEIGHT = 0.5;
+const MAX_PREFIX_EXPANSIONS = 50;
+const K1 = 1.2;
+const B = 0.75;
+
+const STOPWORDS = new Set([
+  'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'in', 'is', 'it',
+  'of', 'on', 'or', 'that', 'the', 'this', 'to', 'with'
+]);
+
+// Lowercase, strip accents and split on anything that is not a letter or digit
+const tokenize = (text) => {
+  if (!text) return [];
+  return String(text)
+    .normalize('NFKD')
+    .replace(/[\u0300-\u036f]/g, '')
+    .toLowerCase()
+    .split(/[^a-z0-9]+/)
+    .filter(token => token && !STOPWORDS.has(token));
+};
+
+// Index of the first element in a sorted array that is >= value
+const lowerBound = (sorted, value) => {
+  let low = 0;
+  let high = sorted.length;
+  while (low < high) {
+    const mid = (low + high) >>> 1;
+    if (sorted[mid] < value) low = mid + 1;
+    else high = mid;
+  }
+  return low;
+};
+
+// In-memory inverted index with BM25 ranking over weighted fields.
+// Each query token matches its exact term or, at reduced weight, any term it
+// is a prefix of; a document must match every token to be returned.
+class SearchIndex {
+  constructor() {
+    this.postings = new Map();
+    this.docs = new Map();
+    this.totalLength = 0;
+    this.sortedTerms = null;
+  }
+
+  get size() {
+    return this.docs.size;
+  }
+
+  add({ id, name, description, tags = [], meta = {} }) {
+    const key = String(id);
+    this.remove(key);
+
+    const frequencies = new Map();
+    let length = 0;
+    const fields = { name, description, tags: (tags || []).join(' ') };
+
+    for (const [field, weight] of Object.entries(FIELD_WEIGHTS)) {
+      for (const term of tokenize(fields[field])) {
+        frequencies.set(term, (frequencies.get(term) || 0) + weight);
+        length += 1;
+      }
+    }
+
+    for (const [term, frequency] of frequencies) {
+      let posting = this.postings.get(term);
+      if (!posting) {
+        posting = new Map();
+        this.postings.set(term, posting);
+        this.sortedTerms = null;
+      }
+      posting.set(key, frequency);
+    }
+
+    this.docs.set(key, { terms: [...frequencies.keys()], length, meta });
+    this.totalLength += length;
+  }
+
+  remove(id) {
+    const key = String(id);
+    const doc = this.docs.get(key);
+    if (!doc) return false;
+
+    for (const term of doc.terms) {
+      const posting = this.postings.get(term);
+      posting.delete(key);
+      if (posting.size === 0) {
+        this.postings.delete(term);
+        this.sortedTerms = null;
+      }
+    }
+    this.docs.delete(key);
+    this.totalLength -= doc.length;
+    return true;
+  }
+
+  // Terms starting with prefix, found by binary search over the sorted vocabulary
+  expand(prefix) {
+    if (!this.sortedTerms) {
+      this.sortedTerms = [...this.postings.keys()].sort();
+    }
+    const terms = [];
+    for (let i = lowerBound(this.sortedTerms, prefix); i < this.sortedTerms.length; i++) {
+      const term = this.sortedTerms[i];
+      if (!term.startsWith(prefix) || terms.length >= MAX_PREFIX_EXPANSIONS) break;
+      terms.push(term);
+    }
+    return terms;
+  }
+
+  // Ranked ids matching query; filter(meta) can narrow the candidates
+  search(query, { filter } = {}) {
+    const tokens = [...new Set(tokenize(query))];
+    if (tokens.length === 0 || this.docs.size === 0) return [];
+
+    const averageLength = this.totalLength / this.docs.size || 1;
+    let scores = null;
+
+    for (const token of tokens) {
+      const tokenScores = new Map();
+
+      for (const term of this.expand(token)) {
+        const posting = this.postings.get(term);
+        const boost = term === token ? 1 : PREFIX_WEIGHT;
+        const idf = Math.log(1 + (this.docs.size - posting.size + 0.5) / (posting.size + 0.5));
+
+        for (const [id, frequency] of posting) {
+          if (scores && !scores.has(id)) continue;
+          const { length } = this.docs.get(id);
+          const score = boost * idf * (frequency * (K1 + 1))
+            / (frequency + K1 * (1 - B + B * (length / averageLength)));
+          if (score > (tokenScores.get(id) || 0)) tokenScores.set(id, score);
+        }
+      }
+
+      if (scores) {
+        for (const [id, score] of tokenScores) tokenScores.set(id, score + scores.get(id));
+      }
+      scores = tokenScores;
+      if (scores.size === 0) return [];
+    }
+
+    const results = [];
+    for (const [id, score] of scores) {
+      const { meta } = this.docs.get(id);
+      if (!filter || filter(meta)) results.push({ id, score, meta });
+    }
+
+    // Best score first; ties go to the newest document
+    return results.sort((a, b) => b.score - a.score || (b.meta.createdAt || 0) - (a.meta.createdAt || 0));
+  }
+}
+
+const SEARCH_FIELDS = 'name description tags category difficulty createdAt';
+
+const toEntry = doc => ({
+  id: doc._id,
+  name: doc.name,
+  description: doc.description,
+  tags: doc.tags,
+  meta: {
+    category: doc.category,
+    difficulty: doc.difficulty,
+    createdAt: doc.createdAt ? new Date(doc.createdAt).getTime() : 0
+  }
+});
+
+// Search index for one catalog collection. It is built from the database on
+// first use, kept current by the routes on every write, and rebuilt every
+// REFRESH_MS to pick up writes made by other server processes. Writes are
+// also shared with the other cluster workers as they happen.
+class CatalogIndex {
+  constructor(Model, { refreshMs = REFRESH_MS } = {}) {
+    this.Model = Model;
+    this.refreshMs = refreshMs;
+    this.channel = `searchIndex:${Model.modelName}`;
+    this.index = null;
+    this.loading = null;
+    this.pending = null;
+    this.loadedAt = 0;
+  }
+
+  async ready() {
+    const stale = this.index && Date.now() - this.loadedAt > this.refreshMs;
+    if (this.index && !stale) return this.index;
+    if (!this.loading) {
+      this.loading = this.load().finally(() => {
+        this.loading = null;
+      });
+      if (stale) {
+        this.loading.catch(error => console.error('Error refreshing search index:', error));
+      }
+    }
+    // Serve the previous index while a refresh is in flight
+    return this.index && stale ? this.index : this.loading;
+  }
+
+  async load() {
+    this.pending = [];
+    try {
+      const docs = await this.Model.find({}).select(SEARCH_FIELDS).lean();
+      const index = new SearchIndex();
+      docs.forEach(doc => index.add(toEntry(doc)));
+
+      // Replay writes that landed while the collection was being read
+      this.pending.forEach(change => this.applyChange(index, change));
+      this.index = index;
+      this.loadedAt = Date.now();
+      return index;
+    } finally {
+      this.pending = null;
+    }
+  }
+
+  applyChange(index, { entry, removed }) {
+    if (entry) index.add(entry);
+    else index.remove(removed);
+  }
+
+  receive(change) {
+    if (this.index) this.applyChange(this.index, change);
+    if (this.pending) this.pending.push(change);
+  }
+
+  apply(change) {
+    this.receive(change);
+    clusterBus.publish(this.channel, change);
+  }
+
+  // Start following other workers' writes; the routes' shared indexes call this
+  listen() {
+    clusterBus.subscribe(this.channel, change => this.receive(change));
+    return this;
+  }
+
+  upsert(doc) {
+    this.apply({ entry: toEntry(doc) });
+  }
+
+  remove(id) {
+    this.apply({ removed: String(id) });
+  }
+
+  // Ranked ids of documents matching query and the category/difficulty filters
+  async search(query, { category, difficulty } = {}) {
+    const index = await this.ready();
+    const filter = category || difficulty
+      ? meta => (!category || meta.category === category) && (!difficulty || meta.difficulty === difficulty)
+      : null;
+    return index.search(query, { filter }).map(result => result.id);
+  }
+}
+
+module.exports = {
+  SearchIndex,
+  CatalogIndex,
+  tokenize
+};
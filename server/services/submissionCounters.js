@@ -0,0 +1,130 @@
+const Algorithm = require('../models/Algorithm');
+
+// "atomic" issues one $inc per submission; "coalesce" batches increments in
+// memory and writes them with a single bulkWrite per interval or threshold.
+const MODE = process.env.SUBMISSION_COUNTER_MODE === 'coalesce' ? 'coalesce' : 'atomic';
+const FLUSH_INTERVAL_MS = parseInt(process.env.SUBMISSION_FLUSH_INTERVAL_MS, 10) || 1000;
+const FLUSH_THRESHOLD = parseInt(process.env.SUBMISSION_FLUSH_THRESHOLD, 10) || 100;
+
+const incrementFor = success => ({
+  'submissions.total': 1,
+  'submissions.successful': success ? 1 : 0
+});
+
+class SubmissionCounters {
+  constructor({ mode = MODE, flushIntervalMs = FLUSH_INTERVAL_MS, flushThreshold = FLUSH_THRESHOLD, Model = Algorithm } = {}) {
+    this.mode = mode;
+    this.flushThreshold = flushThreshold;
+    this.Model = Model;
+    this.pending = new Map();
+    this.pendingCount = 0;
+    this.flushing = null;
+    this.stats = { recorded: 0, flushes: 0, written: 0, failedFlushes: 0 };
+
+    if (mode === 'coalesce') {
+      this.timer = setInterval(() => this.flush(), flushIntervalMs);
+      this.timer.unref();
+    }
+  }
+
+  // Count one submission; resolves with the algorithm's { total, successful } afterwards
+  async record(algorithm, success) {
+    this.stats.recorded += 1;
+
+    if (this.mode === 'atomic') {
+      const updated = await this.Model.findByIdAndUpdate(
+        algorithm._id,
+        { $inc: incrementFor(success) },
+        { new: true, projection: { submissions: 1 } }
+      ).lean();
+      return updated ? updated.submissions : { total: 0, successful: 0 };
+    }
+
+    const id = String(algorithm._id);
+    const delta = this.pending.get(id) || { total: 0, successful: 0 };
+    delta.total += 1;
+    delta.successful += success ? 1 : 0;
+    this.pending.set(id, delta);
+    this.pendingCount += 1;
+
+    if (this.pendingCount >= this.flushThreshold) {
+      this.flush();
+    }
+
+    // Stored counts plus everything not yet written, this submission included
+    return {
+      total: algorithm.submissions.total + delta.total,
+      successful: algorithm.submissions.successful + delta.successful
+    };
+  }
+
+  // Write pending increments in one unordered bulkWrite; failed operations are merged back
+  flush() {
+    if (this.flushing || this.pending.size === 0) return this.flushing || Promise.resolve();
+
+    const batch = this.pending;
+    this.pending = new Map();
+    this.pendingCount = 0;
+
+    const operations = [...batch].map(([id, delta]) => ({
+      updateOne: {
+        filter: { _id: id },
+        update: { $inc: { 'submissions.total': delta.total, 'submissions.successful': delta.successful } }
+      }
+    }));
+
+    this.flushing = this.Model.bulkWrite(operations, { ordered: false })
+      .then(() => {
+        this.stats.flushes += 1;
+        this.stats.written += operations.length;
+      })
+      .catch((error) => {
+        console.error('Error flushing submission counters:', error);
+        this.stats.failedFlushes += 1;
+        // Only operations reported as failed are retried; without details, all of them
+        const failed = error.writeErrors ? new Set(error.writeErrors.map(writeError => writeError.index)) : null;
+        [...batch].forEach(([id, delta], index) => {
+          if (failed && !failed.has(index)) return;
+          const current = this.pending.get(id) || { total: 0, successful: 0 };
+          current.total += delta.total;
+          current.successful += delta.successful;
+          this.pending.set(id, current);
+          this.pendingCount += delta.total;
+        });
+      })
+      .finally(() => {
+        this.flushing = null;
+      });
+
+    return this.flushing;
+  }
+
+  // Stop the timer and write everything still pending; called on shutdown
+  async close() {
+    clearInterval(this.timer);
+    await this.flush();
+    // Increments recorded while an earlier flush was already in flight
+    if (this.pending.size > 0) await this.flush();
+  }
+
+  getStats() {
+    return {
+      mode: this.mode,
+      pendingAlgorithms: this.pending.size,
+      pendingIncrements: this.pendingCount,
+      ...this.stats
+    };
+  }
+}
+
+const submissionCounters = new SubmissionCounters();
+
+// Write out whatever is still pending when the event loop drains
+if (submissionCounters.mode === 'coalesce') {
+  process.once('beforeExit', () => submissionCounters.flush());
+}
+
+module.exports = {
+  SubmissionCounters,
+  submissionCounters
+};
@@ -0,0 +1,94 @@
+// Map-backed LRU cache bounded by entry count and total size, with optional
+// per-entry expiry. Map iteration order is insertion order, so the first key
+// is always the least recently used one.
+class LRUCache {
+  constructor({ maxEntries = 1000, maxSize = Infinity, sizeOf = () => 0, onEvict, ttlMs = 0 } = {}) {
+    this.maxEntries = maxEntries;
+    this.maxSize = maxSize;
+    this.sizeOf = sizeOf;
+    this.onEvict = onEvict;
+    this.ttlMs = ttlMs;
+    this.map = new Map();
+    this.expires = new Map();
+    this.totalSize = 0;
+  }
+
+  get size() {
+    return this.map.size;
+  }
+
+  // Drop key if its time to live has passed; true when it was dropped
+  expire(key) {
+    const expiresAt = this.expires.get(key);
+    if (expiresAt === undefined || expiresAt > Date.now()) return false;
+    this.remove(key, true);
+    return true;
+  }
+
+  has(key) {
+    return this.map.has(key) && !this.expire(key);
+  }
+
+  // Read without touching recency
+  peek(key) {
+    return this.has(key) ? this.map.get(key) : undefined;
+  }
+
+  get(key) {
+    if (!this.has(key)) return undefined;
+    const value = this.map.get(key);
+    this.map.delete(key);
+    this.map.set(key, value);
+    return value;
+  }
+
+  // ttlMs of 0 keeps the entry until it is evicted
+  set(key, value, ttlMs = this.ttlMs) {
+    if (this.map.has(key)) {
+      this.remove(key, false);
+    }
+
+    this.map.set(key, value);
+    if (ttlMs > 0) this.expires.set(key, Date.now() + ttlMs);
+    this.totalSize += this.sizeOf(value);
+    this.trim();
+    return this;
+  }
+
+  delete(key) {
+    return this.remove(key, true);
+  }
+
+  clear() {
+    for (const key of [...this.map.keys()]) {
+      this.remove(key, true);
+    }
+  }
+
+  keys() {
+    return this.map.keys();
+  }
+
+  entries() {
+    return this.map.entries();
+  }
+
+  remove(key, notify) {
+    if (!this.map.has(key)) return false;
+    const value = this.map.get(key);
+    this.map.delete(key);
+    this.expires.delete(key);
+    this.totalSize -= this.sizeOf(value);
+    if (notify && this.onEvict) this.onEvict(key, value);
+    return true;
+  }
+
+  trim() {
+    while (this.map.size > 0 && (this.map.size > this.maxEntries || this.totalSize > this.maxSize)) {
+      const oldestKey = this.map.keys().next().value;
+      this.remove(oldestKey, true);
+    }
+  }
+}
+
+module.exports = LRUCache;
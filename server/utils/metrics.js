@@ -0,0 +1,179 @@
+// Minimal Prometheus client: counters, gauges and histograms with labels,
+// rendered in the text exposition format (version 0.0.4).
+
+// Seconds; spans a cached catalog read up to a slow gcc run
+const DEFAULT_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10];
+
+const escapeLabel = value => String(value).replace(/\\/g, '\\\\').replace(/\n/g, '\\n').replace(/"/g, '\\"');
+
+const formatLabels = (names, values, extra = '') => {
+  const pairs = names.map((name, i) => `${name}="${escapeLabel(values[i])}"`);
+  if (extra) pairs.push(extra);
+  return pairs.length === 0 ? '' : `{${pairs.join(',')}}`;
+};
+
+const formatValue = (value) => {
+  if (value === Infinity) return '+Inf';
+  if (value === -Infinity) return '-Inf';
+  return String(value);
+};
+
+class Metric {
+  constructor({ name, help, labelNames = [], collect = null }) {
+    this.name = name;
+    this.help = help;
+    this.labelNames = labelNames;
+    this.collect = collect;
+    this.series = new Map();
+  }
+
+  // Series are keyed by their label values in labelNames order
+  key(labels = {}) {
+    return this.labelNames.map(name => (labels[name] === undefined ? '' : String(labels[name])));
+  }
+
+  entry(labels, create) {
+    const values = this.key(labels);
+    const id = values.join('\u0000');
+    let series = this.series.get(id);
+    if (!series) {
+      series = create(values);
+      this.series.set(id, series);
+    }
+    return series;
+  }
+
+  // Metrics with a collect(metric) callback read their values at scrape time
+  header() {
+    if (this.collect) this.collect(this);
+    return `# HELP ${this.name} ${this.help}\n# TYPE ${this.name} ${this.type}\n`;
+  }
+
+  reset() {
+    this.series.clear();
+  }
+
+  render() {
+    let text = this.header();
+    for (const { values, value } of this.series.values()) {
+      text += `${this.name}${formatLabels(this.labelNames, values)} ${formatValue(value)}\n`;
+    }
+    return text;
+  }
+}
+
+class Counter extends Metric {
+  get type() {
+    return 'counter';
+  }
+
+  inc(labels, amount = 1) {
+    this.entry(labels, values => ({ values, value: 0 })).value += amount;
+  }
+
+  // For collected counters that mirror a total kept elsewhere
+  set(labels, value) {
+    this.entry(labels, values => ({ values, value: 0 })).value = value;
+  }
+}
+
+class Gauge extends Metric {
+  get type() {
+    return 'gauge';
+  }
+
+  set(labels, value) {
+    this.entry(labels, values => ({ values, value: 0 })).value = value;
+  }
+}
+
+class Histogram extends Metric {
+  constructor(options) {
+    super(options);
+    this.buckets = [...(options.buckets || DEFAULT_BUCKETS)].sort((a, b) => a - b);
+  }
+
+  get type() {
+    return 'histogram';
+  }
+
+  observe(labels, value) {
+    const series = this.entry(labels, values => ({
+      values,
+      counts: new Array(this.buckets.length).fill(0),
+      sum: 0,
+      count: 0
+    }));
+    // Counts are per bucket here and made cumulative when rendered
+    const index = this.buckets.findIndex(bound => value <= bound);
+    if (index !== -1) series.counts[index] += 1;
+    series.sum += value;
+    series.count += 1;
+  }
+
+  // Start a timer; calling the returned function observes the elapsed seconds
+  startTimer(labels) {
+    const start = process.hrtime.bigint();
+    return (moreLabels) => {
+      const seconds = Number(process.hrtime.bigint() - start) / 1e9;
+      this.observe({ ...labels, ...moreLabels }, seconds);
+      return seconds;
+    };
+  }
+
+  render() {
+    let text = this.header();
+    for (const { values, counts, sum, count } of this.series.values()) {
+      let cumulative = 0;
+      this.buckets.forEach((bound, i) => {
+        cumulative += counts[i];
+        text += `${this.name}_bucket${formatLabels(this.labelNames, values, `le="${formatValue(bound)}"`)} ${cumulative}\n`;
+      });
+      text += `${this.name}_bucket${formatLabels(this.labelNames, values, 'le="+Inf"')} ${count}\n`;
+      text += `${this.name}_sum${formatLabels(this.labelNames, values)} ${formatValue(sum)}\n`;
+      text += `${this.name}_count${formatLabels(this.labelNames, values)} ${count}\n`;
+    }
+    return text;
+  }
+}
+
+class Registry {
+  constructor() {
+    this.metrics = new Map();
+  }
+
+  register(metric) {
+    if (this.metrics.has(metric.name)) {
+      throw new Error(`Metric ${metric.name} is already registered.`);
+    }
+    this.metrics.set(metric.name, metric);
+    return metric;
+  }
+
+  counter(options) {
+    return this.register(new Counter(options));
+  }
+
+  gauge(options) {
+    return this.register(new Gauge(options));
+  }
+
+  histogram(options) {
+    return this.register(new Histogram(options));
+  }
+
+  render() {
+    return [...this.metrics.values()].map(metric => metric.render()).join('');
+  }
+}
+
+const CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8';
+
+module.exports = {
+  Counter,
+  Gauge,
+  Histogram,
+  Registry,
+  CONTENT_TYPE,
+  DEFAULT_BUCKETS
+};
@@ -0,0 +1,156 @@
+const LRUCache = require('./lruCache');
+const clusterBus = require('../services/clusterBus');
+
+const MAX_LIMIT = 100;
+const COUNT_TTL_MS = parseInt(process.env.COUNT_CACHE_TTL_MS, 10) || 30 * 1000;
+const COUNT_MODES = ['exact', 'cached', 'estimated', 'none'];
+
+// Thrown for malformed pagination parameters; routes answer 400
+class PaginationError extends Error {
+  constructor(message) {
+    super(message);
+    this.name = 'PaginationError';
+  }
+}
+
+// Totals per model and filter, dropped on writes to that model
+const countCache = new LRUCache({ maxEntries: 1000, ttlMs: COUNT_TTL_MS });
+
+// Cursors are opaque base64url JSON: sort key of the boundary row, direction and page number
+const encodeCursor = (doc, direction, page) => Buffer.from(JSON.stringify({
+  t: new Date(doc.createdAt).getTime(),
+  id: String(doc._id),
+  d: direction,
+  p: page
+})).toString('base64url');
+
+const decodeCursor = (token) => {
+  try {
+    const cursor = JSON.parse(Buffer.from(String(token), 'base64url').toString('utf8'));
+    if (Number.isFinite(cursor.t) && /^[a-f0-9]{24}$/.test(cursor.id) && ['next', 'prev'].includes(cursor.d)) {
+      return { createdAt: new Date(cursor.t), id: cursor.id, direction: cursor.d, page: parseInt(cursor.p, 10) || null };
+    }
+  } catch (error) {
+    // fall through to the error below
+  }
+  throw new PaginationError('Invalid pagination cursor.');
+};
+
+// Read page, limit, cursor and count from a query string
+const parseParams = ({ page, limit, cursor, count } = {}) => {
+  if (count && !COUNT_MODES.includes(count)) {
+    throw new PaginationError(`Invalid count mode. Use one of: ${COUNT_MODES.join(', ')}.`);
+  }
+
+  return {
+    page: Math.max(parseInt(page, 10) || 1, 1),
+    limit: Math.min(Math.max(parseInt(limit, 10) || 10, 1), MAX_LIMIT),
+    cursor: cursor ? decodeCursor(cursor) : null,
+    count: count || 'cached'
+  };
+};
+
+const countKey = (Model, filter) => `${Model.modelName}:${JSON.stringify(filter)}`;
+
+// Total matching documents according to the requested count mode
+const countTotal = async (Model, filter, mode) => {
+  if (mode === 'none') return null;
+  if (mode === 'estimated' && Object.keys(filter).length === 0) {
+    return Model.estimatedDocumentCount();
+  }
+  if (mode === 'exact') {
+    return Model.countDocuments(filter);
+  }
+
+  // cached, and estimated counts of a filtered listing
+  const key = countKey(Model, filter);
+  const cached = countCache.get(key);
+  if (cached !== undefined) return cached;
+
+  const total = await Model.countDocuments(filter);
+  countCache.set(key, total);
+  return total;
+};
+
+const dropCounts = (modelName) => {
+  const prefix = `${modelName}:`;
+  for (const key of [...countCache.keys()]) {
+    if (key.startsWith(prefix)) countCache.delete(key);
+  }
+};
+
+// Forget cached totals after a write to Model, in every worker
+const invalidateCounts = (Model) => {
+  dropCounts(Model.modelName);
+  clusterBus.publish('counts:invalidate', Model.modelName);
+};
+
+clusterBus.subscribe('counts:invalidate', dropCounts);
+
+// Keyset condition for rows after (or before) the cursor in createdAt desc, _id desc order
+const keysetFilter = ({ createdAt, id, direction }) => {
+  const op = direction === 'next' ? '$lt' : '$gt';
+  return {
+    $or: [
+      { createdAt: { [op]: createdAt } },
+      { createdAt, _id: { [op]: id } }
+    ]
+  };
+};
+
+// List Model documents newest first. With a cursor the page is found by
+// seeking on the (createdAt, _id) index, so deep pages cost the same as the
+// first; plain page numbers still work but fall back to skip().
+const paginate = async (Model, filter, params, decorate = query => query) => {
+  const { limit, cursor, count } = params;
+  let page = params.page;
+  let query;
+  let reversed = false;
+
+  if (cursor) {
+    reversed = cursor.direction === 'prev';
+    query = Model.find({ $and: [filter, keysetFilter(cursor)] })
+      .sort(reversed ? { createdAt: 1, _id: 1 } : { createdAt: -1, _id: -1 });
+    if (cursor.page) page = cursor.page;
+  } else {
+    query = Model.find(filter)
+      .sort({ createdAt: -1, _id: -1 })
+      .skip((page - 1) * limit);
+  }
+
+  const [rows, total] = await Promise.all([
+    decorate(query.limit(limit + 1)),
+    countTotal(Model, filter, count)
+  ]);
+
+  // One extra row tells us whether another page exists in the direction of travel
+  const more = rows.length > limit;
+  const items = rows.slice(0, limit);
+  if (reversed) items.reverse();
+
+  const hasNext = reversed || more;
+  const hasPrev = reversed ? more : page > 1;
+
+  return {
+    items,
+    pagination: {
+      currentPage: page,
+      totalPages: total === null ? null : Math.ceil(total / limit),
+      totalItems: total,
+      limit,
+      count,
+      nextCursor: hasNext && items.length > 0 ? encodeCursor(items[items.length - 1], 'next', page + 1) : null,
+      prevCursor: hasPrev && items.length > 0 ? encodeCursor(items[0], 'prev', page - 1) : null
+    }
+  };
+};
+
+module.exports = {
+  PaginationError,
+  parseParams,
+  paginate,
+  countTotal,
+  invalidateCounts,
+  encodeCursor,
+  decodeCursor
+};
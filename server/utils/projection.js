@@ -0,0 +1,55 @@
+// Field selection for list endpoints: a lean summary by default, an explicit
+// fields= list, or the full document with detail=true.
+
+const isTruthy = value => ['true', '1', 'yes'].includes(String(value).toLowerCase());
+
+// Top-level paths a caller may ask for
+const selectableFields = Model => [...new Set(
+  Object.keys(Model.schema.paths).map(path => path.split('.')[0])
+)].filter(path => path !== '__v');
+
+// Hidden test cases never leave the server through a listing
+const stripHidden = (doc) => {
+  if (Array.isArray(doc.testCases)) {
+    doc.testCases = doc.testCases.filter(testCase => !testCase.isHidden);
+  }
+  return doc;
+};
+
+// Resolve ?fields= and ?detail= into a query decorator and a per-document shaper
+const listView = ({ fields, detail } = {}, Model, { summary, populate = {} }) => {
+  let paths = summary;
+
+  if (isTruthy(detail)) {
+    paths = null;
+  } else if (fields) {
+    const allowed = selectableFields(Model);
+    const requested = String(fields).split(',').map(field => field.trim()).filter(Boolean);
+    const unknown = requested.filter(field => !allowed.includes(field));
+
+    if (unknown.length > 0) {
+      return { error: `Unknown fields: ${unknown.join(', ')}. Selectable fields: ${allowed.join(', ')}.` };
+    }
+    // createdAt is the pagination sort key, so it is always selected
+    paths = [...new Set([...requested, 'createdAt'])];
+  }
+
+  const includes = path => !paths || paths.includes(path);
+
+  return {
+    apply: (query) => {
+      let decorated = query.select(paths ? paths.join(' ') : '-__v');
+      for (const [path, select] of Object.entries(populate)) {
+        if (includes(path)) decorated = decorated.populate(path, select);
+      }
+      return decorated.lean();
+    },
+    shape: stripHidden
+  };
+};
+
+module.exports = {
+  listView,
+  selectableFields,
+  stripHidden
+};
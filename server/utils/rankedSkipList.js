@@ -0,0 +1,153 @@
+const MAX_LEVEL = 32;
+const P = 0.25;
+
+// Higher scores first; equal scores are ordered by member id so ranks are stable
+const before = (score, member, node) => score > node.score || (score === node.score && member < node.member);
+
+const createNode = (member, score, level) => ({
+  member,
+  score,
+  next: new Array(level).fill(null),
+  span: new Array(level).fill(0)
+});
+
+// Indexable skip list of (member, score) pairs. Each forward link records how
+// many members it skips, so rank(member) and range(offset, count) walk
+// O(log n) links instead of scanning from the top.
+class RankedSkipList {
+  constructor() {
+    this.head = createNode(null, Infinity, MAX_LEVEL);
+    this.level = 1;
+    this.scores = new Map();
+  }
+
+  get size() {
+    return this.scores.size;
+  }
+
+  has(member) {
+    return this.scores.has(member);
+  }
+
+  score(member) {
+    return this.scores.get(member);
+  }
+
+  randomLevel() {
+    let level = 1;
+    while (level < MAX_LEVEL && Math.random() < P) level += 1;
+    return level;
+  }
+
+  set(member, score) {
+    if (this.scores.get(member) === score) return;
+    if (this.scores.has(member)) this.remove(member);
+
+    const update = new Array(MAX_LEVEL);
+    const position = new Array(MAX_LEVEL);
+    let node = this.head;
+
+    for (let i = this.level - 1; i >= 0; i--) {
+      position[i] = i === this.level - 1 ? 0 : position[i + 1];
+      while (node.next[i] && before(node.next[i].score, node.next[i].member, { score, member })) {
+        position[i] += node.span[i];
+        node = node.next[i];
+      }
+      update[i] = node;
+    }
+
+    const level = this.randomLevel();
+    if (level > this.level) {
+      for (let i = this.level; i < level; i++) {
+        position[i] = 0;
+        update[i] = this.head;
+        this.head.span[i] = this.scores.size;
+      }
+      this.level = level;
+    }
+
+    const inserted = createNode(member, score, level);
+    for (let i = 0; i < level; i++) {
+      inserted.next[i] = update[i].next[i];
+      update[i].next[i] = inserted;
+      inserted.span[i] = update[i].span[i] - (position[0] - position[i]);
+      update[i].span[i] = position[0] - position[i] + 1;
+    }
+    for (let i = level; i < this.level; i++) {
+      update[i].span[i] += 1;
+    }
+
+    this.scores.set(member, score);
+  }
+
+  remove(member) {
+    if (!this.scores.has(member)) return false;
+    const score = this.scores.get(member);
+    const update = new Array(MAX_LEVEL);
+    let node = this.head;
+
+    for (let i = this.level - 1; i >= 0; i--) {
+      while (node.next[i] && before(node.next[i].score, node.next[i].member, { score, member })) {
+        node = node.next[i];
+      }
+      update[i] = node;
+    }
+
+    const target = node.next[0];
+    for (let i = 0; i < this.level; i++) {
+      if (update[i].next[i] === target) {
+        update[i].span[i] += target.span[i] - 1;
+        update[i].next[i] = target.next[i];
+      } else {
+        update[i].span[i] -= 1;
+      }
+    }
+    while (this.level > 1 && !this.head.next[this.level - 1]) {
+      this.level -= 1;
+    }
+
+    this.scores.delete(member);
+    return true;
+  }
+
+  // Zero-based position of member, or -1 when absent
+  rank(member) {
+    if (!this.scores.has(member)) return -1;
+    const score = this.scores.get(member);
+    let node = this.head;
+    let traversed = 0;
+
+    for (let i = this.level - 1; i >= 0; i--) {
+      while (node.next[i] && (node.next[i].member === member
+        || before(node.next[i].score, node.next[i].member, { score, member }))) {
+        traversed += node.span[i];
+        node = node.next[i];
+        if (node.member === member) return traversed - 1;
+      }
+    }
+    return -1;
+  }
+
+  // Up to count entries starting at zero-based offset, as { member, score, rank }
+  range(offset, count) {
+    const entries = [];
+    if (offset < 0 || offset >= this.scores.size || count <= 0) return entries;
+
+    let node = this.head;
+    let traversed = 0;
+    for (let i = this.level - 1; i >= 0; i--) {
+      while (node.next[i] && traversed + node.span[i] <= offset + 1) {
+        traversed += node.span[i];
+        node = node.next[i];
+      }
+    }
+
+    for (let rank = offset; node && entries.length < count; rank++) {
+      entries.push({ member: node.member, score: node.score, rank });
+      node = node.next[0];
+    }
+    return entries;
+  }
+}
+
+module.exports = RankedSkipList;
@@ -0,0 +1,40 @@
+const { once } = require('events');
+
+// Turn a response into a Server-Sent Events stream.
+// send() returns a promise when the socket buffer is full so producers can
+// wait for it to drain instead of queueing output in memory.
+const openEventStream = (res) => {
+  res.status(200);
+  res.set({
+    'Content-Type': 'text/event-stream',
+    'Cache-Control': 'no-cache',
+    Connection: 'keep-alive',
+    'X-Accel-Buffering': 'no'
+  });
+  res.flushHeaders();
+
+  let closed = false;
+  res.on('close', () => {
+    closed = true;
+  });
+
+  return {
+    get closed() {
+      return closed;
+    },
+    send(event, data) {
+      if (closed) return undefined;
+      const ok = res.write(`event: ${event}\ndata: ${JSON.stringify(data)}\n\n`);
+      return ok ? undefined : once(res, 'drain');
+    },
+    close() {
+      if (closed) return;
+      closed = true;
+      res.end();
+    }
+  };
+};
+
+module.exports = {
+  openEventStream
+};
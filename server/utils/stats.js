@@ -0,0 +1,38 @@
+// Descriptive statistics for small samples of timings
+
+const percentile = (sorted, p) => {
+  if (sorted.length === 0) return null;
+  const position = (sorted.length - 1) * p;
+  const lower = Math.floor(position);
+  const upper = Math.ceil(position);
+  return sorted[lower] + (sorted[upper] - sorted[lower]) * (position - lower);
+};
+
+const median = values => percentile([...values].sort((a, b) => a - b), 0.5);
+
+const summarize = (values) => {
+  if (values.length === 0) return null;
+  const sorted = [...values].sort((a, b) => a - b);
+  const mean = sorted.reduce((sum, value) => sum + value, 0) / sorted.length;
+  const variance = sorted.reduce((sum, value) => sum + (value - mean) ** 2, 0) / sorted.length;
+  const p25 = percentile(sorted, 0.25);
+  const p75 = percentile(sorted, 0.75);
+
+  return {
+    count: sorted.length,
+    median: percentile(sorted, 0.5),
+    mean,
+    min: sorted[0],
+    max: sorted[sorted.length - 1],
+    stdev: Math.sqrt(variance),
+    p25,
+    p75,
+    iqr: p75 - p25
+  };
+};
+
+module.exports = {
+  percentile,
+  median,
+  summarize
+};
@@ -0,0 +1,49 @@
+const fs = require('fs');
+const path = require('path');
+
+// Cluster workers keep their on-disk caches in directories of their own,
+// named by slot and pid. A restart forks the replacement into the same slot
+// while the old worker is still draining, so a directory is only ever removed
+// once the process that owns it has exited.
+const WORKER_DIR_PATTERN = /^worker-(\d+)(?:-(\d+))?$/;
+
+const isRunning = (pid) => {
+  try {
+    process.kill(pid, 0);
+    return true;
+  } catch (error) {
+    // EPERM: the process exists but belongs to someone else
+    return error.code === 'EPERM';
+  }
+};
+
+// This process's directory under root; root itself outside cluster mode
+const workerDir = (root, { slot = process.env.CLUSTER_WORKER_SLOT, pid = process.pid } = {}) => (
+  slot ? path.join(root, `worker-${slot}-${pid}`) : root
+);
+
+// Remove the directories under root of workers that are no longer running.
+// Directories named by slot alone predate pids and have no owner to check.
+const sweepWorkerDirs = async (root) => {
+  let names;
+  try {
+    names = await fs.promises.readdir(root);
+  } catch (error) {
+    if (error.code === 'ENOENT') return [];
+    throw error;
+  }
+
+  const stale = names.filter((name) => {
+    const match = WORKER_DIR_PATTERN.exec(name);
+    return match && (!match[2] || !isRunning(parseInt(match[2], 10)));
+  });
+  await Promise.all(stale.map(name => (
+    fs.promises.rm(path.join(root, name), { recursive: true, force: true }).catch(() => {})
+  )));
+  return stale;
+};
+
+module.exports = {
+  workerDir,
+  sweepWorkerDirs
+};
@@ -0,0 +1,14 @@
+const { parentPort } = require('worker_threads');
+const bcrypt = require('bcryptjs');
+
+// Runs bcrypt off the main event loop; one task at a time per thread
+parentPort.on('message', ({ op, password, hash, cost }) => {
+  try {
+    const result = op === 'hash'
+      ? bcrypt.hashSync(password, bcrypt.genSaltSync(cost))
+      : bcrypt.compareSync(password, hash);
+    parentPort.postMessage({ result });
+  } catch (error) {
+    parentPort.postMessage({ error: error.message });
+  }
+});
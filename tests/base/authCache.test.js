@@ -0,0 +1,30 @@
+const authCache = require('../../server/services/authCache');
+
+describe('auth cache', () => {
+  test('returns cached principals until the user is invalidated', () => {
+    authCache.set('token-a', { _id: 'user-1', role: 'student', isActive: true });
+    authCache.set('token-b', { _id: 'user-1', role: 'student', isActive: true });
+    authCache.set('token-c', { _id: 'user-2', role: 'admin', isActive: true });
+
+    expect(authCache.get('token-a').role).toBe('student');
+    authCache.invalidateUser('user-1');
+
+    expect(authCache.get('token-a')).toBeUndefined();
+    expect(authCache.get('token-b')).toBeUndefined();
+    expect(authCache.get('token-c').role).toBe('admin');
+  });
+
+  test('does not store lookups that raced with an invalidation', () => {
+    const startEpoch = authCache.currentEpoch();
+    authCache.invalidateUser('user-3');
+    authCache.set('token-d', { _id: 'user-3', role: 'student', isActive: true }, { startEpoch });
+
+    expect(authCache.get('token-d')).toBeUndefined();
+  });
+
+  test('never outlives the token expiry', () => {
+    authCache.set('token-e', { _id: 'user-4', role: 'student', isActive: true }, { exp: Math.floor(Date.now() / 1000) - 1 });
+
+    expect(authCache.get('token-e')).toBeUndefined();
+  });
+});
@@ -0,0 +1,45 @@
+const fs = require('fs');
+const os = require('os');
+const path = require('path');
+
+const scratch = fs.mkdtempSync(path.join(os.tmpdir(), 'benchmark-test-'));
+process.env.COMPILER_SCRATCH_DIR = scratch;
+
+const benchmark = require('../../server/services/benchmark');
+const runner = require('../../server/services/runner');
+const { scheduler } = require('../../server/services/scheduler');
+
+jest.setTimeout(60000);
+
+const ECHO = '#include <stdio.h>\nint main(void) { int n; if (scanf("%d", &n) != 1) return 1; printf("%d\\n", n); return 0; }';
+
+describe('benchmark.compareBinaries', () => {
+  const binaryPath = path.join(scratch, 'echo');
+
+  beforeAll(async () => {
+    const result = await runner.compile(ECHO, binaryPath);
+    if (result.code !== 0) throw new Error(result.stderr);
+  });
+
+  afterAll(() => fs.promises.rm(scratch, { recursive: true, force: true }));
+
+  test('runs the warmup and every trial without going back through the scheduler', async () => {
+    const before = scheduler.getStats();
+    const comparison = await benchmark.compareBinaries({
+      submissionPath: binaryPath,
+      referencePath: binaryPath,
+      inputs: ['1', '2'],
+      trials: 3,
+      warmup: 1
+    });
+
+    expect(comparison.outputsMatch).toBe(true);
+    expect(comparison.submission.timeMs.count).toBe(3);
+    expect(scheduler.getStats().completed).toBe(before.completed);
+  });
+
+  test('clamps user-supplied options', () => {
+    expect(benchmark.normalizeOptions({ trials: 100, warmup: -1 })).toMatchObject({ trials: 20, warmup: 0 });
+    expect(benchmark.normalizeOptions({ generator: 'nope' }).error).toMatch(/Unknown generator/);
+  });
+});
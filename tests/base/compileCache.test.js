@@ -0,0 +1,114 @@
+const fs = require('fs');
+const os = require('os');
+const path = require('path');
+
+const scratch = fs.mkdtempSync(path.join(os.tmpdir(), 'compile-cache-test-'));
+process.env.COMPILER_SCRATCH_DIR = scratch;
+process.env.COMPILE_CACHE_DIR = path.join(scratch, 'cache');
+process.env.COMPILE_CACHE_MAX_ENTRIES = '1';
+
+const compileCache = require('../../server/services/compileCache');
+
+jest.setTimeout(30000);
+
+const program = value => `int main(void) { return ${value}; }\n`;
+
+describe('compileCache', () => {
+  afterAll(() => fs.promises.rm(scratch, { recursive: true, force: true }));
+
+  test('compiles once and serves later lookups from the cache', async () => {
+    const first = await compileCache.getOrCompile(program(0));
+    first.release();
+    const second = await compileCache.getOrCompile(program(0));
+    second.release();
+
+    expect(first.cached).toBe(false);
+    expect(second.cached).toBe(true);
+    expect(second.binaryPath).toBe(first.binaryPath);
+  });
+
+  test('a late release never removes a newer build of the same key', async () => {
+    const pinned = await compileCache.getOrCompile(program(1));
+    // Evicts the pinned build, then rebuilds the same source
+    (await compileCache.getOrCompile(program(2))).release();
+    const rebuilt = await compileCache.getOrCompile(program(1));
+
+    expect(rebuilt.binaryPath).not.toBe(pinned.binaryPath);
+    pinned.release();
+    await new Promise(resolve => setTimeout(resolve, 50));
+
+    expect(fs.existsSync(pinned.binaryPath)).toBe(false);
+    expect(fs.existsSync(rebuilt.binaryPath)).toBe(true);
+    rebuilt.release();
+  });
+
+  test('rebuilds a cached binary that has disappeared from disk', async () => {
+    const built = await compileCache.getOrCompile(program(3));
+    built.release();
+    await fs.promises.unlink(built.binaryPath);
+
+    const rebuilt = await compileCache.getOrCompile(program(3));
+
+    expect(rebuilt.cached).toBe(false);
+    expect(fs.existsSync(rebuilt.binaryPath)).toBe(true);
+    rebuilt.release();
+  });
+});
+
+describe('compileCache with a byte budget smaller than one binary', () => {
+  let tinyCache;
+
+  beforeAll(() => {
+    jest.isolateModules(() => {
+      process.env.COMPILE_CACHE_DIR = path.join(scratch, 'tiny');
+      process.env.COMPILE_CACHE_MAX_BYTES = '1';
+      tinyCache = require('../../server/services/compileCache');
+    });
+    delete process.env.COMPILE_CACHE_MAX_BYTES;
+  });
+
+  test('still hands the fresh build to every waiting request', async () => {
+    const [first, second] = await Promise.all([
+      tinyCache.getOrCompile(program(4)),
+      tinyCache.getOrCompile(program(4))
+    ]);
+
+    expect(first.success).toBe(true);
+    expect(second.binaryPath).toBe(first.binaryPath);
+    expect(fs.existsSync(first.binaryPath)).toBe(true);
+    expect(tinyCache.getStats()).toMatchObject({ misses: 1, coalesced: 1, entries: 0 });
+
+    first.release();
+    second.release();
+    await new Promise(resolve => setTimeout(resolve, 50));
+    expect(fs.existsSync(first.binaryPath)).toBe(false);
+  });
+});
+
+describe('compileCache in a cluster worker', () => {
+  const root = path.join(scratch, 'cluster');
+  // pid 1 is always running, so this stands in for the worker being replaced
+  const draining = path.join(root, 'worker-0-1');
+  let workerCache;
+
+  beforeAll(() => {
+    fs.mkdirSync(draining, { recursive: true });
+    fs.writeFileSync(path.join(draining, `${'a'.repeat(64)}-00000000-0000-0000-0000-000000000000`), '');
+    fs.writeFileSync(path.join(draining, 'build.partial'), '');
+    jest.isolateModules(() => {
+      process.env.COMPILE_CACHE_DIR = root;
+      process.env.CLUSTER_WORKER_SLOT = '0';
+      workerCache = require('../../server/services/compileCache');
+    });
+    delete process.env.CLUSTER_WORKER_SLOT;
+  });
+
+  test('builds into its own directory and leaves the draining worker alone', async () => {
+    const built = await workerCache.getOrCompile(program(5));
+
+    expect(path.dirname(built.binaryPath)).toBe(path.join(root, `worker-0-${process.pid}`));
+    expect(fs.readdirSync(draining).sort()).toEqual([`${'a'.repeat(64)}-00000000-0000-0000-0000-000000000000`, 'build.partial']);
+    built.release();
+  });
+});
+
@@ -0,0 +1,61 @@
+const fs = require('fs');
+const os = require('os');
+const path = require('path');
+
+const scratch = fs.mkdtempSync(path.join(os.tmpdir(), 'complexity-profiler-test-'));
+process.env.COMPILER_SCRATCH_DIR = scratch;
+
+const { parseComplexity, fitComplexity, generateInput, profileBinary } = require('../../server/services/complexityProfiler');
+const runner = require('../../server/services/runner');
+const { scheduler } = require('../../server/services/scheduler');
+
+const samplesFor = (fn) => [1000, 2000, 4000, 8000, 16000, 32000].map(n => ({ n, timeMs: 1.5 + fn(n) }));
+
+describe('complexity profiler', () => {
+  test('parses common Big-O notations', () => {
+    expect(parseComplexity('O(n²)')).toBe('O(n^2)');
+    expect(parseComplexity('O(N log N)')).toBe('O(n log n)');
+    expect(parseComplexity('O(n*log(n))')).toBe('O(n log n)');
+    expect(parseComplexity('O(log n)')).toBe('O(log n)');
+    expect(parseComplexity('O(V+E)')).toBeNull();
+  });
+
+  test('fits timings to their growth class', () => {
+    expect(fitComplexity(samplesFor(n => n / 1000)).estimated).toBe('O(n)');
+    expect(fitComplexity(samplesFor(n => (n * Math.log2(n)) / 10000)).estimated).toBe('O(n log n)');
+    expect(fitComplexity(samplesFor(n => (n * n) / 1e6)).estimated).toBe('O(n^2)');
+    expect(fitComplexity(samplesFor(() => 0)).estimated).toBe('O(1)');
+  });
+
+  test('needs at least three samples', () => {
+    expect(fitComplexity([{ n: 1, timeMs: 1 }, { n: 2, timeMs: 2 }])).toBeNull();
+  });
+
+  test('generates reproducible array inputs', () => {
+    const input = generateInput('array', 5);
+    expect(input).toBe(generateInput('array', 5));
+    expect(input.split('\n')[0]).toBe('5');
+    expect(input.split('\n')[1].split(' ')).toHaveLength(5);
+  });
+});
+
+describe('complexity profiler runs', () => {
+  const binaryPath = path.join(scratch, 'sum');
+
+  beforeAll(async () => {
+    const code = '#include <stdio.h>\nint main(void) { long n, x, s = 0; scanf("%ld", &n); while (n-- > 0 && scanf("%ld", &x) == 1) s += x; printf("%ld\\n", s); return 0; }';
+    await runner.compile(code, binaryPath);
+  });
+
+  afterAll(() => fs.promises.rm(scratch, { recursive: true, force: true }));
+
+  test('samples every size without going back through the scheduler', async () => {
+    const before = scheduler.getStats();
+    const profile = await profileBinary({ binaryPath, sizes: [10, 100, 1000], trials: 2 });
+
+    expect(profile.stoppedReason).toBeNull();
+    expect(profile.samples.map(sample => sample.n)).toEqual([10, 100, 1000]);
+    expect(scheduler.getStats().completed).toBe(before.completed);
+    expect(scheduler.getStats().rejected).toBe(before.rejected);
+  });
+});
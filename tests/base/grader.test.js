@@ -0,0 +1,113 @@
+const fs = require('fs');
+const os = require('os');
+const path = require('path');
+
+const scratch = fs.mkdtempSync(path.join(os.tmpdir(), 'grader-test-'));
+process.env.COMPILER_SCRATCH_DIR = scratch;
+
+const { gradeSubmission, describeCase, normalizeOutput } = require('../../server/services/grader');
+const { scheduler } = require('../../server/services/scheduler');
+
+jest.setTimeout(60000);
+
+// Echoes the integer it reads, doubled
+const DOUBLER = `
+#include <stdio.h>
+int main(void) {
+  int n;
+  if (scanf("%d", &n) != 1) return 1;
+  printf("%d\\n", n * 2);
+  return 0;
+}
+`;
+
+const cases = [
+  { input: '1', expectedOutput: '2' },
+  { input: '21', expectedOutput: '42', isHidden: true, description: 'secret' }
+];
+
+const grade = (code, testCases = cases, options = {}) => gradeSubmission({
+  code,
+  testCases,
+  owner: 'grader-test',
+  timeout: 1000,
+  ...options
+});
+
+describe('grader', () => {
+  afterAll(() => fs.promises.rm(scratch, { recursive: true, force: true }));
+
+  test('accepts a correct program', async () => {
+    const grading = await grade(DOUBLER);
+
+    expect(grading).toMatchObject({ verdict: 'AC', passed: 2, total: 2 });
+    expect(grading.results.map(result => result.verdict)).toEqual(['AC', 'AC']);
+  });
+
+  test('reports wrong answers', async () => {
+    const grading = await grade(DOUBLER.replace('n * 2', 'n * 3'));
+
+    expect(grading).toMatchObject({ verdict: 'WA', passed: 0, total: 2 });
+  });
+
+  test('reports runtime errors', async () => {
+    const grading = await grade('int main(void) { int *p = 0; return *p; }', [{ input: '', expectedOutput: '' }]);
+
+    expect(grading.verdict).toBe('RE');
+  });
+
+  test('reports time limit exceeded', async () => {
+    const grading = await grade('int main(void) { for (;;) {} }', [{ input: '', expectedOutput: '' }], { timeout: 300 });
+
+    expect(grading.verdict).toBe('TLE');
+  });
+
+  test('reports compilation errors without running anything', async () => {
+    const grading = await grade('int main(void) { return }');
+
+    expect(grading.verdict).toBe('CE');
+    expect(grading.compilationError).toMatch(/error/);
+    expect(grading.results).toEqual([]);
+  });
+
+  test('ignores trailing whitespace and line endings', async () => {
+    expect(normalizeOutput('1 \r\n2\t\r\n\r\n')).toBe('1\n2');
+
+    const grading = await grade(
+      '#include <stdio.h>\nint main(void) { printf("1  \\r\\n2\\n\\n"); return 0; }',
+      [{ input: '', expectedOutput: '1\n2' }]
+    );
+    expect(grading.verdict).toBe('AC');
+  });
+
+  test('hides everything but the verdict and timing of hidden cases', async () => {
+    const run = { stdout: '42\n', stderr: 'oops', usage: { wallMs: 5 } };
+    const hidden = describeCase(cases[1], 1, 'AC', run);
+    const visible = describeCase(cases[0], 0, 'WA', run);
+
+    expect(hidden).toEqual({ index: 1, hidden: true, verdict: 'AC', timeMs: 5, usage: { wallMs: 5 } });
+    expect(visible).toMatchObject({ input: '1', expectedOutput: '2', actualOutput: '42\n', stderr: 'oops' });
+
+    const grading = await grade(DOUBLER);
+    expect(grading.results[1].actualOutput).toBeUndefined();
+    expect(grading.results[1].input).toBeUndefined();
+  });
+
+  test('stops at the first failing case when asked', async () => {
+    const failing = [{ input: '1', expectedOutput: '3' }, ...cases];
+
+    const all = await grade(DOUBLER, failing);
+    const stopped = await grade(DOUBLER, failing, { stopOnFirstFailure: true });
+
+    expect(all.results.map(result => result.verdict)).toEqual(['WA', 'AC', 'AC']);
+    expect(stopped.results.map(result => result.verdict)).toEqual(['WA', 'SKIPPED', 'SKIPPED']);
+    expect(stopped.verdict).toBe('WA');
+  });
+
+  test('grades a whole submission in a single scheduler slot', async () => {
+    const before = scheduler.getStats().completed;
+    await grade(DOUBLER);
+
+    expect(scheduler.getStats().completed - before).toBe(1);
+  });
+});
@@ -36,6 +36,14 @@ describe('Basic API Structure', () => {
     expect(response.body.status).toBe('OK');
   });
 
+  test('Metrics scrapes are not counted by the per-IP limiter', async () => {
+    const health = await request(app).get('/api/health').expect(200);
+    const scrape = await request(app).get('/api/metrics').expect(200);
+
+    expect(health.headers).toHaveProperty('x-ratelimit-limit');
+    expect(scrape.headers).not.toHaveProperty('x-ratelimit-limit');
+  });
+
   test('Non-existent routes should return 404', async () => {
     await request(app)
       .get('/api/non-existent')
@@ -0,0 +1,165 @@
+const { EventEmitter } = require('events');
+const { JobStore, sendAccepted, isJobOwner } = require('../../server/services/jobStore');
+const { openEventStream } = require('../../server/utils/sse');
+
+const flush = () => new Promise(resolve => setImmediate(resolve));
+
+// Just enough of an Express response for sendAccepted and openEventStream
+const fakeResponse = () => {
+  const res = new EventEmitter();
+  res.headers = {};
+  res.chunks = [];
+  res.status = (code) => {
+    res.statusCode = code;
+    return res;
+  };
+  res.json = (body) => {
+    res.body = body;
+    return res;
+  };
+  res.set = (headers) => Object.assign(res.headers, headers);
+  res.flushHeaders = () => {};
+  res.write = (chunk) => {
+    res.chunks.push(chunk);
+    return true;
+  };
+  res.end = () => {
+    res.ended = true;
+  };
+  return res;
+};
+
+describe('JobStore', () => {
+  let store;
+
+  beforeEach(() => {
+    store = new JobStore({ ttlMs: 1000 });
+  });
+
+  afterEach(() => clearInterval(store.sweeper));
+
+  test('moves a job from queued through running to completed', async () => {
+    const job = store.create({ type: 'compile', owner: 'user-1' });
+    const statuses = [];
+    store.subscribe(job.id, state => statuses.push(state.status));
+
+    expect(job.status).toBe('queued');
+    let finish;
+    store.run(job, (markRunning) => {
+      markRunning();
+      return new Promise((resolve) => {
+        finish = resolve;
+      });
+    });
+    await flush();
+    expect(store.get(job.id).status).toBe('running');
+
+    finish({ output: 'hello' });
+    await flush();
+
+    expect(statuses).toEqual(['running', 'completed']);
+    expect(store.toJSON(job)).toMatchObject({ status: 'completed', result: { output: 'hello' }, error: null });
+    expect(store.toJSON(job).expiresAt.getTime()).toBe(job.finishedAt.getTime() + 1000);
+  });
+
+  test('records failures without leaking internal errors', async () => {
+    const original = console.error;
+    console.error = () => {};
+    const job = store.run(store.create({ type: 'submission', owner: 'user-1' }), () => {
+      throw new Error('database exploded');
+    });
+    await flush();
+    console.error = original;
+
+    expect(job.status).toBe('failed');
+    expect(job.error).toBe('Job failed unexpectedly.');
+    expect(store.getStats()).toMatchObject({ failed: 1, retained: 1 });
+  });
+
+  test('drops finished jobs once their results expire', async () => {
+    const finished = store.run(store.create({ type: 'compile', owner: 'a' }), () => 'done');
+    const running = store.create({ type: 'compile', owner: 'a' });
+    await flush();
+
+    finished.finishedAt = new Date(Date.now() - 1001);
+    store.sweep();
+
+    expect(store.get(finished.id)).toBeUndefined();
+    expect(store.get(running.id)).toBe(running);
+  });
+
+  test('keeps at most maxRetained jobs, dropping finished ones first', async () => {
+    const small = new JobStore({ ttlMs: 1000, maxRetained: 2 });
+    const first = small.run(small.create({ type: 'compile', owner: 'a' }), () => 'done');
+    await flush();
+    const second = small.create({ type: 'compile', owner: 'a' });
+    const third = small.create({ type: 'compile', owner: 'a' });
+    clearInterval(small.sweeper);
+
+    expect(small.get(first.id)).toBeUndefined();
+    expect(small.get(second.id)).toBe(second);
+    expect(small.get(third.id)).toBe(third);
+  });
+
+  test('streams status changes to an event stream subscriber until the job finishes', async () => {
+    const job = store.create({ type: 'compile', owner: 'a' });
+    const res = fakeResponse();
+    const stream = openEventStream(res);
+    store.subscribe(job.id, (state) => {
+      stream.send('status', state);
+      if (store.isFinished(state)) stream.close();
+    });
+
+    store.run(job, (markRunning) => {
+      markRunning();
+      return 'done';
+    });
+    await flush();
+
+    expect(res.headers['Content-Type']).toBe('text/event-stream');
+    expect(res.chunks).toHaveLength(2);
+    expect(res.chunks[0]).toMatch(/^event: status\ndata: .*"status":"running"/);
+    expect(res.chunks[1]).toMatch(/"status":"completed"/);
+    expect(res.ended).toBe(true);
+    expect(store.listenerCount(job.id)).toBe(0);
+  });
+
+  test('answers with 202 and where to find the job', () => {
+    const job = store.create({ type: 'compile', owner: 'a' });
+    const res = fakeResponse();
+    sendAccepted(res, job);
+
+    expect(res.statusCode).toBe(202);
+    expect(res.body).toEqual({
+      message: 'Job accepted.',
+      jobId: job.id,
+      status: 'queued',
+      statusUrl: `/api/jobs/${job.id}`,
+      eventsUrl: `/api/jobs/${job.id}/events`
+    });
+  });
+
+  test('counts only unfinished jobs running in this process as active', async () => {
+    const finished = store.run(store.create({ type: 'compile', owner: 'a' }), () => 'done');
+    store.create({ type: 'compile', owner: 'a' });
+    store.mirror({ ...store.toJSON(finished), id: 'elsewhere', status: 'running', owner: 'b' });
+    await flush();
+
+    expect(store.get('elsewhere').status).toBe('running');
+    expect(store.activeCount()).toBe(1);
+  });
+
+  test('only the owner can read a job', () => {
+    const userJob = store.create({ type: 'submission', owner: 'user-1' });
+    const anonymousJob = store.create({ type: 'compile', owner: '10.0.0.1' });
+    const owner = { user: { _id: 'user-1' }, ip: '10.0.0.2' };
+    const stranger = { user: { _id: 'user-2' }, ip: '10.0.0.1' };
+    const anonymous = { ip: '10.0.0.3' };
+
+    expect(isJobOwner(userJob, owner)).toBe(true);
+    expect(isJobOwner(userJob, stranger)).toBe(false);
+    expect(isJobOwner(userJob, anonymous)).toBe(false);
+    expect(isJobOwner(anonymousJob, stranger)).toBe(true);
+    expect(isJobOwner(anonymousJob, anonymous)).toBe(false);
+  });
+});
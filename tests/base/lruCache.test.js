@@ -0,0 +1,54 @@
+const LRUCache = require('../../server/utils/lruCache');
+
+describe('LRUCache', () => {
+  test('evicts the least recently used entry when full', () => {
+    const evicted = [];
+    const cache = new LRUCache({ maxEntries: 2, onEvict: (key) => evicted.push(key) });
+
+    cache.set('a', 1);
+    cache.set('b', 2);
+    cache.get('a');
+    cache.set('c', 3);
+
+    expect(cache.has('a')).toBe(true);
+    expect(cache.has('b')).toBe(false);
+    expect(evicted).toEqual(['b']);
+  });
+
+  test('respects the total size bound', () => {
+    const cache = new LRUCache({ maxSize: 10, sizeOf: (value) => value.length });
+
+    cache.set('a', 'xxxx');
+    cache.set('b', 'xxxx');
+    cache.set('c', 'xxxx');
+
+    expect(cache.size).toBe(2);
+    expect(cache.totalSize).toBe(8);
+    expect(cache.has('a')).toBe(false);
+  });
+
+  test('peek does not change recency', () => {
+    const cache = new LRUCache({ maxEntries: 2 });
+
+    cache.set('a', 1);
+    cache.set('b', 2);
+    cache.peek('a');
+    cache.set('c', 3);
+
+    expect(cache.has('a')).toBe(false);
+  });
+
+  test('expires entries after their time to live', () => {
+    const now = jest.spyOn(Date, 'now').mockReturnValue(1000);
+    const cache = new LRUCache({ ttlMs: 100 });
+
+    cache.set('a', 1);
+    cache.set('b', 2, 0);
+    now.mockReturnValue(1101);
+
+    expect(cache.get('a')).toBeUndefined();
+    expect(cache.get('b')).toBe(2);
+    expect(cache.size).toBe(1);
+    now.mockRestore();
+  });
+});
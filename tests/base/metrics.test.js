@@ -0,0 +1,44 @@
+const { Registry } = require('../../server/utils/metrics');
+
+describe('metrics registry', () => {
+  test('renders counters and gauges with escaped labels', () => {
+    const registry = new Registry();
+    const requests = registry.counter({ name: 'requests_total', help: 'Requests.', labelNames: ['route'] });
+    registry.gauge({ name: 'queue_depth', help: 'Queue depth.', collect: gauge => gauge.set({}, 3) });
+
+    requests.inc({ route: '/api/"x"' });
+    requests.inc({ route: '/api/"x"' }, 2);
+
+    expect(registry.render()).toBe([
+      '# HELP requests_total Requests.',
+      '# TYPE requests_total counter',
+      'requests_total{route="/api/\\"x\\""} 3',
+      '# HELP queue_depth Queue depth.',
+      '# TYPE queue_depth gauge',
+      'queue_depth 3',
+      ''
+    ].join('\n'));
+  });
+
+  test('renders cumulative histogram buckets', () => {
+    const registry = new Registry();
+    const latency = registry.histogram({ name: 'latency_seconds', help: 'Latency.', labelNames: ['route'], buckets: [0.1, 1] });
+
+    latency.observe({ route: '/a' }, 0.05);
+    latency.observe({ route: '/a' }, 0.5);
+    latency.observe({ route: '/a' }, 2);
+
+    const lines = registry.render().split('\n');
+    expect(lines).toContain('latency_seconds_bucket{route="/a",le="0.1"} 1');
+    expect(lines).toContain('latency_seconds_bucket{route="/a",le="1"} 2');
+    expect(lines).toContain('latency_seconds_bucket{route="/a",le="+Inf"} 3');
+    expect(lines).toContain('latency_seconds_sum{route="/a"} 2.55');
+    expect(lines).toContain('latency_seconds_count{route="/a"} 3');
+  });
+
+  test('refuses duplicate metric names', () => {
+    const registry = new Registry();
+    registry.counter({ name: 'a_total', help: 'A.' });
+    expect(() => registry.counter({ name: 'a_total', help: 'A.' })).toThrow();
+  });
+});
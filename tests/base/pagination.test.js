@@ -0,0 +1,23 @@
+const { parseParams, encodeCursor, decodeCursor, PaginationError } = require('../../server/utils/pagination');
+
+describe('pagination', () => {
+  test('clamps page and limit', () => {
+    expect(parseParams({ page: '3', limit: '500' })).toMatchObject({ page: 3, limit: 100, cursor: null, count: 'cached' });
+    expect(parseParams({ page: '-1', limit: 'x' })).toMatchObject({ page: 1, limit: 10 });
+  });
+
+  test('round-trips cursors', () => {
+    const doc = { _id: '64b7f0c2a1b2c3d4e5f60718', createdAt: new Date('2024-01-02T03:04:05Z') };
+    const cursor = decodeCursor(encodeCursor(doc, 'next', 4));
+
+    expect(cursor.id).toBe(doc._id);
+    expect(cursor.createdAt.getTime()).toBe(doc.createdAt.getTime());
+    expect(cursor.direction).toBe('next');
+    expect(cursor.page).toBe(4);
+  });
+
+  test('rejects tampered cursors and unknown count modes', () => {
+    expect(() => decodeCursor('not-a-cursor')).toThrow(PaginationError);
+    expect(() => parseParams({ count: 'sometimes' })).toThrow(PaginationError);
+  });
+});
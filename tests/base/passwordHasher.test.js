@@ -0,0 +1,37 @@
+const { PasswordHasher } = require('../../server/services/passwordHasher');
+
+describe('PasswordHasher', () => {
+  let hasher;
+
+  beforeEach(() => {
+    hasher = new PasswordHasher({ threads: 2, maxQueue: 10, cost: 4 });
+  });
+
+  afterEach(() => hasher.close());
+
+  test('hashes on worker threads and verifies passwords', async () => {
+    const hash = await hasher.hash('secret123');
+
+    expect(hash).not.toBe('secret123');
+    expect(await hasher.compare('secret123', hash)).toBe(true);
+    expect(await hasher.compare('wrong', hash)).toBe(false);
+    expect(hasher.getStats()).toMatchObject({ completed: 3, failed: 0, queued: 0 });
+  });
+
+  test('flags hashes made with a different cost', async () => {
+    const hash = await hasher.hash('secret123');
+
+    expect(hasher.needsRehash(hash)).toBe(false);
+    expect(new PasswordHasher({ cost: 5 }).needsRehash(hash)).toBe(true);
+  });
+
+  test('rejects work beyond the queue bound', async () => {
+    const small = new PasswordHasher({ threads: 1, maxQueue: 1, cost: 4 });
+    const first = small.hash('a');
+    const second = small.hash('b');
+
+    await expect(small.hash('c')).rejects.toMatchObject({ status: 503 });
+    await Promise.all([first, second]);
+    await small.close();
+  });
+});
@@ -0,0 +1,91 @@
+const DataStructure = require('../../server/models/DataStructure');
+const { PrerequisiteGraph, CatalogGraph, toNode } = require('../../server/services/prerequisiteGraph');
+
+const catalog = () => {
+  const graph = new PrerequisiteGraph();
+  graph.set(toNode('datastructure', { _id: 'array', name: 'Array' }));
+  graph.set(toNode('datastructure', { _id: 'list', name: 'Linked List', prerequisites: ['array'] }));
+  graph.set(toNode('datastructure', { _id: 'queue', name: 'Queue', prerequisites: ['list', 'array'] }));
+  graph.set(toNode('datastructure', { _id: 'graph', name: 'Graph', prerequisites: ['list'] }));
+  graph.set(toNode('algorithm', { _id: 'bfs', name: 'Breadth-First Search', prerequisites: ['graph', 'queue'] }));
+  return graph;
+};
+
+describe('prerequisite graph', () => {
+  test('orders a learning path with prerequisites first', () => {
+    const path = catalog().path('bfs');
+
+    expect(path).toHaveLength(5);
+    expect(path[path.length - 1]).toBe('bfs');
+    expect(path[0]).toBe('array');
+    expect(path.indexOf('list')).toBeLessThan(path.indexOf('graph'));
+    expect(path.indexOf('list')).toBeLessThan(path.indexOf('queue'));
+    expect(catalog().path('missing')).toBeNull();
+  });
+
+  test('detects prerequisites that would close a cycle', () => {
+    const graph = catalog();
+
+    expect(graph.findCycle('array', ['queue'])).toEqual(['array', 'queue', 'list', 'array']);
+    expect(graph.findCycle('array', ['array'])).toEqual(['array', 'array']);
+    expect(graph.findCycle('graph', ['queue'])).toBeNull();
+  });
+
+  test('lists items whose prerequisites are all completed', () => {
+    const graph = catalog();
+
+    expect(graph.unlocked([]).map(node => node.id)).toEqual(['array']);
+    expect(graph.unlocked(['array', 'list']).map(node => node.id)).toEqual(['queue', 'graph']);
+    expect(graph.unlocked(['array', 'list', 'queue', 'graph'], { itemType: 'algorithm' }).map(node => node.id)).toEqual(['bfs']);
+  });
+
+  test('drops memoized paths when an item changes', () => {
+    const graph = catalog();
+    expect(graph.path('graph')).toEqual(['array', 'list', 'graph']);
+
+    graph.set(toNode('datastructure', { _id: 'graph', name: 'Graph', prerequisites: ['array'] }));
+    expect(graph.path('graph')).toEqual(['array', 'graph']);
+
+    graph.delete('array');
+    expect(graph.path('graph')).toEqual(['graph']);
+  });
+
+  test('keeps memoized paths that do not pass through a changed item', () => {
+    const graph = catalog();
+    const queuePath = graph.path('queue');
+    graph.path('graph');
+
+    graph.set(toNode('datastructure', { _id: 'graph', name: 'Graph', prerequisites: [] }));
+
+    expect(graph.path('queue')).toBe(queuePath);
+    expect(graph.path('bfs')).toEqual(['graph', 'array', 'list', 'queue', 'bfs']);
+  });
+});
+
+describe('catalog graph prerequisite checks', () => {
+  const EXISTING = '64b0000000000000000000aa';
+  const MISSING = '64b0000000000000000000bb';
+
+  beforeEach(() => {
+    jest.spyOn(DataStructure, 'find').mockReturnValue({
+      select: () => ({ lean: () => Promise.resolve([{ _id: EXISTING }]) })
+    });
+  });
+
+  afterEach(() => jest.restoreAllMocks());
+
+  test('reports malformed and missing ids before they reach a query cast', async () => {
+    const graph = new CatalogGraph();
+
+    expect(await graph.unknownPrerequisites([EXISTING])).toEqual([]);
+    expect(await graph.unknownPrerequisites(['not-an-id', EXISTING, MISSING])).toEqual(['not-an-id', MISSING]);
+    expect(DataStructure.find).toHaveBeenLastCalledWith({ _id: { $in: [EXISTING, MISSING] } });
+  });
+
+  test('never queries when no id is well formed', async () => {
+    const graph = new CatalogGraph();
+
+    expect(await graph.unknownPrerequisites('nope')).toEqual(['nope']);
+    expect(DataStructure.find).not.toHaveBeenCalled();
+  });
+});
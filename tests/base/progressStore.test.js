@@ -0,0 +1,229 @@
+const Progress = require('../../server/models/Progress');
+const User = require('../../server/models/User');
+const { leaderboard } = require('../../server/services/leaderboard');
+const progressStore = require('../../server/services/progressStore');
+
+const USER_ID = '64b000000000000000000001';
+const ITEM_ID = '64b0000000000000000000aa';
+
+const completion = {
+  userId: USER_ID,
+  itemType: 'algorithm',
+  itemId: ITEM_ID,
+  category: 'sorting',
+  score: 80
+};
+
+// A Mongoose query whose .lean() resolves to value
+const leanQuery = value => ({ lean: () => Promise.resolve(value) });
+
+const duplicateKeyError = () => Object.assign(new Error('E11000 duplicate key error'), { code: 11000 });
+
+describe('progressStore.recordCompletion', () => {
+  beforeEach(() => {
+    jest.spyOn(leaderboard, 'recordScore').mockImplementation(() => {});
+    jest.spyOn(User, 'updateOne').mockResolvedValue({ modifiedCount: 1 });
+    jest.spyOn(User, 'findByIdAndUpdate').mockReturnValue(leanQuery({
+      progress: { totalPoints: 115, level: 1, rollupAt: null }
+    }));
+  });
+
+  afterEach(() => jest.restoreAllMocks());
+
+  test('upserts the row, keeping the best score and the first completion time', async () => {
+    jest.spyOn(Progress, 'updateOne').mockResolvedValue({ upsertedCount: 1, matchedCount: 0 });
+
+    await progressStore.recordCompletion(completion);
+
+    expect(Progress.updateOne).toHaveBeenCalledWith(
+      { user: USER_ID, itemType: 'algorithm', item: ITEM_ID },
+      { $max: { score: 80 }, $setOnInsert: { completedAt: expect.any(Date) } },
+      { upsert: true }
+    );
+  });
+
+  test('awards points and rollups only when the row was created', async () => {
+    jest.spyOn(Progress, 'updateOne').mockResolvedValue({ upsertedCount: 1, matchedCount: 0 });
+
+    const result = await progressStore.recordCompletion(completion);
+
+    expect(result).toEqual({ firstCompletion: true, totalPoints: 115, level: 2 });
+    expect(User.findByIdAndUpdate).toHaveBeenCalledWith(
+      USER_ID,
+      { $inc: { 'progress.totalPoints': 15, 'progress.completed.algorithm': 1, 'progress.byCategory.algorithm.sorting': 1 } },
+      expect.any(Object)
+    );
+    // The level only ever moves up
+    expect(User.updateOne).toHaveBeenCalledWith({ _id: USER_ID }, { $max: { 'progress.level': 2 } });
+  });
+
+  test('repeated completions update the score without paying out again', async () => {
+    jest.spyOn(Progress, 'updateOne').mockResolvedValue({ upsertedCount: 0, matchedCount: 1 });
+
+    const result = await progressStore.recordCompletion(completion);
+
+    expect(result).toEqual({ firstCompletion: false });
+    expect(User.findByIdAndUpdate).not.toHaveBeenCalled();
+  });
+
+  test('retries a lost upsert race as a plain update', async () => {
+    jest.spyOn(Progress, 'updateOne')
+      .mockRejectedValueOnce(duplicateKeyError())
+      .mockResolvedValueOnce({ upsertedCount: 0, matchedCount: 1 });
+
+    const result = await progressStore.recordCompletion(completion);
+
+    expect(Progress.updateOne).toHaveBeenCalledTimes(2);
+    expect(Progress.updateOne.mock.calls[1]).toHaveLength(2);
+    expect(Progress.updateOne.mock.calls[1][1]).toEqual(Progress.updateOne.mock.calls[0][1]);
+    expect(result.firstCompletion).toBe(false);
+    expect(User.findByIdAndUpdate).not.toHaveBeenCalled();
+  });
+
+  test('passes other write errors on', async () => {
+    jest.spyOn(Progress, 'updateOne').mockRejectedValue(new Error('not primary'));
+
+    await expect(progressStore.recordCompletion(completion)).rejects.toThrow('not primary');
+    expect(Progress.updateOne).toHaveBeenCalledTimes(1);
+  });
+});
+
+describe('progressStore.migrateEmbeddedProgress', () => {
+  const completedAt = new Date('2023-01-02T03:04:05Z');
+  const legacyUsers = [
+    {
+      _id: USER_ID,
+      progress: {
+        completedAlgorithms: [{ algorithmId: ITEM_ID, score: 90, completedAt }, { score: 10 }],
+        completedDataStructures: [{ dataStructureId: '64b0000000000000000000bb' }]
+      }
+    },
+    { _id: '64b000000000000000000002', progress: { completedAlgorithms: [] } }
+  ];
+
+  let cursorFilter;
+
+  beforeEach(() => {
+    jest.spyOn(User.collection, 'find').mockImplementation((filter) => {
+      cursorFilter = filter;
+      return { batchSize: () => legacyUsers };
+    });
+    jest.spyOn(User.collection, 'updateOne').mockResolvedValue({ modifiedCount: 1 });
+    jest.spyOn(Progress, 'bulkWrite').mockResolvedValue({});
+  });
+
+  afterEach(() => jest.restoreAllMocks());
+
+  test('copies embedded completions into Progress rows and drops the arrays', async () => {
+    const result = await progressStore.migrateEmbeddedProgress();
+
+    expect(result).toEqual({ migratedUsers: 2, migratedItems: 2 });
+    expect(cursorFilter).toEqual({
+      $or: [
+        { 'progress.completedAlgorithms': { $exists: true } },
+        { 'progress.completedDataStructures': { $exists: true } }
+      ]
+    });
+
+    // Entries without an id are skipped; users with nothing to copy write nothing
+    expect(Progress.bulkWrite).toHaveBeenCalledTimes(1);
+    const [operations, options] = Progress.bulkWrite.mock.calls[0];
+    expect(options).toEqual({ ordered: false });
+    expect(operations).toHaveLength(2);
+    expect(operations[0].updateOne).toMatchObject({
+      filter: { user: USER_ID, itemType: 'algorithm' },
+      update: { $max: { score: 90 }, $min: { completedAt } },
+      upsert: true
+    });
+    expect(String(operations[0].updateOne.filter.item)).toBe(ITEM_ID);
+    expect(operations[1].updateOne).toMatchObject({
+      filter: { itemType: 'datastructure' },
+      update: { $max: { score: 0 }, $min: { completedAt: expect.any(Date) } }
+    });
+
+    expect(User.collection.updateOne).toHaveBeenCalledTimes(2);
+    expect(User.collection.updateOne).toHaveBeenCalledWith(
+      { _id: USER_ID },
+      { $unset: { 'progress.completedAlgorithms': '', 'progress.completedDataStructures': '', 'progress.rollupAt': '' } }
+    );
+  });
+
+  test('is idempotent because every write is an upsert with $max/$min', async () => {
+    await progressStore.migrateEmbeddedProgress();
+    await progressStore.migrateEmbeddedProgress();
+
+    const [first, second] = Progress.bulkWrite.mock.calls.map(([operations]) => operations);
+    expect(second).toEqual(first);
+    first.forEach(({ updateOne }) => {
+      expect(updateOne.upsert).toBe(true);
+      expect(Object.keys(updateOne.update)).toEqual(['$max', '$min']);
+    });
+  });
+});
+
+describe('progressStore.rebuildRollups', () => {
+  const groups = [
+    { _id: { itemType: 'algorithm', category: 'sorting' }, count: 3 },
+    { _id: { itemType: 'algorithm', category: 'graphs' }, count: 1 },
+    { _id: { itemType: 'datastructure', category: 'trees' }, count: 2 }
+  ];
+  const storedUser = progress => jest.spyOn(User, 'findById').mockReturnValue({ select: () => leanQuery({ progress }) });
+
+  beforeEach(() => {
+    jest.spyOn(Progress, 'aggregate').mockResolvedValue(groups);
+    jest.spyOn(leaderboard, 'recordCategories').mockImplementation(() => {});
+  });
+
+  afterEach(() => jest.restoreAllMocks());
+
+  test('writes the counts only if the user has not changed since the snapshot', async () => {
+    storedUser({ totalPoints: 40 });
+    jest.spyOn(User, 'updateOne').mockResolvedValue({ modifiedCount: 1 });
+
+    const rollups = await progressStore.rebuildRollups(USER_ID);
+
+    expect(rollups).toEqual({
+      completed: { algorithm: 4, datastructure: 2 },
+      byCategory: { algorithm: { sorting: 3, graphs: 1 }, datastructure: { trees: 2 } }
+    });
+    expect(User.updateOne).toHaveBeenCalledWith(
+      { _id: USER_ID, 'progress.rollupAt': null, 'progress.totalPoints': 40 },
+      { $set: { 'progress.completed': rollups.completed, 'progress.byCategory': rollups.byCategory, 'progress.rollupAt': expect.any(Date) } }
+    );
+    expect(leaderboard.recordCategories).toHaveBeenCalledWith(USER_ID, rollups.byCategory);
+  });
+
+  test('skips users whose points moved while counting', async () => {
+    storedUser({ totalPoints: 40 });
+    jest.spyOn(User, 'updateOne').mockResolvedValue({ modifiedCount: 0 });
+
+    expect(await progressStore.rebuildRollups(USER_ID)).toBeNull();
+    expect(leaderboard.recordCategories).not.toHaveBeenCalled();
+  });
+
+  test('never overwrites rollups that are already being kept', async () => {
+    storedUser({ totalPoints: 40, rollupAt: new Date() });
+    jest.spyOn(User, 'updateOne').mockResolvedValue({ modifiedCount: 0 });
+
+    expect(await progressStore.rebuildRollups(USER_ID)).toBeNull();
+    expect(Progress.aggregate).not.toHaveBeenCalled();
+    expect(User.updateOne).not.toHaveBeenCalled();
+  });
+
+  test('summaries count users without rollups on the fly without writing', async () => {
+    jest.spyOn(User, 'findById').mockReturnValue({
+      select: () => leanQuery({ progress: { totalPoints: 40, level: 1 } })
+    });
+    jest.spyOn(User, 'updateOne').mockResolvedValue({ modifiedCount: 0 });
+    Progress.aggregate.mockResolvedValueOnce(groups).mockResolvedValueOnce([]);
+
+    const summary = await progressStore.getSummary(USER_ID);
+
+    expect(summary).toMatchObject({
+      completedAlgorithms: 4,
+      completedDataStructures: 2,
+      algorithmsByCategory: { sorting: 3, graphs: 1 }
+    });
+    expect(User.updateOne).not.toHaveBeenCalled();
+  });
+});
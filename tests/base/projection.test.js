@@ -0,0 +1,43 @@
+const { listView, stripHidden } = require('../../server/utils/projection');
+
+const Model = {
+  schema: {
+    paths: {
+      _id: {}, name: {}, description: {}, cCode: {}, testCases: {}, 'complexity.time.best': {}, createdBy: {}, createdAt: {}, __v: {}
+    }
+  }
+};
+const VIEW = { summary: ['name', 'description', 'createdBy', 'createdAt'], populate: { createdBy: 'username' } };
+
+// Records the calls a view makes on a mongoose query
+const fakeQuery = () => {
+  const calls = [];
+  const query = {
+    select: (fields) => { calls.push(['select', fields]); return query; },
+    populate: (path) => { calls.push(['populate', path]); return query; },
+    lean: () => { calls.push(['lean']); return calls; }
+  };
+  return query;
+};
+
+describe('list projection', () => {
+  test('selects the summary fields by default', () => {
+    const calls = listView({}, Model, VIEW).apply(fakeQuery());
+    expect(calls).toEqual([['select', 'name description createdBy createdAt'], ['populate', 'createdBy'], ['lean']]);
+  });
+
+  test('honours fields= and skips populating unselected paths', () => {
+    const calls = listView({ fields: 'name, complexity' }, Model, VIEW).apply(fakeQuery());
+    expect(calls).toEqual([['select', 'name complexity createdAt'], ['lean']]);
+  });
+
+  test('rejects unknown fields and selects everything in detail mode', () => {
+    expect(listView({ fields: 'password' }, Model, VIEW).error).toMatch(/Unknown fields: password/);
+    expect(listView({ detail: 'true' }, Model, VIEW).apply(fakeQuery())[0]).toEqual(['select', '-__v']);
+  });
+
+  test('drops hidden test cases', () => {
+    const doc = stripHidden({ testCases: [{ input: '1', isHidden: false }, { input: '2', isHidden: true }] });
+    expect(doc.testCases).toEqual([{ input: '1', isHidden: false }]);
+  });
+});
@@ -0,0 +1,106 @@
+const request = require('supertest');
+const { shapeOf, summarizePlan } = require('../../server/services/queryProfiler');
+
+describe('query profiler', () => {
+  test('reduces filters to their shape', () => {
+    expect(shapeOf({ category: 'sorting', difficulty: { $in: ['easy', 'medium'] } }))
+      .toEqual({ category: 1, difficulty: { $in: [1] } });
+    expect(shapeOf({ b: 2, a: 1 })).toEqual(shapeOf({ a: 'x', b: 'y' }));
+    expect(shapeOf({ _id: new Date() })).toEqual({ _id: 1 });
+  });
+
+  test('summarizes a collection scan', () => {
+    const plan = summarizePlan({
+      queryPlanner: { winningPlan: { stage: 'SORT', inputStage: { stage: 'COLLSCAN' } } },
+      executionStats: { nReturned: 10, totalDocsExamined: 5000, totalKeysExamined: 0, executionTimeMillis: 42 }
+    });
+
+    expect(plan).toMatchObject({
+      stages: ['SORT', 'COLLSCAN'],
+      collectionScan: true,
+      indexes: [],
+      docsExamined: 5000,
+      returned: 10
+    });
+  });
+
+  test('finds index scans inside aggregate and slot-engine plans', () => {
+    const plan = summarizePlan({
+      stages: [{
+        $cursor: {
+          queryPlanner: {
+            winningPlan: { queryPlan: { stage: 'FETCH', inputStage: { stage: 'IXSCAN', indexName: 'user_1_completedAt_-1' } } }
+          },
+          executionStats: { nReturned: 10, totalDocsExamined: 10, totalKeysExamined: 10 }
+        }
+      }]
+    });
+
+    expect(plan).toMatchObject({
+      stages: ['FETCH', 'IXSCAN'],
+      collectionScan: false,
+      indexes: ['user_1_completedAt_-1'],
+      keysExamined: 10
+    });
+  });
+});
+
+describe('query profiler request attribution', () => {
+  let profiler;
+  let app;
+  const hooks = {};
+
+  // Runs the plugin's hooks around an asynchronous stand-in for a Mongoose query
+  const runQuery = (filter) => {
+    const query = { op: 'findOne', model: { modelName: 'Thing' }, getFilter: () => filter, getOptions: () => ({}) };
+    hooks.pre.call(query);
+    return new Promise(resolve => setImmediate(() => {
+      hooks.post.call(query);
+      resolve();
+    }));
+  };
+
+  beforeAll(() => {
+    jest.isolateModules(() => {
+      process.env.QUERY_PROFILER = 'true';
+      profiler = require('../../server/services/queryProfiler');
+      const express = require('express');
+
+      app = express();
+      app.use(express.json());
+      app.use(profiler.profileRequests);
+      app.post('/things', async (req, res) => {
+        await runQuery({ name: req.body.name });
+        res.json({ ok: true });
+      });
+    });
+    delete process.env.QUERY_PROFILER;
+
+    profiler.plugin({
+      pre: (ops, fn) => {
+        if (Array.isArray(ops)) hooks.pre = fn;
+      },
+      post: (ops, fn) => {
+        if (Array.isArray(ops)) hooks.post = fn;
+      }
+    });
+  });
+
+  test('attributes queries made by a POST handler to its route', async () => {
+    await request(app).post('/things').send({ name: 'stack' }).expect(200);
+
+    const [query] = profiler.report().queries;
+    expect(query).toMatchObject({ model: 'Thing', op: 'findOne', count: 1 });
+    expect(query.routes).toEqual(['POST /things']);
+  });
+
+  test('the server mounts the profiler after its body parsers', () => {
+    const server = require('../../server/index');
+    const { profileRequests } = require('../../server/services/queryProfiler');
+    const names = server._router.stack.map(layer => (layer.handle === profileRequests ? 'profileRequests' : layer.name));
+
+    expect(names.indexOf('profileRequests')).toBeGreaterThan(names.indexOf('jsonParser'));
+    expect(names.indexOf('profileRequests')).toBeGreaterThan(names.indexOf('urlencodedParser'));
+  });
+});
+
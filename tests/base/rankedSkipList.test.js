@@ -0,0 +1,63 @@
+const RankedSkipList = require('../../server/utils/rankedSkipList');
+
+describe('RankedSkipList', () => {
+  test('ranks higher scores first and breaks ties by member', () => {
+    const list = new RankedSkipList();
+    list.set('carol', 20);
+    list.set('alice', 50);
+    list.set('bob', 20);
+
+    expect(list.rank('alice')).toBe(0);
+    expect(list.rank('bob')).toBe(1);
+    expect(list.rank('carol')).toBe(2);
+    expect(list.rank('dave')).toBe(-1);
+  });
+
+  test('moves a member when its score changes', () => {
+    const list = new RankedSkipList();
+    list.set('a', 10);
+    list.set('b', 20);
+    list.set('a', 30);
+
+    expect(list.size).toBe(2);
+    expect(list.score('a')).toBe(30);
+    expect(list.range(0, 2).map(entry => entry.member)).toEqual(['a', 'b']);
+  });
+
+  test('returns pages by offset', () => {
+    const list = new RankedSkipList();
+    for (let i = 0; i < 100; i++) list.set(`m${String(i).padStart(3, '0')}`, i);
+
+    expect(list.range(10, 3)).toEqual([
+      { member: 'm089', score: 89, rank: 10 },
+      { member: 'm088', score: 88, rank: 11 },
+      { member: 'm087', score: 87, rank: 12 }
+    ]);
+    expect(list.range(98, 5)).toHaveLength(2);
+    expect(list.range(100, 5)).toEqual([]);
+  });
+
+  test('keeps ranks consistent after removals', () => {
+    const list = new RankedSkipList();
+    const scores = new Map();
+    for (let i = 0; i < 500; i++) {
+      const member = `u${i}`;
+      const score = Math.floor(Math.random() * 50);
+      list.set(member, score);
+      scores.set(member, score);
+    }
+    for (let i = 0; i < 500; i += 3) {
+      expect(list.remove(`u${i}`)).toBe(true);
+      scores.delete(`u${i}`);
+    }
+    expect(list.remove('u0')).toBe(false);
+
+    const expected = [...scores]
+      .sort(([a, x], [b, y]) => y - x || (a < b ? -1 : 1))
+      .map(([member]) => member);
+
+    expect(list.size).toBe(expected.length);
+    expect(list.range(0, expected.length).map(entry => entry.member)).toEqual(expected);
+    expected.forEach((member, index) => expect(list.rank(member)).toBe(index));
+  });
+});
@@ -0,0 +1,40 @@
+const { TokenBuckets } = require('../../server/services/rateLimitStore');
+const { costOf } = require('../../server/middleware/rateLimit');
+
+const policy = { capacity: 10, refillPerSec: 2 };
+
+describe('token buckets', () => {
+  test('takes tokens until the bucket is empty', () => {
+    const buckets = new TokenBuckets();
+
+    expect(buckets.take('u', 6, policy, 0)).toMatchObject({ allowed: true, remaining: 4 });
+    expect(buckets.take('u', 6, policy, 0)).toMatchObject({ allowed: false, remaining: 4, retryAfterMs: 1000 });
+    expect(buckets.take('other', 6, policy, 0).allowed).toBe(true);
+  });
+
+  test('refills over time up to capacity', () => {
+    const buckets = new TokenBuckets();
+    buckets.take('u', 10, policy, 0);
+
+    expect(buckets.take('u', 4, policy, 2000)).toMatchObject({ allowed: true, remaining: 0 });
+    expect(buckets.take('u', 1, policy, 60000)).toMatchObject({ allowed: true, remaining: 9, resetMs: 500 });
+  });
+
+  test('sweeps buckets that have refilled', () => {
+    const buckets = new TokenBuckets();
+    buckets.take('a', 10, policy, 0);
+    buckets.take('b', 1, policy, 4800);
+
+    buckets.sweep(5000);
+    expect(buckets.size).toBe(1);
+  });
+});
+
+describe('route costs', () => {
+  test('charges compiles more than reads', () => {
+    expect(costOf({ method: 'GET', path: '/algorithms' })).toBe(1);
+    expect(costOf({ method: 'GET', path: '/health' })).toBe(0);
+    expect(costOf({ method: 'POST', path: '/compiler/compile' })).toBe(10);
+    expect(costOf({ method: 'POST', path: '/algorithms/abc/benchmark' })).toBe(30);
+  });
+});
@@ -0,0 +1,53 @@
+const { WindowCounter, SharedStore } = require('../../server/services/rateLimitStore');
+const clusterBus = require('../../server/services/clusterBus');
+
+describe('rate limit store', () => {
+  test('counts hits per key within a window', () => {
+    const counter = new WindowCounter();
+
+    expect(counter.increment('a', 1000, 0)).toEqual({ totalHits: 1, resetTime: 1000 });
+    expect(counter.increment('a', 1000, 500)).toEqual({ totalHits: 2, resetTime: 1000 });
+    expect(counter.increment('b', 1000, 500).totalHits).toBe(1);
+    expect(counter.increment('a', 1000, 1000)).toEqual({ totalHits: 1, resetTime: 2000 });
+  });
+
+  test('sweeps expired windows and resets by prefix', () => {
+    const counter = new WindowCounter();
+    counter.increment('api:1', 1000, 0);
+    counter.increment('api:2', 5000, 0);
+    counter.increment('auth:1', 5000, 0);
+
+    counter.sweep(2000);
+    expect(counter.size).toBe(2);
+
+    counter.resetPrefix('api:');
+    expect(counter.size).toBe(1);
+  });
+
+  test('shared store runs in-process outside cluster mode', async () => {
+    const store = new SharedStore({ prefix: 'test:' });
+    store.init({ windowMs: 60 * 1000 });
+
+    await store.increment('client');
+    const { totalHits, resetTime } = await store.increment('client');
+    expect(totalHits).toBe(2);
+    expect(resetTime instanceof Date).toBe(true);
+
+    await store.decrement('client');
+    expect((await store.increment('client')).totalHits).toBe(2);
+
+    await store.resetKey('client');
+    expect((await store.increment('client')).totalHits).toBe(1);
+  });
+
+  test('delivers published messages to subscribers', () => {
+    const received = [];
+    const unsubscribe = clusterBus.subscribe('test:channel', payload => received.push(payload));
+
+    clusterBus.deliver('test:channel', { tags: ['a'] });
+    unsubscribe();
+    clusterBus.deliver('test:channel', { tags: ['b'] });
+
+    expect(received).toEqual([{ tags: ['a'] }]);
+  });
+});
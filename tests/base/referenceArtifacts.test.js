@@ -0,0 +1,72 @@
+const fs = require('fs');
+const os = require('os');
+const path = require('path');
+
+const scratch = fs.mkdtempSync(path.join(os.tmpdir(), 'reference-artifacts-test-'));
+process.env.COMPILER_SCRATCH_DIR = scratch;
+
+const referenceArtifacts = require('../../server/services/referenceArtifacts');
+
+jest.setTimeout(30000);
+
+const doc = {
+  _id: 'doc-1',
+  name: 'Stack',
+  headerCode: 'int peek(void);\n',
+  cCode: 'int peek(void) { return 1; }\n'
+};
+
+describe('referenceArtifacts', () => {
+  afterAll(() => fs.promises.rm(scratch, { recursive: true, force: true }));
+
+  test('builds the header, precompiled header and reference object', async () => {
+    const artifacts = await referenceArtifacts.acquire(doc);
+
+    expect(artifacts.headerName).toBe('stack.h');
+    expect(fs.existsSync(path.join(artifacts.dir, 'stack.h'))).toBe(true);
+    expect(artifacts.precompiledHeader).toBe(true);
+    expect(fs.existsSync(artifacts.objectPath)).toBe(true);
+    artifacts.release();
+  });
+
+  test('releasing a retired build never removes a rebuild of the same content', async () => {
+    const retired = await referenceArtifacts.acquire(doc);
+    referenceArtifacts.invalidate(doc._id);
+    const rebuilt = await referenceArtifacts.acquire(doc);
+
+    expect(rebuilt.key).toBe(retired.key);
+    expect(rebuilt.dir).not.toBe(retired.dir);
+    retired.release();
+    await new Promise(resolve => setTimeout(resolve, 50));
+
+    expect(fs.existsSync(retired.dir)).toBe(false);
+    expect(fs.existsSync(rebuilt.objectPath)).toBe(true);
+    rebuilt.release();
+  });
+});
+
+describe('referenceArtifacts in a cluster worker', () => {
+  const base = path.join(scratch, 'cluster');
+  // pid 1 is always running, so this stands in for a worker still draining
+  const draining = path.join(base, 'worker-0-1');
+  let workerArtifacts;
+
+  beforeAll(() => {
+    fs.mkdirSync(path.join(draining, 'build'), { recursive: true });
+    jest.isolateModules(() => {
+      process.env.REFERENCE_ARTIFACT_DIR = base;
+      process.env.CLUSTER_WORKER_SLOT = '0';
+      workerArtifacts = require('../../server/services/referenceArtifacts');
+    });
+    delete process.env.CLUSTER_WORKER_SLOT;
+  });
+
+  test('builds into its own directory without sweeping one shared by its slot', async () => {
+    const artifacts = await workerArtifacts.acquire({ ...doc, _id: 'doc-2' });
+
+    expect(path.dirname(artifacts.dir)).toBe(path.join(base, `worker-0-${process.pid}`));
+    expect(fs.existsSync(path.join(draining, 'build'))).toBe(true);
+    artifacts.release();
+  });
+});
+
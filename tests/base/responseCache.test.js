@@ -0,0 +1,58 @@
+const responseCache = require('../../server/services/responseCache');
+
+// Minimal stand-ins for the Express request/response used by the middleware
+const request = (url, params = {}) => ({ originalUrl: url, params });
+const response = () => {
+  const res = {
+    statusCode: 200,
+    headers: {},
+    body: null,
+    set: (name, value) => { res.headers[name] = value; return res; },
+    type: () => res,
+    send: (body) => { res.body = body; return res; },
+    json: (data) => res.send(JSON.stringify(data))
+  };
+  return res;
+};
+
+const serve = (url, data, tags = () => ['items']) => {
+  const res = response();
+  let handled = false;
+  responseCache.cached({ tags })(request(url), res, () => {
+    handled = true;
+    res.json(data);
+  });
+  return { res, handled };
+};
+
+describe('response cache', () => {
+  beforeEach(() => responseCache.clear());
+
+  test('serves repeat reads from the cache with a stable ETag', () => {
+    const first = serve('/api/items/1', { name: 'one' });
+    const second = serve('/api/items/1', { name: 'changed' });
+
+    expect(first.handled).toBe(true);
+    expect(second.handled).toBe(false);
+    expect(second.res.body).toBe(JSON.stringify({ name: 'one' }));
+    expect(second.res.headers.ETag).toBe(first.res.headers.ETag);
+    expect(second.res.headers['X-Cache']).toBe('HIT');
+  });
+
+  test('drops responses by tag', () => {
+    serve('/api/items/1', { name: 'one' }, () => ['item:1']);
+    serve('/api/items/2', { name: 'two' }, () => ['item:2']);
+    responseCache.invalidate('item:1');
+
+    expect(serve('/api/items/1', { name: 'one' }).handled).toBe(true);
+    expect(serve('/api/items/2', { name: 'two' }).handled).toBe(false);
+  });
+
+  test('does not cache error responses', () => {
+    const res = response();
+    res.statusCode = 404;
+    responseCache.cached({ tags: () => [] })(request('/api/items/9'), res, () => res.json({ error: 'Not found.' }));
+
+    expect(serve('/api/items/9', { name: 'nine' }).handled).toBe(true);
+  });
+});
@@ -0,0 +1,145 @@
+const fs = require('fs');
+const os = require('os');
+const path = require('path');
+
+const scratch = fs.mkdtempSync(path.join(os.tmpdir(), 'runner-test-'));
+process.env.COMPILER_SCRATCH_DIR = scratch;
+
+const runner = require('../../server/services/runner');
+
+jest.setTimeout(60000);
+
+const PROGRAMS = {
+  ok: '#include <stdio.h>\nint main(void) { puts("hello"); return 0; }',
+  busy: 'int main(void) { volatile unsigned long n = 0; for (;;) n++; }',
+  sleeper: '#include <unistd.h>\nint main(void) { sleep(5); return 0; }',
+  hog: `#include <stdlib.h>
+#include <string.h>
+int main(void) {
+  for (int i = 0; i < 64; i++) {
+    char *block = malloc(16 << 20);
+    if (!block) return 2;
+    memset(block, 1, 16 << 20);
+  }
+  return 0;
+}`,
+  chatty: '#include <stdio.h>\nint main(void) { for (;;) puts("spam spam spam spam"); }',
+  segfault: 'int main(void) { volatile int *p = 0; return *p; }',
+  exit3: 'int main(void) { return 3; }',
+  // Writes its pid to the file named on stdin, then waits to be killed
+  pidfile: `#include <stdio.h>
+#include <unistd.h>
+int main(void) {
+  char path[512];
+  if (!fgets(path, sizeof path, stdin)) return 1;
+  FILE *f = fopen(path, "w");
+  fprintf(f, "%d", (int)getpid());
+  fclose(f);
+  sleep(30);
+  return 0;
+}`
+};
+
+const binaries = {};
+const wait = ms => new Promise(resolve => setTimeout(resolve, ms));
+
+// Killed processes may linger as zombies when nothing reaps orphans
+const isAlive = (pid) => {
+  try {
+    return !/^State:\s+Z/m.test(fs.readFileSync(`/proc/${pid}/status`, 'utf8'));
+  } catch (error) {
+    return false;
+  }
+};
+
+describe('runner.runBinary', () => {
+  beforeAll(async () => {
+    await Promise.all(Object.entries(PROGRAMS).map(async ([name, code]) => {
+      binaries[name] = path.join(scratch, name);
+      const result = await runner.compile(code, binaries[name]);
+      if (result.code !== 0) throw new Error(`${name} failed to compile: ${result.stderr}`);
+    }));
+  });
+
+  afterAll(() => fs.promises.rm(scratch, { recursive: true, force: true }));
+
+  test('builds the launcher', async () => {
+    const launcher = await runner.getLauncher();
+
+    expect(launcher).toBeTruthy();
+    expect(fs.existsSync(launcher)).toBe(true);
+  });
+
+  test('parses the usage report from fd 3', async () => {
+    const run = await runner.runBinary(binaries.ok, { input: '' });
+
+    expect(run.verdict).toBe('OK');
+    expect(run.code).toBe(0);
+    expect(run.stdout).toBe('hello\n');
+    expect(run.usage.peakRssKb).toBeGreaterThan(0);
+    expect(run.usage.cpuUserMs).not.toBe(null);
+    expect(run.usage.cpuSystemMs).not.toBe(null);
+    expect(run.report).toBeUndefined();
+  });
+
+  test('stops a busy loop at the CPU limit', async () => {
+    const run = await runner.runBinary(binaries.busy, { input: '', timeout: 2000, cpuLimitMs: 300 });
+
+    expect(run.verdict).toBe('TLE');
+    expect(run.usage.timeLimitExceeded).toBe(true);
+    expect(run.usage.wallMs).toBeLessThan(2000);
+  });
+
+  test('stops a sleeping program at the wall limit', async () => {
+    const run = await runner.runBinary(binaries.sleeper, { input: '', timeout: 300 });
+
+    expect(run.verdict).toBe('TLE');
+    expect(run.usage.wallMs).toBeLessThan(3000);
+  });
+
+  test('stops a large allocation at the memory limit', async () => {
+    const run = await runner.runBinary(binaries.hog, { input: '', memoryLimitKb: 64 * 1024 });
+
+    expect(run.verdict).toBe('MLE');
+    expect(run.usage.memoryLimitExceeded).toBe(true);
+  });
+
+  test('stops a program at the output cap', async () => {
+    const run = await runner.runBinary(binaries.chatty, { input: '', outputLimit: 4096 });
+
+    expect(run.verdict).toBe('OLE');
+    expect(run.outputLimitExceeded).toBe(true);
+    expect(run.stdout.length).toBeLessThan(4097);
+  });
+
+  test('reports a segfault as a runtime error', async () => {
+    const run = await runner.runBinary(binaries.segfault, { input: '' });
+
+    expect(run.verdict).toBe('RE');
+    expect(run.signal).toBe('SIGSEGV');
+  });
+
+  test('reports a nonzero exit code as a runtime error', async () => {
+    const run = await runner.runBinary(binaries.exit3, { input: '' });
+
+    expect(run.verdict).toBe('RE');
+    expect(run.code).toBe(3);
+    expect(run.signal).toBe(null);
+  });
+
+  test('kills the program when the signal is aborted', async () => {
+    const pidPath = path.join(scratch, 'pid');
+    const controller = new AbortController();
+    const running = runner.runBinary(binaries.pidfile, { input: pidPath, timeout: 10000, signal: controller.signal });
+
+    while (!fs.existsSync(pidPath) || fs.readFileSync(pidPath, 'utf8') === '') await wait(20);
+    const pid = parseInt(fs.readFileSync(pidPath, 'utf8'), 10);
+    controller.abort();
+    const run = await running;
+    await wait(100);
+
+    expect(run.usage.wallMs).toBeLessThan(5000);
+    expect(run.verdict).not.toBe('OK');
+    expect(isAlive(pid)).toBe(false);
+  });
+});
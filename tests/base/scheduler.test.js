@@ -0,0 +1,49 @@
+const { JobScheduler, QueueFullError } = require('../../server/services/scheduler');
+
+const delayed = (value, ms = 10) => () => new Promise(resolve => setTimeout(() => resolve(value), ms));
+
+describe('JobScheduler', () => {
+  test('never runs more than the configured number of jobs', async () => {
+    const scheduler = new JobScheduler({ concurrency: 2, maxQueue: 10 });
+    let active = 0;
+    let peak = 0;
+
+    const task = async () => {
+      active += 1;
+      peak = Math.max(peak, active);
+      await delayed(null)();
+      active -= 1;
+    };
+
+    await Promise.all([1, 2, 3, 4, 5].map(i => scheduler.schedule(`user-${i}`, task)));
+    expect(peak).toBe(2);
+  });
+
+  test('serves owners round-robin', async () => {
+    const scheduler = new JobScheduler({ concurrency: 1, maxQueue: 10, maxQueuePerOwner: 5 });
+    const order = [];
+    const task = (label) => async () => { order.push(label); };
+
+    await Promise.all([
+      scheduler.schedule('a', task('a1')),
+      scheduler.schedule('a', task('a2')),
+      scheduler.schedule('a', task('a3')),
+      scheduler.schedule('b', task('b1'))
+    ]);
+
+    expect(order).toEqual(['a1', 'a2', 'b1', 'a3']);
+  });
+
+  test('rejects with Retry-After information when the queue is full', async () => {
+    const scheduler = new JobScheduler({ concurrency: 1, maxQueue: 1, maxQueuePerOwner: 1 });
+    const running = scheduler.schedule('a', delayed(1));
+    const queued = scheduler.schedule('b', delayed(2));
+
+    await expect(scheduler.schedule('c', delayed(3))).rejects.toBeInstanceOf(QueueFullError);
+    await expect(scheduler.schedule('c', delayed(3))).rejects.toMatchObject({ status: 503 });
+
+    const [first, second] = await Promise.all([running, queued]);
+    expect(first.result).toBe(1);
+    expect(second.queueWaitMs).toBeGreaterThanOrEqual(0);
+  });
+});
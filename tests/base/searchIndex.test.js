@@ -0,0 +1,54 @@
+const { SearchIndex, CatalogIndex, tokenize } = require('../../server/services/searchIndex');
+
+const catalog = () => {
+  const index = new SearchIndex();
+  index.add({ id: 'bubble', name: 'Bubble Sort', description: 'Repeatedly swaps adjacent elements.', tags: ['sorting'], meta: { category: 'sorting' } });
+  index.add({ id: 'merge', name: 'Merge Sort', description: 'Divide and conquer sorting by merging halves.', tags: ['sorting', 'recursion'], meta: { category: 'sorting' } });
+  index.add({ id: 'binary', name: 'Binary Search', description: 'Halves a sorted array each step.', tags: ['searching'], meta: { category: 'searching' } });
+  return index;
+};
+
+describe('search index', () => {
+  test('tokenizes case- and accent-insensitively', () => {
+    expect(tokenize('Dijkstra’s Shortest-Path, O(n log n)')).toEqual(['dijkstra', 's', 'shortest', 'path', 'o', 'n', 'log', 'n']);
+    expect(tokenize('Tri fusionné')).toEqual(['tri', 'fusionne']);
+  });
+
+  test('ranks name matches above description matches', () => {
+    const ids = catalog().search('merge').map(result => result.id);
+    expect(ids[0]).toBe('merge');
+  });
+
+  test('matches prefixes and requires every token', () => {
+    const index = catalog();
+    expect(index.search('bin sea').map(result => result.id)).toEqual(['binary']);
+    expect(index.search('sort').map(result => result.id).sort()).toEqual(['binary', 'bubble', 'merge']);
+    expect(index.search('bubble merge')).toEqual([]);
+  });
+
+  test('applies filters and forgets removed documents', () => {
+    const index = catalog();
+    expect(index.search('sort', { filter: meta => meta.category === 'searching' }).map(result => result.id)).toEqual(['binary']);
+    index.remove('binary');
+    expect(index.search('binary')).toEqual([]);
+    expect(index.size).toBe(2);
+  });
+
+  test('replays writes made while the catalog is loading', async () => {
+    let finishLoad;
+    const Model = {
+      find: () => ({
+        select: () => ({
+          lean: () => new Promise((resolve) => { finishLoad = resolve; })
+        })
+      })
+    };
+    const catalogIndex = new CatalogIndex(Model);
+    const pending = catalogIndex.search('heap');
+    catalogIndex.upsert({ _id: 'heap', name: 'Heap Sort', description: 'Uses a binary heap.', tags: [] });
+    finishLoad([{ _id: 'quick', name: 'Quick Sort', description: 'Partitions around a pivot.', tags: [] }]);
+
+    expect(await pending).toEqual(['heap']);
+    expect(await catalogIndex.search('quick')).toEqual(['quick']);
+  });
+});
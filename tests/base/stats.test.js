@@ -0,0 +1,25 @@
+const { percentile, median, summarize } = require('../../server/utils/stats');
+
+describe('stats', () => {
+  test('computes medians of odd and even samples', () => {
+    expect(median([3, 1, 2])).toBe(2);
+    expect(median([4, 1, 3, 2])).toBe(2.5);
+  });
+
+  test('interpolates percentiles', () => {
+    expect(percentile([10, 20, 30, 40, 50], 0.25)).toBe(20);
+    expect(percentile([10, 20], 0.5)).toBe(15);
+    expect(percentile([], 0.5)).toBeNull();
+  });
+
+  test('summarizes spread', () => {
+    const summary = summarize([2, 4, 4, 4, 5, 5, 7, 9]);
+    expect(summary.count).toBe(8);
+    expect(summary.mean).toBe(5);
+    expect(summary.stdev).toBe(2);
+    expect(summary.min).toBe(2);
+    expect(summary.max).toBe(9);
+    expect(summary.iqr).toBeCloseTo(summary.p75 - summary.p25);
+    expect(summarize([])).toBeNull();
+  });
+});
@@ -0,0 +1,65 @@
+const { SubmissionCounters } = require('../../server/services/submissionCounters');
+
+// Records bulkWrite batches instead of talking to MongoDB
+const fakeModel = () => {
+  const batches = [];
+  return {
+    batches,
+    bulkWrite: async (operations) => {
+      batches.push(operations);
+      return { modifiedCount: operations.length };
+    }
+  };
+};
+
+const algorithm = (id, total = 0, successful = 0) => ({ _id: id, submissions: { total, successful } });
+
+describe('submission counters', () => {
+  test('coalesces increments per algorithm into one bulk write', async () => {
+    const Model = fakeModel();
+    const counters = new SubmissionCounters({ mode: 'coalesce', flushIntervalMs: 60000, flushThreshold: 1000, Model });
+
+    await counters.record(algorithm('a', 10, 5), true);
+    await counters.record(algorithm('a', 10, 5), false);
+    const latest = await counters.record(algorithm('b', 0, 0), true);
+    await counters.flush();
+    clearInterval(counters.timer);
+
+    expect(latest).toEqual({ total: 1, successful: 1 });
+    expect(Model.batches).toHaveLength(1);
+    expect(Model.batches[0]).toEqual([
+      { updateOne: { filter: { _id: 'a' }, update: { $inc: { 'submissions.total': 2, 'submissions.successful': 1 } } } },
+      { updateOne: { filter: { _id: 'b' }, update: { $inc: { 'submissions.total': 1, 'submissions.successful': 1 } } } }
+    ]);
+    expect(counters.getStats().pendingIncrements).toBe(0);
+  });
+
+  test('retries increments from a failed flush', async () => {
+    const Model = { bulkWrite: async () => { throw new Error('connection lost'); } };
+    const counters = new SubmissionCounters({ mode: 'coalesce', flushIntervalMs: 60000, flushThreshold: 1000, Model });
+    const consoleError = jest.spyOn(console, 'error').mockImplementation(() => {});
+
+    await counters.record(algorithm('a'), true);
+    await counters.flush();
+    clearInterval(counters.timer);
+    consoleError.mockRestore();
+
+    expect(counters.getStats().pendingIncrements).toBe(1);
+    expect(counters.getStats().failedFlushes).toBe(1);
+  });
+
+  test('close writes increments recorded while a flush was in flight', async () => {
+    const Model = fakeModel();
+    const counters = new SubmissionCounters({ mode: 'coalesce', flushIntervalMs: 60000, flushThreshold: 1000, Model });
+
+    await counters.record(algorithm('a'), true);
+    const inFlight = counters.flush();
+    await counters.record(algorithm('b'), false);
+    await counters.close();
+    await inFlight;
+
+    expect(Model.batches).toHaveLength(2);
+    expect(Model.batches[1][0].updateOne.filter).toEqual({ _id: 'b' });
+    expect(counters.getStats().pendingIncrements).toBe(0);
+  });
+});
@@ -0,0 +1,51 @@
+const fs = require('fs');
+const os = require('os');
+const path = require('path');
+const { spawn } = require('child_process');
+const { workerDir, sweepWorkerDirs } = require('../../server/utils/workerDirs');
+
+describe('worker directories', () => {
+  let root;
+  let running;
+  let exitedPid;
+
+  beforeAll(async () => {
+    running = spawn('sleep', ['30']);
+    const exited = spawn('true');
+    exitedPid = exited.pid;
+    await new Promise(resolve => exited.once('exit', resolve));
+  });
+
+  beforeEach(() => {
+    root = fs.mkdtempSync(path.join(os.tmpdir(), 'worker-dirs-test-'));
+  });
+
+  afterEach(() => fs.promises.rm(root, { recursive: true, force: true }));
+
+  afterAll(() => running.kill());
+
+  test('names a directory by slot and pid, or uses the root outside cluster mode', () => {
+    expect(workerDir(root, { slot: '2', pid: 1234 })).toBe(path.join(root, 'worker-2-1234'));
+    expect(workerDir(root, { slot: undefined })).toBe(root);
+  });
+
+  test('keeps the directory of a draining worker that shares the slot', async () => {
+    const draining = workerDir(root, { slot: '0', pid: running.pid });
+    const exited = workerDir(root, { slot: '0', pid: exitedPid });
+    for (const dir of [draining, exited, path.join(root, 'worker-0')]) {
+      fs.mkdirSync(dir);
+      fs.writeFileSync(path.join(dir, 'binary.partial'), '');
+    }
+    fs.writeFileSync(path.join(root, 'unrelated'), '');
+
+    const removed = await sweepWorkerDirs(root);
+
+    expect(removed.sort()).toEqual(['worker-0', `worker-0-${exitedPid}`]);
+    expect(fs.existsSync(path.join(draining, 'binary.partial'))).toBe(true);
+    expect(fs.existsSync(path.join(root, 'unrelated'))).toBe(true);
+  });
+
+  test('has nothing to sweep before the root exists', async () => {
+    expect(await sweepWorkerDirs(path.join(root, 'missing'))).toEqual([]);
+  });
+});